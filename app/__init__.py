@@ -51,6 +51,7 @@ def create_app(config_class=Config):
     # (opsional) chatbot routes
     from app.routes.chatbot_routes import chatbot_bp
     from app.routes.feedback_routes import feedback_bp
+    from app.routes.upload_routes import upload_bp, upload_files_bp
 
 
     from app.web.auth_routes import web_auth_bp
@@ -74,6 +75,8 @@ def create_app(config_class=Config):
     app.register_blueprint(consultation_bp)
     app.register_blueprint(chatbot_bp)
     app.register_blueprint(feedback_bp)
+    app.register_blueprint(upload_bp)
+    app.register_blueprint(upload_files_bp)
 
     app.register_blueprint(web_auth_bp)
     app.register_blueprint(admin_bp)
@@ -92,6 +95,36 @@ def create_app(config_class=Config):
     app.register_blueprint(web_session_bp)
 
     from app import socket_events
+    from app.services.payment_service import payment_service
+    payment_service.init_app(app)
+    from app.services.chat_batcher import chat_batcher
+    chat_batcher.init_app(app)
+    from app.services.article_search import init_search
+    init_search()
+    from app.services.content_version import init_content_versions
+    init_content_versions()
+    from app.services.response_cache import response_cache
+    response_cache.init_app(app)
+    from app.services.upload_store import upload_store
+    upload_store.init_app(app)
+    from app.services.upload_stream import init_upload_requests
+    init_upload_requests(app)
+    from app.services.upload_gc import upload_deletion_worker
+    upload_deletion_worker.init_app(app)
+    from app.services.image_variants import image_variant_worker
+    image_variant_worker.init_app(app)
+    from app.cli import register_commands
+    register_commands(app)
+    from app.services.presence_service import presence
+    presence.ttl_seconds = app.config.get("PRESENCE_TTL_SECONDS", presence.ttl_seconds)
+    from app.services.consultation_access import consultation_access
+    consultation_access.ttl_seconds = app.config.get(
+        "CONSULTATION_ACCESS_TTL_SECONDS", consultation_access.ttl_seconds
+    )
+    from app.services.payment_status_cache import payment_status_cache
+    payment_status_cache.ttl_seconds = app.config.get(
+        "PAYMENT_STATUS_CACHE_TTL_SECONDS", payment_status_cache.ttl_seconds
+    )
 
     @app.route("/")
     def index():
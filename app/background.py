@@ -0,0 +1,89 @@
+from app.extensions import db, socketio
+
+
+def _every(app, interval_seconds, job, name):
+    """Loop background: jalankan job() tiap interval_seconds di dalam app context."""
+    def loop():
+        while True:
+            socketio.sleep(interval_seconds)
+            with app.app_context():
+                try:
+                    job()
+                except Exception as e:
+                    print(f"❌ Job {name} gagal: {e}")
+                finally:
+                    db.session.remove()
+    socketio.start_background_task(loop)
+    print(f"🕒 Job {name} jalan tiap {interval_seconds} detik")
+
+
+def start_background_jobs(app):
+    """
+    Jadwalkan job periodik di proses server (dipanggil dari run.py).
+    Interval 0 = job dimatikan (misal kalau sudah dijalankan lewat cron + CLI).
+    """
+    from app.services.consultation_sweeper import sweep_expired_consultations, sweep_orphaned_bookings
+    from app.services.payment_processor import process_pending_notifications
+    from app.services.ledger_service import rebuild_balances
+    from app.services.payment_reconciliation import reconcile_payments
+    from app.services.revenue_rollup import rebuild_rollups
+    from app.services.withdrawal_service import process_withdrawals
+    from app.services.upload_gc import collect_orphaned_uploads, process_upload_deletions
+
+    sweep_interval = app.config.get("CONSULTATION_SWEEP_INTERVAL_SECONDS", 0)
+    if sweep_interval:
+        batch_size = app.config.get("CONSULTATION_SWEEP_BATCH_SIZE", 500)
+        _every(
+            app, sweep_interval,
+            lambda: sweep_expired_consultations(batch_size=batch_size),
+            "sweep-consultations",
+        )
+
+    orphan_interval = app.config.get("ORPHANED_BOOKING_SWEEP_INTERVAL_SECONDS", 0)
+    if orphan_interval:
+        older_than = app.config.get("ORPHANED_BOOKING_MINUTES", 30)
+        _every(
+            app, orphan_interval,
+            lambda: sweep_orphaned_bookings(older_than_minutes=older_than),
+            "sweep-orphaned-bookings",
+        )
+
+    notif_interval = app.config.get("PAYMENT_NOTIFICATION_INTERVAL_SECONDS", 0)
+    if notif_interval:
+        _every(app, notif_interval, process_pending_notifications, "process-payment-notifications")
+
+    ledger_interval = app.config.get("LEDGER_REBUILD_INTERVAL_SECONDS", 0)
+    if ledger_interval:
+        _every(app, ledger_interval, rebuild_balances, "rebuild-balances")
+
+    reconcile_interval = app.config.get("PAYMENT_RECONCILE_INTERVAL_SECONDS", 0)
+    if reconcile_interval:
+        _every(app, reconcile_interval, reconcile_payments, "reconcile-payments")
+
+    rollup_interval = app.config.get("REVENUE_ROLLUP_REBUILD_INTERVAL_SECONDS", 0)
+    if rollup_interval:
+        _every(app, rollup_interval, rebuild_rollups, "rebuild-rollups")
+
+    withdrawal_interval = app.config.get("WITHDRAWAL_BATCH_INTERVAL_SECONDS", 0)
+    if withdrawal_interval:
+        batch_size = app.config.get("WITHDRAWAL_BATCH_SIZE", 500)
+        _every(
+            app, withdrawal_interval,
+            lambda: process_withdrawals(max_items=batch_size),
+            "process-withdrawals",
+        )
+
+    upload_delete_interval = app.config.get("UPLOAD_DELETE_INTERVAL_SECONDS", 0)
+    if upload_delete_interval:
+        _every(app, upload_delete_interval, process_upload_deletions, "process-upload-deletions")
+
+    upload_gc_interval = app.config.get("UPLOAD_GC_INTERVAL_SECONDS", 0)
+    if upload_gc_interval:
+        grace = app.config.get("UPLOAD_GC_GRACE_SECONDS", 86400)
+        batch_size = app.config.get("UPLOAD_GC_BATCH_SIZE", 500)
+
+        def gc_uploads():
+            collect_orphaned_uploads(grace_seconds=grace, batch_size=batch_size)
+            process_upload_deletions()
+
+        _every(app, upload_gc_interval, gc_uploads, "gc-uploads")
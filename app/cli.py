@@ -0,0 +1,170 @@
+import click
+
+
+def register_commands(app):
+    """Perintah CLI (flask <nama>) untuk job yang bisa dijalankan manual / via cron."""
+
+    @app.cli.command("sweep-consultations")
+    @click.option("--batch-size", default=500, show_default=True)
+    def sweep_consultations_command(batch_size):
+        """Tutup konsultasi aktif yang sudah lewat expired_at."""
+        from app.services.consultation_sweeper import sweep_expired_consultations
+
+        closed = sweep_expired_consultations(batch_size=batch_size)
+        click.echo(f"{closed} konsultasi ditutup")
+
+    @app.cli.command("sweep-orphaned-bookings")
+    @click.option("--older-than", default=30, show_default=True, help="Menit sejak booking dibuat")
+    def sweep_orphaned_bookings_command(older_than):
+        """Batalkan booking pending yang tidak pernah dapat token Midtrans."""
+        from app.services.consultation_sweeper import sweep_orphaned_bookings
+
+        closed = sweep_orphaned_bookings(older_than_minutes=older_than)
+        click.echo(f"{closed} booking dibatalkan")
+
+    @app.cli.command("process-payment-notifications")
+    @click.option("--batch-size", default=100, show_default=True)
+    def process_payment_notifications_command(batch_size):
+        """Proses inbox webhook Midtrans yang belum diproses."""
+        from app.services.payment_processor import process_pending_notifications
+
+        processed = process_pending_notifications(batch_size=batch_size)
+        click.echo(f"{processed} notifikasi diproses")
+
+    @app.cli.command("rebuild-balances")
+    def rebuild_balances_command():
+        """Hitung ulang User.balance dari ledger_entries."""
+        from app.services.ledger_service import rebuild_balances
+
+        fixed = rebuild_balances()
+        click.echo(f"{fixed} saldo dikoreksi")
+
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups_command():
+        """Bangun ulang rekap revenue harian dari tabel payments."""
+        from app.services.revenue_rollup import rebuild_rollups
+
+        total = rebuild_rollups()
+        click.echo(f"{total} baris rollup")
+
+    @app.cli.command("reindex-articles")
+    @click.option("--batch-size", default=200, show_default=True)
+    def reindex_articles_command(batch_size):
+        """Bangun ulang index pencarian full-text artikel."""
+        from app.services.article_search import reindex_articles
+
+        total = reindex_articles(batch_size=batch_size)
+        click.echo(f"{total} artikel di-reindex")
+
+    @app.cli.command("backfill-article-fields")
+    @click.option("--batch-size", default=200, show_default=True)
+    def backfill_article_fields_command(batch_size):
+        """Hitung ulang preview, word_count, reading_time semua artikel (migrasi sudah mengisi artikel lama)."""
+        from app.models.article import Article
+        from app.extensions import db
+
+        total = 0
+        last_id = 0
+        while True:
+            articles = (
+                Article.query
+                .filter(Article.id > last_id)
+                .order_by(Article.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            if not articles:
+                break
+            for article in articles:
+                article.update_derived_fields()
+            db.session.commit()
+            total += len(articles)
+            last_id = articles[-1].id
+        click.echo(f"{total} artikel diperbarui")
+
+    @app.cli.command("migrate-uploads")
+    @click.option("--batch-size", default=200, show_default=True)
+    def migrate_uploads_command(batch_size):
+        """Pindahkan upload lama (nama flat) ke penyimpanan content-addressed + dedup."""
+        from app.services.upload_store import migrate_legacy_uploads
+
+        moved, missing = migrate_legacy_uploads(batch_size=batch_size)
+        click.echo(f"{moved} file dipindah, {missing} file tidak ditemukan")
+
+    @app.cli.command("process-upload-deletions")
+    @click.option("--batch-size", default=500, show_default=True)
+    def process_upload_deletions_command(batch_size):
+        """Hapus file di antrian upload_deletions."""
+        from app.services.upload_gc import process_upload_deletions
+
+        deleted = process_upload_deletions(batch_size=batch_size)
+        click.echo(f"{deleted} file dihapus")
+
+    @app.cli.command("gc-uploads")
+    @click.option("--grace-hours", default=24, show_default=True, help="File lebih baru dari ini tidak disentuh")
+    @click.option("--batch-size", default=500, show_default=True)
+    @click.option("--dry-run", is_flag=True, help="Cuma tampilkan file yatim, tidak dihapus")
+    def gc_uploads_command(grace_hours, batch_size, dry_run):
+        """Cari file upload yang tidak dipakai kolom mana pun lalu hapus."""
+        from app.services.upload_gc import collect_orphaned_uploads, process_upload_deletions
+
+        checked, orphaned = collect_orphaned_uploads(
+            grace_seconds=grace_hours * 3600, batch_size=batch_size, dry_run=dry_run
+        )
+        deleted = 0 if dry_run else process_upload_deletions(batch_size=batch_size)
+        click.echo(f"{checked} file diperiksa, {orphaned} yatim, {deleted} dihapus")
+
+    @app.cli.command("generate-image-variants")
+    @click.option("--force", is_flag=True, help="Buat ulang juga yang sudah punya varian")
+    def generate_image_variants_command(force):
+        """Buat varian thumb/medium untuk gambar upload yang sudah ada."""
+        from app.services.image_variants import backfill_variants
+
+        processed, failed = backfill_variants(force=force)
+        click.echo(f"{processed} gambar diproses, {failed} gagal")
+
+    @app.cli.command("bench-feed-bytes")
+    @click.option("--pages", default=5, show_default=True)
+    @click.option("--limit", default=20, show_default=True)
+    @click.option("--format", "fmt", default="webp", show_default=True, type=click.Choice(["webp", "jpeg"]))
+    def bench_feed_bytes_command(pages, limit, fmt):
+        """Bandingkan byte gambar per halaman feed: file asli vs varian."""
+        import json
+        from app.services.image_variants import measure_feed_bytes
+
+        click.echo(json.dumps(measure_feed_bytes(pages=pages, limit=limit, fmt=fmt), indent=2))
+
+    @app.cli.command("reconcile-payments")
+    @click.option("--older-than", default=15, show_default=True, help="Menit sejak payment dibuat")
+    @click.option("--limit", default=500, show_default=True)
+    @click.option("--workers", default=8, show_default=True)
+    @click.option("--rate", default=10.0, show_default=True, help="Maks request Midtrans per detik")
+    def reconcile_payments_command(older_than, limit, workers, rate):
+        """Cocokkan payment pending/challenge dengan Midtrans Status API."""
+        import json
+        from app.services.payment_reconciliation import reconcile_payments
+
+        report = reconcile_payments(
+            older_than_minutes=older_than, limit=limit, max_workers=workers, rate_per_second=rate
+        )
+        click.echo(json.dumps(report, indent=2))
+
+    @app.cli.command("process-withdrawals")
+    @click.option("--batch-size", default=500, show_default=True)
+    @click.option("--max-batches", default=10, show_default=True)
+    def process_withdrawals_command(batch_size, max_batches):
+        """Kelompokkan withdrawal pending jadi batch payout, debit saldo, tulis file payout."""
+        import json
+        from app.services.withdrawal_service import process_withdrawals
+
+        results = process_withdrawals(max_items=batch_size, max_batches=max_batches)
+        click.echo(json.dumps(results, indent=2))
+
+    @app.cli.command("export-payout")
+    @click.argument("batch_id", type=int)
+    @click.option("--dir", "directory", default=None, help="Folder tujuan (default PAYOUT_EXPORT_DIR)")
+    def export_payout_command(batch_id, directory):
+        """Tulis ulang file payout untuk 1 batch penarikan."""
+        from app.services.withdrawal_service import export_payout_file
+
+        click.echo(export_payout_file(batch_id, directory))
@@ -1,8 +1,18 @@
 from app.extensions import db
 from datetime import datetime
+import math
+
+from app.utils.text_id import words
+
+# Field turunan dari content (disimpan saat tulis, list tidak perlu baca content)
+PREVIEW_LENGTH = 200
+WORDS_PER_MINUTE = 200
 
 class Article(db.Model):
     __tablename__ = 'articles'
+    __table_args__ = (
+        db.Index('ix_articles_created_at_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -11,13 +21,32 @@ class Article(db.Model):
     tags = db.Column(db.String(100), nullable=True) # Misal: "Anemia,Tips"
     
     # Siapa penulisnya? (Harus Dokter)
-    author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Turunan content, dihitung ulang setiap content berubah
+    # (listener ORM didaftarkan di services/article_search.py)
+    preview = db.Column(db.String(PREVIEW_LENGTH), nullable=True)
+    word_count = db.Column(db.Integer, nullable=False, default=0)
+    reading_time = db.Column(db.Integer, nullable=False, default=1) # menit
+
+    # Teks hasil tokenize + stem (Bahasa Indonesia) untuk index full-text.
+    # Diisi otomatis saat insert/update (lihat services/article_search.py);
+    # index FULLTEXT / GIN-nya dibuat di migration. Deferred: tidak ikut di-load biasa.
+    search_title = db.deferred(db.Column(db.String(400), nullable=True))
+    search_body = db.deferred(db.Column(db.Text, nullable=True))
+
     # Relasi ke user
     author = db.relationship('User', backref=db.backref('articles', lazy=True))
 
+    def update_derived_fields(self):
+        """Isi preview, word_count, reading_time dari content."""
+        content = self.content or ""
+        self.preview = content[:PREVIEW_LENGTH]
+        self.word_count = len(words(content))
+        self.reading_time = max(1, math.ceil(self.word_count / WORDS_PER_MINUTE))
+
     def __repr__(self):
-        return f"<Article {self.title}>"
\ No newline at end of file
+        return f"<Article {self.title}>"
@@ -3,15 +3,19 @@ from datetime import datetime
 
 class Consultation(db.Model):
     __tablename__ = 'consultations'
+    __table_args__ = (
+        db.Index('ix_consultations_created_at_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     
     # Siapa pasiennya? Siapa dokternya?
-    patient_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    doctor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Status Konsultasi
-    # 'pending' (belum bayar), 'active' (sedang chat), 'completed' (selesai)
+    # 'pending' (belum bayar), 'active' (sedang chat), 'completed' (selesai),
+    # 'cancelled' (booking gagal dibuat di payment gateway)
     status = db.Column(db.String(20), default='pending')
 
     expired_at = db.Column(db.DateTime, nullable=True)
@@ -19,9 +23,18 @@ class Consultation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Payment terbaru (denormalisasi, diisi saat booking) -> list admin cukup join by PK
+    latest_payment_id = db.Column(
+        db.Integer,
+        db.ForeignKey('payments.id', use_alter=True, name='fk_consultations_latest_payment_id'),
+        nullable=True,
+        index=True,
+    )
+
     # Relasi
     patient = db.relationship('User', foreign_keys=[patient_id], backref='patient_consultations')
     doctor = db.relationship('User', foreign_keys=[doctor_id], backref='doctor_consultations')
+    latest_payment = db.relationship('Payment', foreign_keys=[latest_payment_id], post_update=True)
 
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
@@ -36,6 +49,10 @@ class ChatMessage(db.Model):
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_created_at_id', 'created_at', 'id'),
+        db.Index('ix_payments_status_created_at', 'status', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     consultation_id = db.Column(db.Integer, db.ForeignKey('consultations.id'), nullable=False)
@@ -47,8 +64,13 @@ class Payment(db.Model):
     status = db.Column(db.String(20), default='pending')
     
     # ID Transaksi dari Payment Gateway (Misal: Order ID Midtrans)
-    transaction_id = db.Column(db.String(100), nullable=True)
+    transaction_id = db.Column(db.String(100), nullable=True, index=True)
+
+    # Snap token & redirect URL dari Midtrans (diisi setelah gateway merespons)
+    # payment_token '' = payment lama dari sebelum kolom ini ada (token tidak tersimpan)
+    payment_token = db.Column(db.String(255), nullable=True)
+    payment_url = db.Column(db.String(255), nullable=True)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # di Payment model
-    consultation = db.relationship("Consultation", backref="payments")
+    consultation = db.relationship("Consultation", foreign_keys=[consultation_id], backref="payments")
@@ -0,0 +1,17 @@
+from app.extensions import db
+from datetime import datetime
+
+class ContentVersion(db.Model):
+    """
+    Nomor versi per koleksi konten publik (misal 'articles').
+    Naik 1 setiap ada create/update/delete di koleksi itu (lihat services/content_version.py),
+    dipakai untuk ETag/Last-Modified dan key cache respons.
+    """
+    __tablename__ = 'content_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ContentVersion {self.name} v{self.version}>"
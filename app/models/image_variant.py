@@ -0,0 +1,27 @@
+from app.extensions import db
+from datetime import datetime
+
+class ImageVariant(db.Model):
+    """
+    Versi kecil dari 1 gambar upload (artikel, foto profil, skrining).
+    Dibuat di background setelah upload (services/image_variants.py);
+    API memilih varian sesuai konteks (thumb untuk avatar, medium untuk kartu/detail artikel).
+    source_path = path asli seperti yang tersimpan di DB (static/uploads/...).
+    """
+    __tablename__ = 'image_variants'
+    __table_args__ = (
+        db.UniqueConstraint('source_path', 'variant', 'format', name='uq_image_variants_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    source_path = db.Column(db.String(255), nullable=False)
+    variant = db.Column(db.String(20), nullable=False)  # thumb / medium
+    format = db.Column(db.String(10), nullable=False)   # webp / jpeg
+    path = db.Column(db.String(255), nullable=False)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ImageVariant {self.source_path} {self.variant}.{self.format}>"
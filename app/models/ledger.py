@@ -0,0 +1,35 @@
+from app.extensions import db
+from datetime import datetime
+
+# FK withdrawal_id butuh tabel 'withdrawals' terdaftar di metadata saat flush,
+# jadi model-nya ikut di-import di sini (bukan cuma lewat withdrawal_service)
+from app.models.withdrawal import Withdrawal  # noqa: F401
+
+class LedgerEntry(db.Model):
+    """
+    Buku besar pendapatan dokter (satu sisi: hanya akun dokter yang dicatat,
+    bukan double-entry; bagian admin / kas tidak punya baris sendiri).
+    amount positif = kredit (uang masuk dari Payment)
+    amount negatif = debit (uang keluar lewat Withdrawal)
+    SUM(amount) per dokter = saldo yang benar; User.balance cuma cache-nya.
+    """
+    __tablename__ = 'ledger_entries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # 'payment_credit' / 'withdrawal_debit' / 'opening_balance'
+    entry_type = db.Column(db.String(30), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)
+
+    # Unique: 1 payment cuma boleh dikreditkan 1x, 1 withdrawal cuma didebit 1x
+    payment_id = db.Column(db.Integer, db.ForeignKey('payments.id'), nullable=True, unique=True)
+    withdrawal_id = db.Column(db.Integer, db.ForeignKey('withdrawals.id'), nullable=True, unique=True)
+
+    description = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    user = db.relationship('User', backref=db.backref('ledger_entries', lazy='dynamic'))
+
+    def __repr__(self):
+        return f"<LedgerEntry user={self.user_id} {self.entry_type} {self.amount}>"
@@ -0,0 +1,33 @@
+from app.extensions import db
+from datetime import datetime
+
+class PaymentNotification(db.Model):
+    """
+    Inbox webhook Midtrans. Setiap notifikasi disimpan dulu di sini,
+    lalu diproses oleh background processor (payment_processor).
+    Unique (order_id, transaction_status) -> notifikasi dobel dari Midtrans jadi no-op.
+    """
+    __tablename__ = 'payment_notifications'
+    __table_args__ = (
+        db.UniqueConstraint('order_id', 'transaction_status', name='uq_payment_notifications_order_status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.String(100), nullable=False, index=True)
+    transaction_status = db.Column(db.String(30), nullable=False)
+    fraud_status = db.Column(db.String(30), nullable=True)
+    payment_type = db.Column(db.String(50), nullable=True)
+
+    payload = db.Column(db.Text, nullable=False) # JSON mentah dari Midtrans
+
+    # NULL = belum diproses
+    processed_at = db.Column(db.DateTime, nullable=True, index=True)
+    # Percobaan proses yang gagal (exception) + pesan error terakhir;
+    # setelah MAX_ATTEMPTS (payment_processor) tidak dicoba lagi, cek kolom error
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(255), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PaymentNotification {self.order_id} -> {self.transaction_status}>"
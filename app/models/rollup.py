@@ -0,0 +1,28 @@
+from app.extensions import db
+from datetime import datetime
+
+class PaymentDailyRollup(db.Model):
+    """
+    Rekap harian payment per (hari, dokter, metode, status).
+    Di-update inkremental setiap status payment berubah (revenue_rollup),
+    dan bisa dibangun ulang penuh dari tabel payments.
+    Dashboard/endpoint revenue cukup baca tabel kecil ini, tidak scan payments.
+    """
+    __tablename__ = 'payment_daily_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'doctor_id', 'payment_method', 'status', name='uq_payment_daily_rollups_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    payment_method = db.Column(db.String(50), nullable=False, default='') # '' kalau belum diketahui
+    status = db.Column(db.String(20), nullable=False)
+
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+    amount_total = db.Column(db.BigInteger, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PaymentDailyRollup {self.day} dr={self.doctor_id} {self.status} {self.amount_total}>"
@@ -0,0 +1,41 @@
+from app.extensions import db
+from datetime import datetime
+
+class UploadBlob(db.Model):
+    """
+    1 file upload unik (berdasarkan isi / SHA-256) di penyimpanan upload.
+    Path disimpan di kolom pemakai (Article.image_url, User.profile_image, ...) seperti biasa;
+    ref_count = jumlah baris yang menunjuk ke file ini. File dihapus saat ref_count habis.
+    """
+    __tablename__ = 'upload_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)
+    path = db.Column(db.String(255), nullable=False, unique=True)  # static/uploads/ab/cd/<sha256>.jpg
+    size_bytes = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=1)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UploadBlob {self.path} refs={self.ref_count}>"
+
+
+class UploadDeletion(db.Model):
+    """
+    Antrian hapus file upload. Baris ditambah di transaksi yang sama dengan perubahan data
+    (release / ganti gambar), jadi ikut batal kalau rollback. File dihapus oleh worker
+    background, bukan di request; path yang ternyata masih dipakai dilewati.
+    """
+    __tablename__ = 'upload_deletions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(255), nullable=False, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(255), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UploadDeletion {self.path} attempts={self.attempts}>"
@@ -11,7 +11,7 @@ class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=True) # Perbesar panjang karakter jaga-jaga
-    full_name = db.Column(db.String(100), nullable=True)
+    full_name = db.Column(db.String(100), nullable=True, index=True)
 
     firebase_uid = db.Column(db.String(128), unique=True, nullable=True)
     auth_provider = db.Column(db.String(20), nullable=True)  # 'firebase' / 'password'
@@ -23,7 +23,6 @@ class User(db.Model, UserMixin):
     # Kolom ini akan NULL (kosong) jika usernya adalah Pasien
     specialization = db.Column(db.String(100), nullable=True)
     consultation_price = db.Column(db.Integer, default=0) # Harga dalam Rupiah
-    is_online = db.Column(db.Boolean, default=False)
     bio = db.Column(db.Text, nullable=True)
 
     profile_image = db.Column(db.String(255), nullable=True)
@@ -48,4 +47,9 @@ class User(db.Model, UserMixin):
         return bcrypt.check_password_hash(self.password_hash, password)
 
     def __repr__(self):
-        return f"<User {self.email}>"
\ No newline at end of file
+        return f"<User {self.email}>"
+
+
+# Search admin konsultasi (awalan nama/email, case-insensitive)
+db.Index('ix_users_full_name_lower', db.func.lower(User.full_name))
+db.Index('ix_users_email_lower', db.func.lower(User.email))
@@ -8,6 +8,33 @@ class Withdrawal(db.Model):
     amount = db.Column(db.Integer, nullable=False)
     bank_name = db.Column(db.String(50), nullable=False)
     account_number = db.Column(db.String(50), nullable=False)
-    status = db.Column(db.String(20), default='pending')
+    # 'pending' -> 'processing' (masuk batch) -> 'processed' / 'rejected'
+    status = db.Column(db.String(20), default='pending', index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    doctor = db.relationship('User', backref='withdrawals')
\ No newline at end of file
+
+    batch_id = db.Column(db.Integer, db.ForeignKey('withdrawal_batches.id'), nullable=True, index=True)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    failure_reason = db.Column(db.String(255), nullable=True)
+
+    doctor = db.relationship('User', backref='withdrawals')
+    batch = db.relationship('WithdrawalBatch', backref=db.backref('withdrawals', lazy='dynamic'))
+
+
+class WithdrawalBatch(db.Model):
+    """
+    1 batch payout = sekumpulan withdrawal yang didebit bersamaan
+    dan dikirim ke bank dalam 1 file payout.
+    """
+    __tablename__ = 'withdrawal_batches'
+    id = db.Column(db.Integer, primary_key=True)
+    # 'claimed' (withdrawal sudah diklaim, belum dibukukan) -> 'posted' (ledger + saldo + file)
+    status = db.Column(db.String(20), nullable=False, default='claimed', index=True)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    rejected_count = db.Column(db.Integer, nullable=False, default=0)
+    payout_file = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    posted_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<WithdrawalBatch {self.id} {self.status} {self.total_amount}>"
@@ -1,21 +1,69 @@
-import os
 from flask import Blueprint, request, jsonify, current_app, url_for
-from werkzeug.utils import secure_filename
 from app.models.article import Article
 from app.extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.user import User
 from app.utils.response import success, error # <--- Import ini
-from sqlalchemy import or_
+from app.utils.pagination import keyset_page
+from app.services.article_search import search_article_ids
+from app.services.content_version import ARTICLES, get_version
+from app.services.response_cache import response_cache
+from app.services.image_variants import image_variant_worker, variant_lookup, variant_url, public_url
+from app.services.upload_store import upload_store
+from app.utils.http_cache import is_not_modified, not_modified_response, apply_cache_headers, request_fingerprint
 
 article_bp = Blueprint('article_api', __name__, url_prefix='/api')
 
+# Paginasi feed artikel (?limit=&cursor=)
+FEED_DEFAULT_LIMIT = 20
+FEED_MAX_LIMIT = 100
+
 
 # Fungsi bantuan cek ekstensi file
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _feed_limit():
+    limit = request.args.get('limit', FEED_DEFAULT_LIMIT, type=int) or FEED_DEFAULT_LIMIT
+    return max(1, min(limit, FEED_MAX_LIMIT))
+
+
+def _feed_query():
+    """
+    Query untuk kartu list artikel: cuma kolom yang ditampilkan + preview tersimpan
+    (kolom content tidak disentuh sama sekali) + data penulis lewat 1 JOIN.
+    """
+    return (
+        db.session.query(
+            Article.id,
+            Article.title,
+            Article.image_url,
+            Article.tags,
+            Article.created_at,
+            Article.preview,
+            Article.word_count,
+            Article.reading_time,
+            User.full_name.label('author_name'),
+            User.profile_image.label('author_photo'),
+        )
+        .select_from(Article)
+        .outerjoin(User, User.id == Article.author_id)
+    )
+
+
+def _collection_etag(version):
+    """ETag list artikel = versi koleksi + parameter query (+ host, karena URL gambar absolut)."""
+    return f"articles-v{version}-{request_fingerprint()}"
+
+
+def _with_cache_headers(result, etag, last_modified):
+    response, status_code = result
+    if status_code == 200:
+        apply_cache_headers(response, etag, last_modified)
+    return response, status_code
+
+
 # --- 1. CREATE ARTICLE (Hanya Dokter) ---
 @article_bp.route('/articles/create', methods=['POST'])
 @jwt_required()
@@ -60,18 +108,9 @@ def create_article():
     if 'image' in request.files:
         file = request.files['image']
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Tambahkan timestamp agar nama file unik
-            import time
-            filename = f"{int(time.time())}_{filename}"
-            
-            # Simpan ke folder
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            
-            # Simpan URL relative untuk diakses frontend
-            # url_for akan generate link: http://localhost:5000/static/uploads/namafile.jpg
-            image_url = f"static/uploads/{filename}" 
+            # Simpan ke penyimpanan upload (nama = hash isi file, otomatis unik)
+            # Path relative untuk diakses frontend: http://localhost:5000/static/uploads/ab/cd/<hash>.jpg
+            image_url = upload_store.save(file)
 
     # Simpan ke DB
     new_article = Article(
@@ -84,6 +123,7 @@ def create_article():
     
     db.session.add(new_article)
     db.session.commit()
+    image_variant_worker.enqueue(image_url)
 
     result_data = {
         "id": new_article.id,
@@ -96,39 +136,64 @@ def create_article():
 # --- 2. GET ALL ARTICLES ---
 @article_bp.route('/articles', methods=['GET'])
 def get_articles():
+    # Conditional GET: kalau koleksi belum berubah -> 304 tanpa query artikel sama sekali
+    version, changed_at = get_version(ARTICLES)
+    etag = _collection_etag(version)
+    if is_not_modified(etag, changed_at):
+        return not_modified_response(etag, changed_at)
+
     # Ambil parameter 'q' dari URL (misal: ?q=anemia)
-    search_query = request.args.get('q')
-    
-    query = Article.query
+    search_query = (request.args.get('q') or '').strip()
+    namespace = "articles:search" if search_query else "articles:list"
+    payload = response_cache.get_or_build(
+        namespace, version, request_fingerprint(), lambda: _article_list_payload(search_query)
+    )
+    return _with_cache_headers(
+        success(payload["data"], "Berhasil mengambil daftar artikel", meta=payload["meta"]),
+        etag, changed_at,
+    )
+
+
+def _article_list_payload(search_query):
+    query = _feed_query()
     
-    # Jika ada pencarian, filter berdasarkan Judul atau Tags
     if search_query:
-        search_pattern = f"%{search_query}%" # SQL LIKE syntax
-        query = query.filter(
-            or_(
-                Article.title.ilike(search_pattern), # ilike = case insensitive (huruf besar/kecil sama aja)
-                Article.tags.ilike(search_pattern)
-            )
+        # Pencarian full-text (judul, tags, isi) urut relevansi.
+        # Cursor hasil pencarian = offset (hasilnya dibatasi limit, jadi tetap ringan)
+        limit = _feed_limit()
+        cursor = request.args.get('cursor', '')
+        offset = int(cursor) if cursor.isdigit() else 0
+        ranked = search_article_ids(search_query, limit=limit + 1, offset=offset)
+        next_cursor = str(offset + limit) if len(ranked) > limit else None
+        ranked_ids = [article_id for article_id, _ in ranked[:limit]]
+
+        rows = {row.id: row for row in query.filter(Article.id.in_(ranked_ids)).all()} if ranked_ids else {}
+        articles = [rows[article_id] for article_id in ranked_ids if article_id in rows]
+    else:
+        # Urutkan dari yang terbaru (keyset: created_at, id)
+        articles, next_cursor = keyset_page(
+            query, Article.created_at, Article.id, cursor=request.args.get('cursor'), limit=_feed_limit()
         )
     
-    # Urutkan dari yang terbaru
-    articles = query.order_by(Article.created_at.desc()).all()
-    
+    # Kartu feed pakai varian medium (bukan file asli ukuran penuh)
+    lookup = variant_lookup([art.image_url for art in articles])
+
     output = []
     for art in articles:
-        full_image_url = request.host_url + art.image_url if art.image_url else None
-        
         output.append({
             "id": art.id,
             "title": art.title,
-            "content": art.content[:100] + "...",
-            "image": full_image_url,
-            "author": art.author.full_name,
+            "content": (art.preview or "")[:100] + "...",
+            "image": variant_url(art.image_url, "medium", lookup),
+            "image_original": public_url(art.image_url),
+            "author": art.author_name,
             "tags": art.tags,
+            "word_count": art.word_count,
+            "reading_time": art.reading_time,
             "created_at": art.created_at
         })
     
-    return success(output, "Berhasil mengambil daftar artikel")
+    return {"data": output, "meta": {"next_cursor": next_cursor}}
 
 # --- 3. GET MY ARTICLES (Dashboard Dokter) ---
 @article_bp.route('/articles/me', methods=['GET'])
@@ -137,43 +202,74 @@ def get_my_articles():
     current_user_id = get_jwt_identity()
     
     # Cari artikel milik dokter yang sedang login
-    my_articles = Article.query.filter_by(author_id=current_user_id)\
-        .order_by(Article.created_at.desc()).all()
+    my_articles, next_cursor = keyset_page(
+        _feed_query().filter(Article.author_id == current_user_id),
+        Article.created_at, Article.id, cursor=request.args.get('cursor'), limit=_feed_limit()
+    )
     
+    lookup = variant_lookup([art.image_url for art in my_articles])
+
     output = []
     for art in my_articles:
-        full_image_url = request.host_url + art.image_url if art.image_url else None
         output.append({
             "id": art.id,
             "title": art.title,
-            "content": art.content[:100] + "...", # Preview pendek
-            "image": full_image_url,
+            "content": (art.preview or "")[:100] + "...", # Preview pendek
+            "image": variant_url(art.image_url, "medium", lookup),
+            "image_original": public_url(art.image_url),
+            "word_count": art.word_count,
+            "reading_time": art.reading_time,
             "created_at": art.created_at
         })
     
-    return success(output, "Berhasil mengambil artikel saya")
+    return success(output, "Berhasil mengambil artikel saya", meta={"next_cursor": next_cursor})
 
 # --- 4. GET ARTICLE DETAIL (Baca 1 Artikel Full) ---
 @article_bp.route('/articles/<int:article_id>', methods=['GET'])
 def get_article_detail(article_id):
-    article = Article.query.get(article_id)
+    # Cek updated_at dulu (1 kolom) -> 304 kalau client sudah punya versi terbaru
+    row = db.session.query(Article.id, Article.updated_at).filter(Article.id == article_id).first()
+    if not row:
+        return error("Artikel tidak ditemukan", 404)
+
+    # ETag + key cache ikut versi koleksi: nama/foto penulis dan URL varian gambar
+    # ikut tampil di detail tapi tidak mengubah updated_at artikel
+    version, changed_at = get_version(ARTICLES)
+    updated_at = max(filter(None, (row.updated_at, changed_at)), default=None)
+    etag = f"article-{article_id}-v{version}-{request_fingerprint()}"
+    if is_not_modified(etag, updated_at):
+        return not_modified_response(etag, updated_at)
+
+    detail_data = response_cache.get_or_build(
+        "articles:detail", version, request_fingerprint(), lambda: _article_detail_payload(article_id)
+    )
+    if detail_data is None:
+        return error("Artikel tidak ditemukan", 404)
     
+    return _with_cache_headers(success(detail_data, "Detail artikel ditemukan"), etag, updated_at)
+
+
+def _article_detail_payload(article_id):
+    article = Article.query.get(article_id)
     if not article:
-        return error("Artikel tidak ditemukan", 404)
+        return None
     
-    full_image_url = request.host_url + article.image_url if article.image_url else None
+    lookup = variant_lookup([article.image_url])
     
     detail_data = {
         "id": article.id,
         "title": article.title,
         "content": article.content, # Konten full
-        "image": full_image_url,
+        "image": variant_url(article.image_url, "medium", lookup),
+        "image_original": public_url(article.image_url),
         "author": article.author.full_name,
         "tags": article.tags,
+        "word_count": article.word_count,
+        "reading_time": article.reading_time,
         "created_at": article.created_at
     }
     
-    return success(detail_data, "Detail artikel ditemukan")
+    return detail_data
 
 # --- 5. UPDATE ARTICLE (Edit & Ganti Gambar) ---
 @article_bp.route('/articles/<int:article_id>', methods=['PUT'])
@@ -195,38 +291,29 @@ def update_article(article_id):
     article.tags = request.form.get('tags', article.tags)
 
     # Handle Ganti Gambar
+    new_image = None
     if 'image' in request.files:
         file = request.files['image']
         # Pastikan fungsi allowed_file sudah didefinisikan di atas
         from app.routes.article_routes import allowed_file 
         
         if file and allowed_file(file.filename):
-            # A. Hapus gambar lama biar server gak penuh sampah
-            if article.image_url:
-                # Path absolut: /home/user/project/app/static/uploads/lama.jpg
-                old_file_path = os.path.join(current_app.config['BASE_DIR'], article.image_url)
-                if os.path.exists(old_file_path):
-                    os.remove(old_file_path)
-
-            # B. Simpan gambar baru
-            filename = secure_filename(file.filename)
-            import time
-            filename = f"{int(time.time())}_{filename}"
-            
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            
-            # C. Update database path
-            article.image_url = f"static/uploads/{filename}"
+            # A. Lepas gambar lama (file dihapus setelah commit kalau tidak dipakai artikel/user lain)
+            upload_store.release(article.image_url)
+
+            # B. Simpan gambar baru + update database path
+            article.image_url = upload_store.save(file)
+            new_image = article.image_url
 
     try:
         db.session.commit()
+        image_variant_worker.enqueue(new_image)
         
         # Kembalikan data terbaru
         updated_data = {
             "id": article.id,
             "title": article.title,
-            "image_url": request.host_url + article.image_url if article.image_url else None
+            "image_url": public_url(article.image_url)
         }
         return success(updated_data, "Artikel berhasil diupdate")
         
@@ -249,11 +336,8 @@ def delete_article(article_id):
         return error("Anda tidak memiliki izin menghapus artikel ini", 403)
 
     try:
-        # 1. Hapus File Fisik Gambar
-        if article.image_url:
-            full_path = os.path.join(current_app.config['BASE_DIR'], article.image_url)
-            if os.path.exists(full_path):
-                os.remove(full_path)
+        # 1. Lepas File Gambar (dihapus setelah commit kalau tidak dipakai lagi)
+        upload_store.release(article.image_url)
 
         # 2. Hapus Record Database
         db.session.delete(article)
@@ -269,25 +353,46 @@ def delete_article(article_id):
 # --- 7. ROUTE TEST BROWSER (Public / No JWT) ---
 @article_bp.route('/', methods=['GET'])
 def get_articles_public_root():
-    # Query semua artikel, urutkan terbaru
-    articles = Article.query.order_by(Article.created_at.desc()).all()
+    version, changed_at = get_version(ARTICLES)
+    etag = _collection_etag(version)
+    if is_not_modified(etag, changed_at):
+        return not_modified_response(etag, changed_at)
+
+    payload = response_cache.get_or_build(
+        "articles:root", version, request_fingerprint(), _public_root_payload
+    )
+
+    # Return JSON standar
+    return _with_cache_headers(
+        success(payload["data"], "Berhasil mengambil data artikel (Mode Browser/Public)", meta=payload["meta"]),
+        etag, changed_at,
+    )
+
+
+def _public_root_payload():
+    # Query artikel per halaman, urutkan terbaru
+    articles, next_cursor = keyset_page(
+        _feed_query(), Article.created_at, Article.id, cursor=request.args.get('cursor'), limit=_feed_limit()
+    )
     
+    # Gambar artikel -> medium, foto penulis -> thumb (1 query untuk semua varian)
+    lookup = variant_lookup([art.image_url for art in articles] + [art.author_photo for art in articles])
+
     output = []
     for art in articles:
-        # Buat link gambar full
-        full_image_url = request.host_url + art.image_url if art.image_url else None
-        
         output.append({
             "id": art.id,
             "title": art.title,
             # Kita potong konten biar tidak kepanjangan di browser
-            "content_preview": art.content[:200] + "...", 
-            "image": full_image_url,
-            "author": art.author.full_name if art.author else "Unknown",
-            "photo": request.host_url + art.author.profile_image if art.author.profile_image else None,
+            "content_preview": (art.preview or "")[:200] + "...", 
+            "image": variant_url(art.image_url, "medium", lookup),
+            "image_original": public_url(art.image_url),
+            "author": art.author_name or "Unknown",
+            "photo": variant_url(art.author_photo, "thumb", lookup),
             "tags": art.tags,
+            "word_count": art.word_count,
+            "reading_time": art.reading_time,
             "created_at": art.created_at
         })
     
-    # Return JSON standar
-    return success(output, "Berhasil mengambil data artikel (Mode Browser/Public)")
\ No newline at end of file
+    return {"data": output, "meta": {"next_cursor": next_cursor}}
\ No newline at end of file
@@ -1,18 +1,18 @@
 # app/routes/auth_routes.py  (versi clean)
 
-import os
 import re
-import time
 from datetime import timedelta
 
 from flask import Blueprint, request, current_app
-from werkzeug.utils import secure_filename
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from firebase_admin import auth as fb_auth
 
 from app.models.user import User
 from app.extensions import db
 from app.utils.response import success, error
+from app.services.presence_service import presence
+from app.services.image_variants import image_variant_worker
+from app.services.upload_store import upload_store
 
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
@@ -40,11 +40,7 @@ def _allowed_ext(filename: str, allowed: set[str]) -> bool:
 
 def _full_image_url(profile_image: str | None) -> str | None:
     """Support profile_image berupa URL (http/https) atau path lokal (static/uploads/...)."""
-    if not profile_image:
-        return None
-    if profile_image.startswith("http://") or profile_image.startswith("https://"):
-        return profile_image
-    return request.host_url.rstrip("/") + "/" + profile_image.lstrip("/")
+    return upload_store.public_url(profile_image.lstrip("/") if profile_image else None)
 
 
 def _validate_register_input(data: dict) -> list[str]:
@@ -292,7 +288,7 @@ def get_my_profile():
             "profile_image": _full_image_url(getattr(user, "profile_image", None)),
             "specialization": getattr(user, "specialization", None),
             "consultation_price": getattr(user, "consultation_price", None),
-            "is_online": getattr(user, "is_online", None),
+            "is_online": presence.is_online(user.id),
             "bio": getattr(user, "bio", None),
             "is_verified": getattr(user, "is_verified", None),
             "balance": getattr(user, "balance", None),
@@ -326,31 +322,17 @@ def update_profile():
         user.set_password(password)
 
     # Upload foto profile
+    new_image = None
     file = request.files.get("image")
     if file and file.filename:
         if not _allowed_ext(file.filename, ALLOWED_IMAGE_EXT):
             return error("Format file tidak diizinkan. Gunakan PNG, JPG, atau JPEG", 400)
 
-        # hapus foto lama (hanya kalau itu path lokal)
-        old_img = getattr(user, "profile_image", None)
-        if old_img and not (old_img.startswith("http://") or old_img.startswith("https://")):
-            old_path = os.path.join(current_app.config.get("BASE_DIR", os.getcwd()), old_img)
-            if os.path.exists(old_path):
-                try:
-                    os.remove(old_path)
-                except Exception:
-                    pass
-
-        filename = secure_filename(file.filename)
-        unique_filename = f"profile_{user.id}_{int(time.time())}_{filename}"
-
-        upload_folder = current_app.config["UPLOAD_FOLDER"]
-        os.makedirs(upload_folder, exist_ok=True)
+        # lepas foto lama (URL luar seperti foto Google diabaikan; file dihapus setelah commit)
+        upload_store.release(getattr(user, "profile_image", None))
 
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
-
-        user.profile_image = f"static/uploads/{unique_filename}"
+        user.profile_image = upload_store.save(file)
+        new_image = user.profile_image
 
     # Kalau mobile khusus pasien, biasanya bagian dokter ini tidak dipakai.
     # Tapi tetap aman bila suatu saat diperlukan.
@@ -370,12 +352,11 @@ def update_profile():
         if request.form.get("bio"):
             user.bio = request.form.get("bio").strip()
 
-        is_online_input = request.form.get("is_online")
-        if is_online_input is not None:
-            user.is_online = str(is_online_input).lower() == "true"
+        # is_online tidak lagi di-toggle manual: otomatis dari koneksi socket
 
     try:
         db.session.commit()
+        image_variant_worker.enqueue(new_image)
         return success(
             {
                 "id": user.id,
@@ -386,7 +367,7 @@ def update_profile():
                 "specialization": getattr(user, "specialization", None),
                 "consultation_price": getattr(user, "consultation_price", None),
                 "bio": getattr(user, "bio", None),
-                "is_online": getattr(user, "is_online", None),
+                "is_online": presence.is_online(user.id),
             },
             "Profil berhasil diperbarui",
         )
@@ -418,17 +399,11 @@ def upload_verification_doc():
     if not _allowed_ext(file.filename, ALLOWED_VERIFY_EXT):
         return error("Format file tidak diizinkan (hanya png, jpg, jpeg, pdf)", 400)
 
-    filename = f"verification_{user.id}_{int(time.time())}_{secure_filename(file.filename)}"
-    upload_folder = current_app.config["UPLOAD_FOLDER"]
-    os.makedirs(upload_folder, exist_ok=True)
-
-    save_path = os.path.join(upload_folder, filename)
-    file.save(save_path)
-
-    user.verification_doc = f"static/uploads/{filename}"
+    upload_store.release(user.verification_doc)
+    user.verification_doc = upload_store.save(file)
     db.session.commit()
 
     return success(
-        {"verification_doc": request.host_url.rstrip("/") + "/" + user.verification_doc},
+        {"verification_doc": upload_store.public_url(user.verification_doc)},
         "Dokumen verifikasi berhasil diunggah",
     )
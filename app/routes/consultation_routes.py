@@ -1,4 +1,4 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, current_app
 from datetime import datetime, timedelta
 from app.extensions import db
 from app.models.consultation import Consultation, Payment, ChatMessage
@@ -7,6 +7,16 @@ from app.utils.response import success, error
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db, socketio # <--- Tambahkan socketio
 from app.services.payment_service import payment_service
+from app.services.chat_service import store_chat_message, broadcast_message
+from app.services.payment_processor import (
+    verify_midtrans_signature, record_notification, process_notifications_async
+)
+from app.services.presence_service import presence
+from app.services.consultation_access import consultation_access
+from app.services.consultation_sweeper import mark_booking_failed
+from app.services.payment_status_cache import payment_status_cache
+from app.services.revenue_rollup import payment_bucket, track_new_payment, track_payment_change
+from app.services.image_variants import variant_lookup, variant_url
 from sqlalchemy import or_
 
 consultation_bp = Blueprint('consultation_api', __name__, url_prefix='/api/consultation')
@@ -28,6 +38,21 @@ def book_consultation():
     if not doctor or doctor.role != 'DOKTER':
         return error("Dokter tidak ditemukan", 404)
 
+    # Gateway baru saja down (circuit breaker open) -> gagal cepat, jangan buat data dulu
+    if not payment_service.is_available():
+        return error("Gateway pembayaran sedang gangguan, coba beberapa saat lagi", 503)
+
+    # Ambil nilai yang dibutuhkan sebelum commit (biar tidak reload dari DB setelahnya)
+    amount = doctor.consultation_price
+    customer_info = {
+        "first_name": user.full_name,
+        "email": user.email,
+    }
+
+    # === TRANSAKSI LOKAL SINGKAT: tulis Consultation + Payment 'pending' lalu commit ===
+    # Panggilan ke gateway dilakukan SETELAH commit, jadi koneksi DB / row lock
+    # tidak ikut tertahan selama Midtrans lambat.
+
     # 1. Buat Data Konsultasi
     new_consultation = Consultation(
         patient_id=current_user_id,
@@ -44,35 +69,45 @@ def book_consultation():
     # 3. Buat Data Payment di Database Kita
     new_payment = Payment(
         consultation_id=new_consultation.id,
-        amount=doctor.consultation_price,
+        amount=amount,
         status='pending',
         payment_method='midtrans',
         transaction_id=order_id # Simpan Order ID ini
     )
     db.session.add(new_payment)
-    
-    # 4. Panggil Midtrans (Minta Link Bayar)
-    customer_info = {
-        "first_name": user.full_name,
-        "email": user.email,
-    }
-    
+    db.session.flush()
+    new_consultation.latest_payment_id = new_payment.id
+    track_new_payment(new_payment, doctor_id=doctor.id)
+    db.session.commit()
+
+    consultation_id, payment_id = new_consultation.id, new_payment.id
+    consultation_access.invalidate(int(current_user_id), int(doctor_id))
+
+    # 4. Panggil Midtrans (Minta Link Bayar) -- di luar transaksi
     midtrans_resp = payment_service.create_transaction(
         order_id=order_id,
-        amount=doctor.consultation_price,
+        amount=amount,
         customer_details=customer_info
     )
-    
+
+    # 5. Update kecil: simpan token/URL, atau tandai gagal
+    # (kalau proses mati di tengah jalan, sisa booking 'pending' tanpa token
+    #  dibersihkan oleh sweep_orphaned_bookings)
     if not midtrans_resp:
-        db.session.rollback()
+        mark_booking_failed(payment_id, consultation_id)
         return error("Gagal menghubungi gateway pembayaran", 500)
 
+    Payment.query.filter_by(id=payment_id).update(
+        {"payment_token": midtrans_resp['token'], "payment_url": midtrans_resp['redirect_url']},
+        synchronize_session=False
+    )
     db.session.commit()
-    
+    payment_status_cache.invalidate(payment_id)
+
     return success({
-        "consultation_id": new_consultation.id,
-        "payment_id": new_payment.id,
-        "amount": new_payment.amount,
+        "consultation_id": consultation_id,
+        "payment_id": payment_id,
+        "amount": amount,
         "status": "Menunggu Pembayaran",
         # INI YANG PENTING:
         "payment_url": midtrans_resp['redirect_url'], 
@@ -90,8 +125,10 @@ def mock_payment_success(payment_id):
         return error("Tagihan tidak ditemukan", 404)
         
     # 1. Update Status Pembayaran
+    before = payment_bucket(payment)
     payment.status = 'success'
     payment.transaction_id = f"MOCK-{datetime.now().timestamp()}"
+    track_payment_change(before, payment_bucket(payment), payment.amount)
     
     # 2. Aktifkan Sesi Konsultasi
     consultation = Consultation.query.get(payment.consultation_id)
@@ -101,6 +138,8 @@ def mock_payment_success(payment_id):
     consultation.expired_at = datetime.utcnow() + timedelta(hours=1)
     
     db.session.commit()
+    consultation_access.invalidate_consultation(consultation)
+    payment_status_cache.invalidate(payment.id)
     
     return success({
         "consultation_id": consultation.id,
@@ -108,70 +147,63 @@ def mock_payment_success(payment_id):
         "status": "active"
     }, "Pembayaran Berhasil! Sesi Chat dimulai (Berlaku 1 Jam).")
 
+# --- STATUS PEMBAYARAN (Polling dari App setelah buka payment_url) ---
+# Dibaca dari cache di memori (di-invalidate oleh processor webhook), bukan query tiap request.
+# Long-poll: ?since=pending&wait=25 -> respon ditahan sampai status berubah atau waktu habis.
+@consultation_bp.route('/payment-status/<int:payment_id>', methods=['GET'])
+@jwt_required()
+def get_payment_status(payment_id):
+    current_user_id = int(get_jwt_identity())
+
+    snapshot = payment_status_cache.get(payment_id)
+    if not snapshot:
+        return error("Tagihan tidak ditemukan", 404)
+    if current_user_id not in [snapshot["patient_id"], snapshot["doctor_id"]]:
+        return error("Anda tidak memiliki akses ke tagihan ini", 403)
+
+    since = request.args.get('since')
+    wait = min(request.args.get('wait', 0, type=float), current_app.config.get("PAYMENT_STATUS_MAX_WAIT_SECONDS", 25))
+    if since and wait > 0:
+        snapshot = payment_status_cache.wait(payment_id, since=since, timeout=wait)
+
+    return success({
+        "payment_id": snapshot["payment_id"],
+        "status": snapshot["status"],
+        "consultation_id": snapshot["consultation_id"],
+        "expired_at": snapshot["expired_at"],
+        "payment_url": snapshot["payment_url"],
+    })
+
 # --- WEBHOOK MIDTRANS (PENTING) ---
 # Endpoint ini dipanggil oleh Server Midtrans, bukan oleh User!
+# Cuma verifikasi + simpan ke inbox, lalu langsung 200.
+# Perubahan status Payment/Consultation dikerjakan background processor (payment_processor).
 @consultation_bp.route('/notification', methods=['POST'])
 def midtrans_notification():
     # Ambil data JSON yang dikirim Midtrans
-    notification_data = request.get_json()
-    
+    notification_data = request.get_json(silent=True) or {}
+
     order_id = notification_data.get('order_id')
     transaction_status = notification_data.get('transaction_status')
-    fraud_status = notification_data.get('fraud_status')
-    
-    print(f"🔔 Midtrans Notification: {order_id} -> {transaction_status}")
 
-    # Cari Payment di Database kita berdasarkan order_id
-    payment = Payment.query.filter_by(transaction_id=order_id).first()
-    if not payment:
-        return error("Order ID not found", 404)
+    if not order_id or not transaction_status:
+        return error("Payload notifikasi tidak lengkap", 400)
 
-    # Logika Status Midtrans
-    # Settlement / Capture = Sukses (Uang masuk)
-    # Pending = Menunggu
-    # Deny / Cancel / Expire = Gagal
-    
-    if transaction_status == 'capture':
-        if fraud_status == 'challenge':
-            payment.status = 'challenge'
-        else:
-            payment.status = 'success'
-            activate_consultation(payment) # Fungsi helper (lihat bawah)
-            
-    elif transaction_status == 'settlement':
-        payment.status = 'success'
-        activate_consultation(payment)
-        
-    elif transaction_status in ['cancel', 'deny', 'expire']:
-        payment.status = 'failed'
-        
-    elif transaction_status == 'pending':
-        payment.status = 'pending'
+    if not verify_midtrans_signature(notification_data, current_app.config.get('MIDTRANS_SERVER_KEY')):
+        return error("Signature tidak valid", 403)
 
-    db.session.commit()
-    return success(None, "Notification processed")
+    print(f"🔔 Midtrans Notification: {order_id} -> {transaction_status}")
 
-def activate_consultation(payment):
-    """Mengaktifkan sesi konsultasi (Durasi 1 Jam)"""
-    consultation = Consultation.query.get(payment.consultation_id)
-    # Pastikan kita cuma proses kalau status sebelumnya belum active (biar saldo gak nambah 2x)
-    if consultation and consultation.status == 'pending':
-        # 1. Aktifkan Sesi
-        consultation.status = 'active'
-        consultation.expired_at = datetime.utcnow() + timedelta(hours=1)
-        
-        # 2. LOGIKA BAGI HASIL (Revenue Sharing)
-        doctor = User.query.get(consultation.doctor_id)
-        
-        # Contoh: Admin ambil 10%, Dokter dapat 90%
-        admin_fee = int(payment.amount * 0.10) 
-        doctor_income = int(payment.amount - admin_fee)
-        
-        # Update Saldo Dokter
-        doctor.balance += doctor_income
-        
-        print(f"💰 Payment Lunas! Saldo Dr. {doctor.full_name} bertambah Rp {doctor_income}")
+    # Order tidak dikenal -> 404 dan jangan masuk inbox, biar retry Midtrans berikutnya tetap tercatat
+    if not db.session.query(Payment.id).filter_by(transaction_id=order_id).first():
+        return error("Order ID not found", 404)
 
+    # Midtrans suka kirim ulang notifikasi yang sama -> duplikat cukup diabaikan
+    if not record_notification(notification_data):
+        return success(None, "Notification already received")
+
+    process_notifications_async()
+    return success(None, "Notification received")
 
 # --- 3. KIRIM PESAN (Chatting) ---
 @consultation_bp.route('/send', methods=['POST'])
@@ -182,56 +214,14 @@ def send_message():
     data = request.get_json()
     consultation_id = data.get('consultation_id')
     message_text = data.get('message')
-    
-    if not consultation_id or not message_text:
-        return error("Data tidak lengkap", 400)
-        
-    consultation = Consultation.query.get(consultation_id)
-    
-    # Validasi Sesi
-    if not consultation:
-        return error("Sesi tidak ditemukan", 404)
-        
-    # Cek apakah user terlibat dalam sesi ini (Safety)
-    if current_user_id not in [consultation.patient_id, consultation.doctor_id]:
-        return error("Anda tidak memiliki akses ke sesi ini", 403)
-        
-    # Cek Status Aktif
-    if consultation.status != 'active':
-        return error("Sesi chat belum aktif (belum bayar) atau sudah selesai.", 400)
-        
-    # Cek Kedaluwarsa Waktu (1 Jam tadi)
-    if datetime.utcnow() > consultation.expired_at:
-        consultation.status = 'completed' # Tutup otomatis
-        db.session.commit()
-        return error("Waktu konsultasi telah habis.", 400)
-
-    # Simpan Pesan
-    new_chat = ChatMessage(
-        consultation_id=consultation_id,
-        sender_id=current_user_id,
-        message=message_text
-    )
-    db.session.add(new_chat)
-    db.session.commit()
-    
+
+    # Validasi + simpan (aturannya sama dengan event socket 'send_message')
+    new_chat, err_msg, err_code = store_chat_message(current_user_id, consultation_id, message_text)
+    if err_msg:
+        return error(err_msg, err_code)
+
     # --- UPDATE: KIRIM SINYAL REAL-TIME ---
-    # 1. Tentukan nama room (misal: consultation_10)
-    room_id = f"consultation_{consultation_id}"
-    
-    # 2. Siapkan data pesan yang mau dikirim ke layar lawan bicara
-    message_data = {
-        "id": new_chat.id,
-        "sender_id": new_chat.sender_id,
-        "message": new_chat.message,
-        "timestamp": new_chat.created_at.isoformat(),
-        # Flag ini nanti diatur frontend, tapi kita kirim false defaultnya
-        "is_me": False 
-    }
-    
-    # 3. Teriakkan ke Room!
-    print(f"📢 Mengirim notifikasi ke room: {room_id}")
-    socketio.emit('new_message', message_data, to=room_id)
+    broadcast_message(new_chat)
     # --------------------------------------
     
     return success(None, "Pesan terkirim")
@@ -259,7 +249,7 @@ def get_chat_history(consultation_id):
 
     opponent_photo = None
     if opponent and opponent.profile_image:
-        opponent_photo = request.host_url + opponent.profile_image
+        opponent_photo = variant_url(opponent.profile_image, "thumb", variant_lookup([opponent.profile_image]))
 
     # Info Header Chat
     chat_info = {
@@ -314,18 +304,14 @@ def get_my_consultations():
         )
     ).order_by(Consultation.updated_at.desc()).all()
 
+    # Foto lawan bicara pakai varian thumb (1 query untuk seluruh inbox)
+    opponents = [(c.doctor if user.role == 'PASIEN' else c.patient) for c in consultations]
+    lookup = variant_lookup([o.profile_image for o in opponents if o])
+
     output = []
-    for c in consultations:
-        # Tentukan Lawan Bicara (Opponent)
-        if user.role == 'PASIEN':
-            opponent = c.doctor
-        else:
-            opponent = c.patient
-            
+    for c, opponent in zip(consultations, opponents):
         # Siapkan URL foto lawan bicara
-        opponent_photo = None
-        if opponent and opponent.profile_image:
-            opponent_photo = request.host_url + opponent.profile_image
+        opponent_photo = variant_url(opponent.profile_image, "thumb", lookup) if opponent else None
 
         output.append({
             "id": c.id,
@@ -337,7 +323,7 @@ def get_my_consultations():
                 "name": opponent.full_name if opponent else "User Terhapus",
                 "role": opponent.role if opponent else "-",
                 "image": opponent_photo, # <--- Foto Profil Muncul Disini
-                "is_online": opponent.is_online if opponent and hasattr(opponent, 'is_online') else False
+                "is_online": presence.is_online(opponent.id) if opponent else False
             }
         })
 
@@ -363,20 +349,26 @@ def get_list_doctors():
     if spec_query:
         query = query.filter(User.specialization.ilike(f"%{spec_query}%"))
         
+    doctors = query.order_by(User.full_name.asc()).all()
+
     # 4. Urutkan: Yang Online duluan, baru sisanya
-    doctors = query.order_by(User.is_online.desc(), User.full_name.asc()).all()
+    # (status online dari koneksi socket, bukan kolom DB; sort stabil jadi urutan nama tetap)
+    online_ids = presence.online_user_ids([doc.id for doc in doctors])
+    doctors.sort(key=lambda doc: doc.id not in online_ids)
     
+    lookup = variant_lookup([doc.profile_image for doc in doctors])
+
     output = []
     for doc in doctors:
-        # Generate URL Foto
-        full_image_url = request.host_url + doc.profile_image if doc.profile_image else None
+        # Generate URL Foto (thumb)
+        full_image_url = variant_url(doc.profile_image, "thumb", lookup)
         
         output.append({
             "id": doc.id,
             "full_name": doc.full_name,
             "specialization": doc.specialization or "Dokter Umum", # Default jika kosong
             "price": doc.consultation_price or 0,
-            "is_online": doc.is_online,
+            "is_online": doc.id in online_ids,
             "image": full_image_url,
             "bio": doc.bio
         })
@@ -411,5 +403,6 @@ def start_consultation_direct():
     )
     db.session.add(new_chat)
     db.session.commit()
+    consultation_access.invalidate_consultation(new_chat)
 
     return success({"consultation_id": new_chat.id}, "Chat dimulai")
\ No newline at end of file
@@ -1,11 +1,11 @@
-import os
 import json
-import time
-from flask import Blueprint, request, current_app
-from werkzeug.utils import secure_filename
+from contextlib import ExitStack
+from flask import Blueprint, request
 from app.extensions import db
 from app.models.medical import MedicalRecord
 from app.services.ai_service import ai_service
+from app.services.image_variants import image_variant_worker, variant_lookup, variant_url
+from app.services.upload_store import DirectUploadError, upload_store
 from app.utils.response import success, error
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
@@ -61,30 +61,40 @@ def submit_screening():
     score_gejala, text_gejala = calculate_weighted_symptoms(raw_symptoms)
     
     # 2. PROSES GAMBAR
+    # Foto bisa dikirim langsung di form, atau sudah di-upload langsung ke storage
+    # (POST /api/uploads/presign) lalu cukup kirim upload_id-nya
     file_mata = request.files.get('eye_image')
     file_kuku = request.files.get('nail_image')
+    upload_id_mata = request.form.get('eye_upload_id')
+    upload_id_kuku = request.form.get('nail_upload_id')
 
-    if not file_mata and not file_kuku:
+    if not (file_mata or upload_id_mata) and not (file_kuku or upload_id_kuku):
         return error("Harap upload minimal satu gambar", 400)
 
-    path_mata, path_kuku, db_path_mata, db_path_kuku = None, None, None, None
-    
-    if file_mata and allowed_file(file_mata.filename):
-        fname = f"eye_{int(time.time())}_{secure_filename(file_mata.filename)}"
-        path_mata = os.path.join(current_app.config['UPLOAD_FOLDER'], fname)
-        file_mata.save(path_mata)
-        db_path_mata = f"static/uploads/{fname}"
-
-    if file_kuku and allowed_file(file_kuku.filename):
-        fname = f"nail_{int(time.time())}_{secure_filename(file_kuku.filename)}"
-        path_kuku = os.path.join(current_app.config['UPLOAD_FOLDER'], fname)
-        file_kuku.save(path_kuku)
-        db_path_kuku = f"static/uploads/{fname}"
-
-    # 3. PREDIKSI AI
+    db_path_mata, db_path_kuku = None, None
+
     try:
-        hb_mata, hb_kuku = ai_service.predict(path_mata, path_kuku)
+        if upload_id_mata:
+            db_path_mata = upload_store.claim_upload(upload_id_mata, current_user_id)
+        elif file_mata and allowed_file(file_mata.filename):
+            db_path_mata = upload_store.save(file_mata)
+
+        if upload_id_kuku:
+            db_path_kuku = upload_store.claim_upload(upload_id_kuku, current_user_id)
+        elif file_kuku and allowed_file(file_kuku.filename):
+            db_path_kuku = upload_store.save(file_kuku)
+    except DirectUploadError as e:
+        db.session.rollback()
+        return error(str(e), 400)
+
+    # 3. PREDIKSI AI (backend S3: gambar diunduh dulu ke file sementara)
+    try:
+        with ExitStack() as stack:
+            path_mata = stack.enter_context(upload_store.local_copy(db_path_mata)) if db_path_mata else None
+            path_kuku = stack.enter_context(upload_store.local_copy(db_path_kuku)) if db_path_kuku else None
+            hb_mata, hb_kuku = ai_service.predict(path_mata, path_kuku)
     except Exception as e:
+        db.session.rollback()
         return error(f"Error AI: {str(e)}", 500)
 
     # 4. HITUNG RATA-RATA HB
@@ -108,6 +118,7 @@ def submit_screening():
     )
     db.session.add(rec)
     db.session.commit()
+    image_variant_worker.enqueue(db_path_mata, db_path_kuku)
 
     return success({
         "hb": round(final_hb, 2),
@@ -126,11 +137,14 @@ def get_my_screening_history():
     records = MedicalRecord.query.filter_by(user_id=current_user_id)\
         .order_by(MedicalRecord.created_at.desc()).all()
 
+    # Thumbnail untuk list riwayat; gambar asli tetap dikirim (dipakai saat dibuka penuh)
+    lookup = variant_lookup([p for rec in records for p in (rec.eye_image_path, rec.nail_image_path)])
+
     output = []
     for rec in records:
         # Generate Full URL untuk gambar (agar bisa diload di HP)
-        eye_url = request.host_url + rec.eye_image_path if rec.eye_image_path else None
-        nail_url = request.host_url + rec.nail_image_path if rec.nail_image_path else None
+        eye_url = upload_store.public_url(rec.eye_image_path)
+        nail_url = upload_store.public_url(rec.nail_image_path)
 
         output.append({
             "id": rec.id,
@@ -140,7 +154,9 @@ def get_my_screening_history():
             "symptoms_list": rec.symptoms_list,   # Text gejala
             "images": {
                 "eye": eye_url,
-                "nail": nail_url
+                "nail": nail_url,
+                "eye_thumb": variant_url(rec.eye_image_path, "thumb", lookup),
+                "nail_thumb": variant_url(rec.nail_image_path, "thumb", lookup)
             },
             "created_at": rec.created_at
         })
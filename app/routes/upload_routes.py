@@ -0,0 +1,56 @@
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.extensions import db
+from app.services.upload_store import DirectUploadError, upload_store
+from app.utils.response import success, error
+
+upload_bp = Blueprint("upload_api", __name__, url_prefix="/api/uploads")
+
+# File upload dilayani lewat redirect ke storage / X-Accel-Redirect (bukan static folder Flask)
+upload_files_bp = Blueprint("upload_files", __name__)
+
+
+@upload_bp.route("/presign", methods=["POST"])
+@jwt_required()
+def presign_upload():
+    """
+    POST /api/uploads/presign
+    Body JSON:
+    {
+      "sha256": "<hex sha256 isi file>",
+      "size": 2481152,
+      "content_type": "image/jpeg"
+    }
+    Response: upload_id + URL PUT (kirim file dengan header yang diberikan).
+    Kalau "exists": true, file yang sama sudah tersimpan -> langsung pakai upload_id.
+    upload_id dipakai di form skrining (eye_upload_id / nail_upload_id).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        result = upload_store.presign_upload(
+            get_jwt_identity(), data.get("sha256"), data.get("size"), data.get("content_type")
+        )
+    except DirectUploadError as e:
+        return error(str(e), 400)
+    return success(result, "URL upload dibuat")
+
+
+@upload_bp.route("/direct/<upload_id>", methods=["PUT"])
+def direct_upload(upload_id):
+    """
+    PUT /api/uploads/direct/<upload_id>  (backend lokal saja; backend S3 langsung PUT ke bucket)
+    Body: isi file mentah. Tanpa JWT: upload_id sudah ditandatangani server.
+    """
+    try:
+        upload_store.receive_direct(upload_id, request.stream)
+        db.session.commit()
+    except DirectUploadError as e:
+        db.session.rollback()
+        return error(str(e), 400)
+    return success(None, "File tersimpan")
+
+
+@upload_files_bp.route("/static/uploads/<path:key>", methods=["GET"])
+def serve_upload(key):
+    return upload_store.serve(key)
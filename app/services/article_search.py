@@ -0,0 +1,174 @@
+from sqlalchemy import DDL, event, func, literal_column, or_, text
+from sqlalchemy.dialects.mysql import match
+
+from app.extensions import db
+from app.models.article import Article
+from app.utils.text_id import tokenize
+
+# Bobot judul+tags dibanding isi artikel saat menghitung relevansi
+TITLE_WEIGHT = 3.0
+
+# Index SQLite FTS5 (dipakai untuk dev/test). MySQL/Postgres pakai index di tabel articles
+# sendiri (dibuat di migration), jadi otomatis ikut ter-update.
+_SQLITE_FTS_DDL = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts "
+    "USING fts5(search_title, search_body, tokenize='unicode61')"
+).execute_if(dialect="sqlite")
+
+
+def search_fields(title, tags, content):
+    """(search_title, search_body): teks yang sudah di-tokenize + di-stem untuk index."""
+    return (
+        " ".join(tokenize(f"{title or ''} {(tags or '').replace(',', ' ')}")),
+        " ".join(tokenize(content)),
+    )
+
+
+# ---------- field turunan + sinkronisasi index (create / update / delete) ----------
+# Berlaku untuk semua jalur tulis (API, web dokter, web admin)
+def _fill_derived_fields(mapper, connection, target):
+    target.update_derived_fields()
+
+
+def _refresh_derived_fields(mapper, connection, target):
+    if db.inspect(target).attrs.content.history.has_changes():
+        target.update_derived_fields()
+
+
+def _fill_search_fields(mapper, connection, target):
+    target.search_title, target.search_body = search_fields(target.title, target.tags, target.content)
+
+
+def _sync_sqlite_fts(mapper, connection, target):
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(text("DELETE FROM articles_fts WHERE rowid = :id"), {"id": target.id})
+    connection.execute(
+        text("INSERT INTO articles_fts (rowid, search_title, search_body) VALUES (:id, :t, :b)"),
+        {"id": target.id, "t": target.search_title or "", "b": target.search_body or ""},
+    )
+
+
+def _delete_sqlite_fts(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DELETE FROM articles_fts WHERE rowid = :id"), {"id": target.id})
+
+
+def init_search():
+    """
+    Daftarkan listener ORM artikel sekali saja (dipanggil dari create_app):
+    field turunan content (preview, word_count, reading_time) + kolom/index pencarian.
+    """
+    if event.contains(Article, "before_insert", _fill_search_fields):
+        return
+    event.listen(Article, "before_insert", _fill_derived_fields)
+    event.listen(Article, "before_update", _refresh_derived_fields)
+    event.listen(Article, "before_insert", _fill_search_fields)
+    event.listen(Article, "before_update", _fill_search_fields)
+    event.listen(Article, "after_insert", _sync_sqlite_fts)
+    event.listen(Article, "after_update", _sync_sqlite_fts)
+    event.listen(Article, "after_delete", _delete_sqlite_fts)
+    event.listen(Article.__table__, "after_create", _SQLITE_FTS_DDL)
+
+
+# ---------- query ----------
+def _search_mysql(terms, limit, offset):
+    query_text = " ".join(terms)
+    title_score = match(Article.search_title, against=query_text).in_natural_language_mode()
+    all_score = match(Article.search_title, Article.search_body, against=query_text).in_natural_language_mode()
+    score = (title_score * TITLE_WEIGHT + all_score).label("score")
+    return (
+        db.session.query(Article.id, score)
+        .filter(all_score > 0)
+        .order_by(score.desc(), Article.id.desc())
+        .limit(limit).offset(offset)
+        .all()
+    )
+
+
+def _search_postgres(terms, limit, offset):
+    # Ekspresi ini HARUS sama persis dengan index GIN di migration supaya index terpakai
+    simple = literal_column("'simple'::regconfig")
+    vector = (
+        func.setweight(func.to_tsvector(simple, func.coalesce(Article.search_title, "")), literal_column("'A'"))
+        .op("||")(func.setweight(func.to_tsvector(simple, func.coalesce(Article.search_body, "")), literal_column("'B'")))
+    )
+    tsquery = func.to_tsquery(simple, " | ".join(terms))
+    score = func.ts_rank(vector, tsquery).label("score")
+    return (
+        db.session.query(Article.id, score)
+        .filter(vector.op("@@")(tsquery))
+        .order_by(score.desc(), Article.id.desc())
+        .limit(limit).offset(offset)
+        .all()
+    )
+
+
+def _search_sqlite(terms, limit, offset):
+    # bm25(): makin kecil makin relevan -> dibalik supaya konsisten "score besar = relevan"
+    rows = db.session.execute(
+        text(
+            "SELECT rowid, -bm25(articles_fts, :w, 1.0) AS score FROM articles_fts "
+            "WHERE articles_fts MATCH :q ORDER BY score DESC, rowid DESC LIMIT :limit OFFSET :offset"
+        ),
+        {"w": TITLE_WEIGHT, "q": " OR ".join(f'"{t}"' for t in terms), "limit": limit, "offset": offset},
+    ).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def _search_fallback(terms, limit, offset):
+    """Database lain: LIKE di kolom hasil stem (tanpa index, tanpa ranking)."""
+    conds = []
+    for term in terms:
+        conds += [Article.search_title.like(f"%{term}%"), Article.search_body.like(f"%{term}%")]
+    return [
+        (article_id, 0.0) for (article_id,) in
+        db.session.query(Article.id).filter(or_(*conds))
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .limit(limit).offset(offset)
+        .all()
+    ]
+
+
+_BACKENDS = {
+    "mysql": _search_mysql,
+    "mariadb": _search_mysql,
+    "postgresql": _search_postgres,
+    "sqlite": _search_sqlite,
+}
+
+
+def search_article_ids(query, limit=20, offset=0):
+    """
+    Cari artikel (judul, tags, isi) dengan index full-text sesuai database.
+    Return: list (article_id, score) urut relevansi. Query tanpa kata bermakna -> [].
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    backend = _BACKENDS.get(db.engine.dialect.name, _search_fallback)
+    return backend(terms, limit, offset)
+
+
+def reindex_articles(batch_size=200):
+    """Hitung ulang kolom search_* (dan FTS5 di SQLite) untuk semua artikel. Return: jumlah artikel."""
+    total = 0
+    last_id = 0
+    while True:
+        articles = (
+            Article.query
+            .filter(Article.id > last_id)
+            .order_by(Article.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not articles:
+            break
+        for article in articles:
+            _fill_search_fields(None, None, article)
+            _sync_sqlite_fts(None, db.session.connection(), article)
+        db.session.commit()
+        total += len(articles)
+        last_id = articles[-1].id
+    print(f"🔎 Index pencarian: {total} artikel di-reindex")
+    return total
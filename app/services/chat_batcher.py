@@ -0,0 +1,137 @@
+import threading
+
+from sqlalchemy import and_, or_
+
+from app.extensions import db, socketio
+from app.models.consultation import ChatMessage
+
+
+class ChatBatcher:
+    """
+    Buffer keluar per room + batch read receipt untuk chat konsultasi.
+
+    - emit(): event ke room ditampung dulu, lalu tiap flush_interval dikirim
+      sebagai 1 frame per room. Kalau dalam 1 window cuma ada 1 event, dikirim
+      apa adanya (nama event asli). Kalau lebih, dikirim sebagai event 'batch':
+      [{"event": "new_message", "data": {...}}, ...]
+    - mark_read(): id pesan yang sudah dibaca dikumpulkan, lalu di-flush dengan
+      1x UPDATE chat_messages SET is_read = 1 WHERE id IN (...).
+
+    flush_interval = 0 -> tanpa buffer (emit & UPDATE langsung).
+    """
+
+    def __init__(self, flush_interval=0.1):
+        self.app = None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._outbox = {}    # {room: [{"event": ..., "data": ...}]}
+        self._receipts = {}  # {(consultation_id, reader_id): set(message_id)}
+        self._started = False
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get("CHAT_FLUSH_INTERVAL_MS", 100) / 1000.0
+
+    # ---------- API ----------
+    def emit(self, event, data, room):
+        if not self.flush_interval:
+            socketio.emit(event, data, to=room)
+            return
+        with self._lock:
+            self._outbox.setdefault(room, []).append({"event": event, "data": data})
+        self._ensure_started()
+
+    def mark_read(self, consultation_id, reader_id, message_ids):
+        ids = {int(i) for i in message_ids if str(i).isdigit()}
+        if not ids:
+            return
+        with self._lock:
+            self._receipts.setdefault((consultation_id, reader_id), set()).update(ids)
+        if not self.flush_interval:
+            self.flush()
+            return
+        self._ensure_started()
+
+    def flush(self):
+        """Kirim semua yang tertampung. Return (jumlah frame, jumlah pesan ditandai dibaca)."""
+        with self._lock:
+            receipts, self._receipts = self._receipts, {}
+        marked = self._flush_receipts(receipts) if receipts else 0
+
+        with self._lock:
+            outbox, self._outbox = self._outbox, {}
+        for room, events in outbox.items():
+            if len(events) == 1:
+                socketio.emit(events[0]["event"], events[0]["data"], to=room)
+            else:
+                socketio.emit("batch", events, to=room)
+        return len(outbox), marked
+
+    # ---------- internal ----------
+    def _flush_receipts(self, receipts):
+        all_ids = set()
+        conds = []
+        for (consultation_id, reader_id), ids in receipts.items():
+            all_ids |= ids
+            # pembaca hanya boleh menandai pesan lawan bicara di konsultasinya sendiri
+            conds.append(and_(
+                ChatMessage.consultation_id == consultation_id,
+                ChatMessage.sender_id != reader_id,
+            ))
+
+        # Ambil dulu pesan yang memang akan ditandai (predikat sama dengan UPDATE, baris dikunci),
+        # supaya 'messages_read' cuma berisi id yang benar-benar berubah jadi dibaca
+        rows = (
+            db.session.query(ChatMessage.id, ChatMessage.consultation_id, ChatMessage.sender_id)
+            .filter(ChatMessage.id.in_(all_ids), ChatMessage.is_read.is_(False), or_(*conds))
+            .with_for_update()
+            .all()
+        )
+        if not rows:
+            db.session.commit()
+            return 0
+
+        marked = (
+            ChatMessage.query
+            .filter(ChatMessage.id.in_([r.id for r in rows]), ChatMessage.is_read.is_(False))
+            .update({ChatMessage.is_read: True}, synchronize_session=False)
+        )
+        db.session.commit()
+
+        for (consultation_id, reader_id), ids in receipts.items():
+            read_ids = sorted(
+                r.id for r in rows
+                if r.id in ids and r.consultation_id == consultation_id and r.sender_id != reader_id
+            )
+            if not read_ids:
+                continue
+            self.emit(
+                "messages_read",
+                {"consultation_id": consultation_id, "reader_id": reader_id, "message_ids": read_ids},
+                f"consultation_{consultation_id}",
+            )
+        return marked
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        socketio.start_background_task(self._loop)
+
+    def _loop(self):
+        while True:
+            socketio.sleep(self.flush_interval)
+            with self.app.app_context():
+                try:
+                    self.flush()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"❌ Flush chat gagal: {e}")
+                finally:
+                    db.session.remove()
+
+
+chat_batcher = ChatBatcher()
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models.consultation import Consultation, ChatMessage
+from app.services.chat_batcher import chat_batcher
+
+
+def store_chat_message(user_id, consultation_id, message_text):
+    """
+    Validasi + simpan 1 pesan chat konsultasi.
+    Dipakai bersama oleh REST (/api/consultation/send) dan event socket 'send_message'
+    supaya aturan validasinya tidak dobel.
+
+    Return: (chat, None, None) kalau berhasil,
+            (None, pesan_error, status_code) kalau gagal.
+    """
+    if not consultation_id or not message_text:
+        return None, "Data tidak lengkap", 400
+
+    consultation = Consultation.query.get(consultation_id)
+
+    # Validasi Sesi
+    if not consultation:
+        return None, "Sesi tidak ditemukan", 404
+
+    # Cek apakah user terlibat dalam sesi ini (Safety)
+    if user_id not in [consultation.patient_id, consultation.doctor_id]:
+        return None, "Anda tidak memiliki akses ke sesi ini", 403
+
+    # Cek Status Aktif
+    if consultation.status != 'active':
+        return None, "Sesi chat belum aktif (belum bayar) atau sudah selesai.", 400
+
+    # Cek Kedaluwarsa Waktu (1 Jam tadi)
+    # Status 'completed' di-set oleh sweeper background (consultation_sweeper), bukan di sini
+    if consultation.expired_at and datetime.utcnow() > consultation.expired_at:
+        return None, "Waktu konsultasi telah habis.", 400
+
+    # Simpan Pesan
+    new_chat = ChatMessage(
+        consultation_id=consultation.id,
+        sender_id=user_id,
+        message=message_text
+    )
+    db.session.add(new_chat)
+    db.session.commit()
+
+    return new_chat, None, None
+
+
+def message_payload(chat):
+    """Data pesan yang dikirim ke layar lawan bicara."""
+    return {
+        "id": chat.id,
+        "sender_id": chat.sender_id,
+        "message": chat.message,
+        "timestamp": chat.created_at.isoformat(),
+        # Flag ini nanti diatur frontend, tapi kita kirim false defaultnya
+        "is_me": False
+    }
+
+
+def broadcast_message(chat):
+    """Teriakkan pesan baru ke room consultation_<id> (lewat buffer, digabung per window)."""
+    room_id = f"consultation_{chat.consultation_id}"
+    chat_batcher.emit('new_message', message_payload(chat), room_id)
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from sqlalchemy import or_
+
+from app.models.consultation import Consultation
+
+
+class ConsultationAccessCache:
+    """
+    Cache {user_id: {consultation_id: status}} untuk otorisasi join room socket.
+
+    - Di-key per USER (bukan per sid), jadi reconnect berkali-kali dari user
+      yang sama cukup 1 query selama TTL belum lewat.
+    - Di-invalidate setiap konsultasi dibuat / berubah status
+      (lihat invalidate_consultation), jadi TTL hanya jaring pengaman.
+    """
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = {}  # {user_id: (expires_at, {consultation_id: status})}
+
+    def _load(self, user_id):
+        rows = (
+            Consultation.query
+            .with_entities(Consultation.id, Consultation.status)
+            .filter(or_(
+                Consultation.patient_id == user_id,
+                Consultation.doctor_id == user_id,
+            ))
+            .all()
+        )
+        return {c_id: status for c_id, status in rows}
+
+    def allowed(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        allowed = self._load(user_id)
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl_seconds, allowed)
+        return allowed
+
+    def can_join(self, user_id, consultation_id):
+        return consultation_id in self.allowed(user_id)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def invalidate_consultation(self, consultation):
+        """Panggil setiap Consultation dibuat atau status-nya berubah."""
+        if consultation is not None:
+            self.invalidate(consultation.patient_id, consultation.doctor_id)
+
+
+consultation_access = ConsultationAccessCache()
+
+
+def parse_consultation_room(room):
+    """'consultation_12' -> 12, selain itu None."""
+    prefix = "consultation_"
+    if not isinstance(room, str) or not room.startswith(prefix):
+        return None
+    raw = room[len(prefix):]
+    return int(raw) if raw.isdigit() else None
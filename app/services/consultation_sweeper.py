@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db, socketio
+from app.models.consultation import Consultation, Payment
+from app.services.consultation_access import consultation_access
+from app.services.payment_status_cache import payment_status_cache
+from app.services.revenue_rollup import track_bulk_status_change
+
+
+def sweep_expired_consultations(batch_size=500, now=None):
+    """
+    Tutup konsultasi 'active' yang expired_at-nya sudah lewat.
+    - 1x SELECT ... FOR UPDATE + 1x UPDATE ... WHERE id IN (...) per batch (bukan per baris)
+    - Emit 'consultation_closed' ke room consultation_<id> yang benar-benar ditutup
+    Return: jumlah konsultasi yang ditutup.
+    """
+    now = now or datetime.utcnow()
+    total_closed = 0
+
+    while True:
+        rows = (
+            Consultation.query
+            .with_entities(Consultation.id, Consultation.patient_id, Consultation.doctor_id)
+            .filter(
+                Consultation.status == 'active',
+                Consultation.expired_at.isnot(None),
+                Consultation.expired_at < now,
+            )
+            .order_by(Consultation.id.asc())
+            .limit(batch_size)
+            # Baris terkunci sampai commit: yang di-SELECT = yang di-UPDATE, jadi event
+            # close tidak terkirim untuk konsultasi yang statusnya diubah proses lain.
+            # Baris yang sedang dikunci proses lain dilewati (diambil di run berikutnya).
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            break
+
+        ids = [r.id for r in rows]
+        # status == 'active' diulang di WHERE supaya aman kalau ada proses lain yang duluan menutup
+        closed = (
+            Consultation.query
+            .filter(Consultation.id.in_(ids), Consultation.status == 'active')
+            .update(
+                {Consultation.status: 'completed', Consultation.updated_at: now},
+                synchronize_session=False,
+            )
+        )
+        db.session.commit()
+        total_closed += closed
+
+        for r in rows:
+            consultation_access.invalidate(r.patient_id, r.doctor_id)
+            socketio.emit(
+                'consultation_closed',
+                {"consultation_id": r.id, "status": "completed", "closed_at": now.isoformat()},
+                to=f"consultation_{r.id}",
+            )
+
+        if len(rows) < batch_size:
+            break
+
+    if total_closed:
+        print(f"⏰ Sweeper: {total_closed} konsultasi expired ditutup")
+    return total_closed
+
+
+def _fail_pending_payments(payment_ids):
+    """
+    Ubah payment yang MASIH 'pending' jadi 'failed' (tanpa commit).
+    Baris dikunci dulu (SELECT ... FOR UPDATE) lalu di-UPDATE dengan WHERE status = 'pending',
+    jadi payment yang barusan lunas lewat webhook tidak ikut digagalkan dan rollup
+    cuma dihitung untuk baris yang benar-benar berubah.
+    Return: baris payment yang diubah (id, consultation_id, ...).
+    """
+    rows = (
+        Payment.query
+        .join(Consultation, Consultation.id == Payment.consultation_id)
+        .with_entities(
+            Payment.id, Payment.consultation_id, Payment.created_at, Payment.payment_method,
+            Payment.status, Payment.amount, Consultation.doctor_id,
+        )
+        .filter(Payment.id.in_(payment_ids), Payment.status == 'pending')
+        .order_by(Payment.id.asc())
+        .with_for_update(of=Payment)
+        .all()
+    )
+    if not rows:
+        return []
+    ids = [r.id for r in rows]
+    Payment.query.filter(Payment.id.in_(ids), Payment.status == 'pending')\
+        .update({Payment.status: 'failed'}, synchronize_session=False)
+    track_bulk_status_change(rows, 'failed')
+    return rows
+
+
+def fail_pending_bookings(payment_ids):
+    """
+    Booking yang tidak akan dibayar lagi (yatim / token Snap kedaluwarsa):
+    payment yang masih 'pending' -> 'failed', konsultasinya -> 'cancelled'. Tanpa commit.
+    Return: id payment yang digagalkan.
+    """
+    rows = _fail_pending_payments(payment_ids)
+    # Konsultasi cuma dibatalkan kalau payment-nya memang jadi 'failed' di sini
+    consultation_ids = [r.consultation_id for r in rows]
+    if consultation_ids:
+        Consultation.query\
+            .filter(Consultation.id.in_(consultation_ids), Consultation.status == 'pending')\
+            .update({Consultation.status: 'cancelled'}, synchronize_session=False)
+    return [r.id for r in rows]
+
+
+def mark_booking_failed(payment_id, consultation_id):
+    """Booking yang gagal dapat token dari gateway: payment 'failed', konsultasi 'cancelled'."""
+    _fail_pending_payments([payment_id])
+    Consultation.query.filter(Consultation.id == consultation_id, Consultation.status == 'pending')\
+        .update({Consultation.status: 'cancelled'}, synchronize_session=False)
+    db.session.commit()
+    payment_status_cache.invalidate(payment_id)
+
+
+def sweep_orphaned_bookings(older_than_minutes=30, batch_size=500):
+    """
+    Bersihkan booking yang tertinggal 'pending' TANPA token Midtrans
+    (proses mati setelah commit lokal tapi sebelum gateway merespons).
+    Payment lama dari sebelum kolom payment_token ada sudah di-backfill '' oleh migrasi,
+    jadi tidak ikut tersapu.
+    Return: jumlah booking yang ditutup.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=older_than_minutes)
+    total = 0
+
+    while True:
+        rows = (
+            Payment.query
+            .with_entities(Payment.id)
+            .filter(
+                Payment.status == 'pending',
+                Payment.payment_token.is_(None),
+                Payment.created_at < cutoff,
+            )
+            .order_by(Payment.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        payment_ids = [r.id for r in rows]
+        failed_ids = fail_pending_bookings(payment_ids)
+        db.session.commit()
+        payment_status_cache.invalidate(*payment_ids)
+        total += len(failed_ids)
+
+        if len(rows) < batch_size:
+            break
+
+    if total:
+        print(f"🧹 Sweeper: {total} booking tanpa token pembayaran dibatalkan")
+    return total
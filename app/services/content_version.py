@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from sqlalchemy import event, insert, select, update
+
+from app.extensions import db
+from app.models.article import Article
+from app.models.content_version import ContentVersion
+from app.models.user import User
+
+ARTICLES = "articles"
+
+_table = ContentVersion.__table__
+
+
+def bump_version(name, connection=None):
+    """
+    Naikkan versi koleksi (atomik: UPDATE ... SET version = version + 1).
+    Kalau dipanggil dari listener flush, pakai `connection` supaya ikut transaksi yang sama.
+    """
+    connection = connection or db.session.connection()
+    now = datetime.utcnow()
+    result = connection.execute(
+        update(_table)
+        .where(_table.c.name == name)
+        .values(version=_table.c.version + 1, updated_at=now)
+    )
+    if not result.rowcount:
+        connection.execute(insert(_table).values(name=name, version=1, updated_at=now))
+
+
+def get_version(name):
+    """Return (version, updated_at). Koleksi yang belum pernah berubah -> (0, None)."""
+    row = db.session.execute(
+        select(_table.c.version, _table.c.updated_at).where(_table.c.name == name)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+# ---------- listener: semua jalur tulis artikel (API, web dokter, web admin) ----------
+def _bump_articles(mapper, connection, target):
+    bump_version(ARTICLES, connection)
+
+
+def _bump_articles_on_author_change(mapper, connection, target):
+    # nama / foto penulis ikut tampil di list artikel
+    if target.role != 'DOKTER':
+        return
+    attrs = db.inspect(target).attrs
+    if attrs.full_name.history.has_changes() or attrs.profile_image.history.has_changes():
+        bump_version(ARTICLES, connection)
+
+
+def init_content_versions():
+    """Daftarkan listener sekali saja (dipanggil dari create_app)."""
+    if event.contains(Article, "after_insert", _bump_articles):
+        return
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(Article, event_name, _bump_articles)
+    event.listen(User, "after_update", _bump_articles_on_author_change)
@@ -0,0 +1,305 @@
+import hashlib
+import os
+import queue
+import threading
+
+from flask import current_app, request
+from PIL import Image, ImageOps
+
+from app.extensions import db, socketio
+from app.models.image_variant import ImageVariant
+from app.services.upload_store import upload_store, is_local_upload
+
+# Sisi terpanjang (px) per varian. thumb: avatar/list kecil, medium: kartu & detail artikel di HP
+DEFAULT_VARIANT_SIZES = {"thumb": 320, "medium": 1080}
+FORMATS = ("webp", "jpeg")
+VARIANT_DIR = "static/uploads/variants"
+
+_PIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+def _variant_dir(source_path):
+    # disebar per hash path sumber, sama seperti file upload (tidak 1 folder besar)
+    digest = hashlib.sha256(source_path.encode()).hexdigest()
+    return f"{VARIANT_DIR}/{digest[:2]}/{digest[2:4]}"
+
+
+def variant_sizes():
+    return {
+        "thumb": current_app.config.get("IMAGE_THUMB_SIZE", DEFAULT_VARIANT_SIZES["thumb"]),
+        "medium": current_app.config.get("IMAGE_MEDIUM_SIZE", DEFAULT_VARIANT_SIZES["medium"]),
+    }
+
+
+# ---------- generate ----------
+def _prepare(img, fmt):
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if fmt == "webp":
+        return img.convert("RGBA" if has_alpha else "RGB")
+    if has_alpha:
+        # JPEG tidak punya transparansi -> tempel di background putih
+        rgba = img.convert("RGBA")
+        flat = Image.new("RGB", rgba.size, (255, 255, 255))
+        flat.paste(rgba, mask=rgba.split()[-1])
+        return flat
+    return img.convert("RGB")
+
+
+def _save(img, fmt):
+    """Encode ke file sementara; return (ukuran byte, path file sementara)."""
+    tmp_path = upload_store.tmp_path()
+    quality = current_app.config.get("IMAGE_VARIANT_QUALITY", 80)
+    options = {"quality": quality}
+    if fmt == "jpeg":
+        options.update(optimize=True, progressive=True)
+    img.save(tmp_path, _PIL_FORMATS[fmt], **options)
+    return os.path.getsize(tmp_path), tmp_path
+
+
+def generate_variants(source_path):
+    """
+    Buat varian thumb/medium (WebP + JPEG) untuk 1 gambar upload dan catat di image_variants.
+    Varian yang tidak lebih kecil dari file asli tidak dicatat (API pakai file asli).
+    Aman dipanggil ulang: varian lama untuk source yang sama diganti.
+    Return: jumlah varian yang dicatat.
+    """
+    if not is_local_upload(source_path):
+        return 0
+    original_bytes = upload_store.size(source_path)
+    if not original_bytes:
+        return 0
+
+    with upload_store.local_copy(source_path) as original, Image.open(original) as img:
+        img = ImageOps.exif_transpose(img)
+        img.load()
+
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    folder = _variant_dir(source_path)
+    rows, files = [], []
+    for variant, size in variant_sizes().items():
+        resized = img.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        for fmt in FORMATS:
+            path = f"{folder}/{stem}_{variant}.{_EXTENSIONS[fmt]}"
+            size_bytes, tmp_path = _save(_prepare(resized, fmt), fmt)
+            if size_bytes >= original_bytes:
+                os.remove(tmp_path)
+                continue
+            files.append((path, tmp_path))
+            rows.append(ImageVariant(
+                source_path=source_path, variant=variant, format=fmt, path=path,
+                width=resized.width, height=resized.height, size_bytes=size_bytes,
+            ))
+
+    # Encode selesai dulu, baru tulis: antrian hapus path yang sama (varian lama) dibatalkan
+    # di transaksi ini supaya worker hapus tidak membuang file yang baru ditulis
+    if files:
+        upload_store.cancel_queued_deletes(path for path, _ in files)
+    for path, tmp_path in files:
+        upload_store.put(path, tmp_path, move=True)
+
+    # Gambar sudah diganti / dihapus selagi varian dibuat -> jangan dicatat, file varian dibuang
+    from app.services.upload_gc import paths_in_use
+
+    if source_path not in paths_in_use([source_path], trust_blobs=False):
+        for row in rows:
+            upload_store.queue_delete(row.path)
+        db.session.commit()
+        return 0
+
+    ImageVariant.query.filter_by(source_path=source_path).delete(synchronize_session=False)
+    db.session.add_all(rows)
+    _bump_public_versions(source_path)
+    db.session.commit()
+    return len(rows)
+
+
+def _bump_public_versions(source_path):
+    # List artikel publik di-cache per versi koleksi; naikkan versi supaya
+    # cache berikutnya langsung pakai URL varian (gambar artikel / foto penulis)
+    from app.models.article import Article
+    from app.models.user import User
+    from app.services.content_version import ARTICLES, bump_version
+
+    used = (
+        db.session.query(Article.id).filter(Article.image_url == source_path).first()
+        or db.session.query(User.id).filter(User.profile_image == source_path, User.role == 'DOKTER').first()
+    )
+    if used:
+        bump_version(ARTICLES)
+
+
+def delete_variants(source_path):
+    """Hapus baris varian milik 1 gambar (tanpa commit); file varian masuk antrian hapus."""
+    if not is_local_upload(source_path):
+        return
+    for variant in ImageVariant.query.filter_by(source_path=source_path).all():
+        upload_store.queue_delete(variant.path)
+        db.session.delete(variant)
+
+
+# ---------- pilih varian untuk response API ----------
+def preferred_format():
+    """WebP default (Android/iOS modern); client lama bisa minta ?image_format=jpeg."""
+    fmt = (request.args.get("image_format") or current_app.config.get("IMAGE_VARIANT_FORMAT", "webp")).lower()
+    return fmt if fmt in FORMATS else "webp"
+
+
+def variant_lookup(paths, fmt=None):
+    """{(source_path, variant): path} untuk sekumpulan gambar sekaligus (1 query per halaman)."""
+    local = {path for path in paths if is_local_upload(path)}
+    if not local:
+        return {}
+    rows = (
+        db.session.query(ImageVariant.source_path, ImageVariant.variant, ImageVariant.path)
+        .filter(ImageVariant.source_path.in_(local), ImageVariant.format == (fmt or preferred_format()))
+        .all()
+    )
+    return {(row.source_path, row.variant): row.path for row in rows}
+
+
+def public_url(path):
+    return upload_store.public_url(path)
+
+
+def variant_url(path, variant, lookup):
+    """URL varian kalau sudah jadi, selain itu URL file asli."""
+    if not path:
+        return None
+    return public_url(lookup.get((path, variant), path))
+
+
+# ---------- worker background ----------
+class ImageVariantWorker:
+    """
+    Antrian pembuatan varian gambar. Request upload cukup enqueue() setelah commit,
+    resize/encode jalan di 1 background task (tidak menahan response).
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("IMAGE_VARIANTS_ENABLED", True)
+
+    def enqueue(self, *paths):
+        paths = [path for path in paths if is_local_upload(path)]
+        if not self.enabled or not paths:
+            return
+        for path in paths:
+            self._queue.put(path)
+        self._ensure_started()
+
+    def join(self):
+        """Tunggu antrian kosong (dipakai CLI/testing)."""
+        self._queue.join()
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        socketio.start_background_task(self._loop)
+
+    def _loop(self):
+        while True:
+            path = self._queue.get()
+            with self.app.app_context():
+                try:
+                    generate_variants(path)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"❌ Gagal membuat varian gambar {path}: {e}")
+                finally:
+                    db.session.remove()
+                    self._queue.task_done()
+
+
+image_variant_worker = ImageVariantWorker()
+
+
+# ---------- backfill + benchmark ----------
+def upload_image_paths():
+    """Semua path gambar upload yang dipakai (artikel, foto profil, skrining)."""
+    from app.models.article import Article
+    from app.models.medical import MedicalRecord
+    from app.models.user import User
+
+    paths = set()
+    for column in (Article.image_url, User.profile_image, MedicalRecord.eye_image_path, MedicalRecord.nail_image_path):
+        paths.update(value for (value,) in db.session.query(column).filter(column.isnot(None)).distinct())
+    return sorted(path for path in paths if is_local_upload(path))
+
+
+def backfill_variants(force=False):
+    """Buat varian untuk gambar lama yang belum punya. Return: (jumlah gambar diproses, gagal)."""
+    paths = upload_image_paths()
+    if not force:
+        done = {value for (value,) in db.session.query(ImageVariant.source_path).distinct()}
+        paths = [path for path in paths if path not in done]
+
+    processed = failed = 0
+    for path in paths:
+        try:
+            generate_variants(path)
+            processed += 1
+        except Exception as e:
+            db.session.rollback()
+            failed += 1
+            print(f"❌ Gagal membuat varian gambar {path}: {e}")
+    print(f"🖼️ Varian gambar: {processed} gambar diproses, {failed} gagal")
+    return processed, failed
+
+
+def _file_size(relative_path):
+    if not is_local_upload(relative_path):
+        return 0
+    return upload_store.size(relative_path)
+
+
+def measure_feed_bytes(pages=5, limit=20, fmt="webp"):
+    """
+    Benchmark: total byte gambar yang diunduh app per halaman feed artikel
+    (gambar artikel + foto penulis), file asli vs varian yang dipilih API.
+    """
+    from app.models.article import Article
+    from app.models.user import User
+    from app.utils.pagination import keyset_page
+
+    query = (
+        db.session.query(Article.id, Article.created_at, Article.image_url, User.profile_image)
+        .select_from(Article)
+        .outerjoin(User, User.id == Article.author_id)
+    )
+    report = {"format": fmt, "limit": limit, "pages": []}
+    cursor = None
+    for page in range(1, pages + 1):
+        rows, cursor = keyset_page(query, Article.created_at, Article.id, cursor=cursor, limit=limit)
+        if not rows:
+            break
+        lookup = variant_lookup([r.image_url for r in rows] + [r.profile_image for r in rows], fmt)
+        before = after = 0
+        for row in rows:
+            for path, variant in ((row.image_url, "medium"), (row.profile_image, "thumb")):
+                if not path:
+                    continue
+                before += _file_size(path)
+                after += _file_size(lookup.get((path, variant), path))
+        report["pages"].append({"page": page, "articles": len(rows), "original_bytes": before, "variant_bytes": after})
+        if not cursor:
+            break
+
+    report["original_bytes"] = sum(p["original_bytes"] for p in report["pages"])
+    report["variant_bytes"] = sum(p["variant_bytes"] for p in report["pages"])
+    report["saved_percent"] = (
+        round(100 * (1 - report["variant_bytes"] / report["original_bytes"]), 1) if report["original_bytes"] else 0
+    )
+    return report
@@ -0,0 +1,152 @@
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.ledger import LedgerEntry
+from app.models.user import User
+
+# Contoh: Admin ambil 10%, Dokter dapat 90%
+ADMIN_FEE_RATE = 0.10
+
+
+def split_revenue(amount):
+    """Return (admin_fee, doctor_income)."""
+    admin_fee = int(amount * ADMIN_FEE_RATE)
+    return admin_fee, int(amount - admin_fee)
+
+
+def _add_to_balance(user_id, amount):
+    """UPDATE users SET balance = balance + :amount (atomik di DB, tanpa load ORM / row lock lama)."""
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(balance=func.coalesce(User.balance, 0) + amount)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _add_to_balances(deltas):
+    """
+    Versi massal _add_to_balance: {user_id: delta} -> 1 statement
+    UPDATE users SET balance = balance + CASE id WHEN .. THEN .. END WHERE id IN (...)
+    """
+    if not deltas:
+        return
+    db.session.execute(
+        update(User)
+        .where(User.id.in_(list(deltas)))
+        .values(balance=func.coalesce(User.balance, 0) + case(deltas, value=User.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _post(entry):
+    """
+    Insert entry di savepoint. Kalau payment/withdrawal yang sama sudah pernah
+    dibukukan (unique constraint), entry diabaikan dan saldo tidak disentuh.
+    Return True kalau entry baru tercatat.
+    """
+    try:
+        with db.session.begin_nested():
+            db.session.add(entry)
+    except IntegrityError:
+        return False
+
+    _add_to_balance(entry.user_id, entry.amount)
+    return True
+
+
+def credit_payment(payment, doctor_id):
+    """Kredit pendapatan dokter dari 1 payment sukses (tanpa commit). Return doctor_income atau 0."""
+    _, doctor_income = split_revenue(payment.amount)
+    posted = _post(LedgerEntry(
+        user_id=doctor_id,
+        entry_type='payment_credit',
+        amount=doctor_income,
+        payment_id=payment.id,
+        description=f"Konsultasi #{payment.consultation_id} ({payment.transaction_id})",
+    ))
+    return doctor_income if posted else 0
+
+
+def debit_withdrawal(withdrawal):
+    """Debit saldo dokter untuk 1 withdrawal (tanpa commit). Return True kalau baru dibukukan."""
+    return _post(LedgerEntry(
+        user_id=withdrawal.doctor_id,
+        entry_type='withdrawal_debit',
+        amount=-int(withdrawal.amount),
+        withdrawal_id=withdrawal.id,
+        description=f"Penarikan ke {withdrawal.bank_name} {withdrawal.account_number}",
+    ))
+
+
+def debit_withdrawals(withdrawals):
+    """
+    Debit banyak withdrawal sekaligus (tanpa commit): 1x INSERT ledger_entries
+    multi-row + 1x UPDATE saldo untuk semua dokter di batch.
+    Withdrawal yang sudah pernah didebit dilewati.
+    Return: list withdrawal yang baru dibukukan.
+    """
+    ids = [w.id for w in withdrawals]
+    if not ids:
+        return []
+    already = set(db.session.scalars(
+        select(LedgerEntry.withdrawal_id).where(LedgerEntry.withdrawal_id.in_(ids))
+    ))
+    fresh = [w for w in withdrawals if w.id not in already]
+    if not fresh:
+        return []
+
+    db.session.execute(insert(LedgerEntry), [
+        {
+            "user_id": w.doctor_id,
+            "entry_type": 'withdrawal_debit',
+            "amount": -int(w.amount),
+            "withdrawal_id": w.id,
+            "description": f"Penarikan ke {w.bank_name} {w.account_number}",
+        }
+        for w in fresh
+    ])
+
+    deltas = {}
+    for w in fresh:
+        deltas[w.doctor_id] = deltas.get(w.doctor_id, 0) - int(w.amount)
+    _add_to_balances(deltas)
+    return fresh
+
+
+def rebuild_balances():
+    """
+    Hitung ulang User.balance dari ledger untuk semua user yang punya entry
+    ATAU punya saldo != 0 (supaya saldo tanpa jejak ledger ikut ketahuan jadi 0).
+    Return: jumlah user yang saldonya dikoreksi.
+    """
+    ledger_sum = (
+        select(func.coalesce(func.sum(LedgerEntry.amount), 0))
+        .where(LedgerEntry.user_id == User.id)
+        .scalar_subquery()
+    )
+    has_entries = select(LedgerEntry.id).where(LedgerEntry.user_id == User.id).exists()
+
+    result = db.session.execute(
+        update(User)
+        .where(has_entries | (func.coalesce(User.balance, 0) != 0))
+        .where(func.coalesce(User.balance, 0) != ledger_sum)
+        .values(balance=ledger_sum)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    fixed = result.rowcount or 0
+    if fixed:
+        print(f"📒 Ledger: saldo {fixed} user dikoreksi dari buku besar")
+    return fixed
+
+
+def doctor_earnings(doctor_id):
+    """Ringkasan pendapatan dokter langsung dari ledger (1 query agregat)."""
+    credit, debit = db.session.query(
+        func.coalesce(func.sum(case((LedgerEntry.amount > 0, LedgerEntry.amount), else_=0)), 0),
+        func.coalesce(func.sum(case((LedgerEntry.amount < 0, LedgerEntry.amount), else_=0)), 0),
+    ).filter(LedgerEntry.user_id == doctor_id).one()
+    return {"total_credit": int(credit), "total_debit": int(-debit), "balance": int(credit + debit)}
@@ -0,0 +1,238 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.consultation import Consultation, Payment
+from app.models.payment_notification import PaymentNotification
+from app.services.consultation_access import consultation_access
+from app.services.payment_status_cache import payment_status_cache
+from app.services.ledger_service import credit_payment
+from app.services.revenue_rollup import payment_bucket, track_payment_change
+
+# Urutan status lokal: status yang sudah "lebih jauh" tidak boleh mundur
+# (misal notifikasi 'pending' yang telat datang setelah 'settlement').
+# 'success' final: cancel/expire/deny yang telat tidak boleh membatalkan pembayaran
+# yang sudah lunas (konsultasi sudah aktif + saldo dokter sudah dikredit).
+# 'failed' -> 'success' tetap boleh (booking yang sempat dianggap gagal ternyata dibayar).
+STATUS_RANK = {"pending": 0, "challenge": 1, "failed": 2, "success": 3}
+
+# Notifikasi yang gagal diproses (exception) dicoba ulang di run berikutnya, maks N kali;
+# setelah itu dilewati supaya tidak menahan notifikasi yang lebih baru (cek kolom error)
+MAX_ATTEMPTS = 5
+
+
+def verify_midtrans_signature(payload: dict, server_key: str) -> bool:
+    """
+    signature_key = SHA512(order_id + status_code + gross_amount + server_key)
+    (sesuai dokumentasi HTTP notification Midtrans)
+    """
+    if not server_key:
+        return False
+    raw = (
+        str(payload.get("order_id", ""))
+        + str(payload.get("status_code", ""))
+        + str(payload.get("gross_amount", ""))
+        + server_key
+    )
+    expected = hashlib.sha512(raw.encode("utf-8")).hexdigest()
+    return hmac.compare_digest(expected, str(payload.get("signature_key", "")))
+
+
+def record_notification(payload: dict):
+    """
+    Simpan notifikasi ke inbox. Return True kalau baru, False kalau duplikat.
+    """
+    notif = PaymentNotification(
+        order_id=payload["order_id"],
+        transaction_status=payload["transaction_status"],
+        fraud_status=payload.get("fraud_status"),
+        payment_type=payload.get("payment_type"),
+        payload=json.dumps(payload),
+    )
+    db.session.add(notif)
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def map_notification_status(transaction_status, fraud_status=None):
+    """
+    Logika Status Midtrans
+    Settlement / Capture = Sukses (Uang masuk)
+    Pending = Menunggu
+    Deny / Cancel / Expire = Gagal
+    Dipakai webhook + Status API (rekonsiliasi / refresh admin).
+    Status lain (refund, authorize, dst.) -> None = status lokal tidak diubah.
+    """
+    if transaction_status == 'capture':
+        return 'challenge' if fraud_status == 'challenge' else 'success'
+    if transaction_status == 'settlement':
+        return 'success'
+    if transaction_status in ['cancel', 'deny', 'expire']:
+        return 'failed'
+    if transaction_status == 'pending':
+        return 'pending'
+    return None
+
+
+def apply_payment_status(payment, new_status, payment_type=None):
+    """
+    Terapkan status baru ke Payment (tanpa commit).
+    Transisi dilakukan atomik di DB (UPDATE ... WHERE status = <status lama>): kalau webhook dan
+    rekonsiliasi memproses payment yang sama bersamaan, cuma 1 yang menang, jadi rollup
+    tidak terhitung 2x.
+    Return True kalau status berubah.
+    """
+    old_status = payment.status
+    if new_status is None or old_status == new_status:
+        return False
+    if STATUS_RANK.get(new_status, 0) < STATUS_RANK.get(old_status, 0):
+        return False
+
+    before = payment_bucket(payment)
+    values = {Payment.status: new_status}
+    if payment_type and not payment.payment_method:
+        values[Payment.payment_method] = payment_type
+    updated = (
+        Payment.query
+        .filter(Payment.id == payment.id, Payment.status == old_status)
+        .update(values, synchronize_session=False)
+    )
+    # Kalah balapan (status sudah diubah proses lain) atau sudah berubah: ambil status terbaru saja
+    db.session.refresh(payment)
+    if updated != 1:
+        return False
+
+    track_payment_change(before, payment_bucket(payment), payment.amount)
+    if new_status == 'success':
+        activate_consultation(payment)
+    return True
+
+
+def activate_consultation(payment):
+    """Mengaktifkan sesi konsultasi (Durasi 1 Jam) + kredit pendapatan dokter ke ledger"""
+    # Transisi pending -> active dilakukan atomik di DB:
+    # hanya 1 proses yang bisa menang, jadi saldo tidak mungkin nambah 2x.
+    # 'cancelled' ikut diterima: booking yang sempat dianggap gagal/yatim tapi
+    # ternyata tetap dibayar di Midtrans harus tetap diaktifkan.
+    expired_at = datetime.utcnow() + timedelta(hours=1)
+    activated = (
+        Consultation.query
+        .filter(Consultation.id == payment.consultation_id,
+                Consultation.status.in_(['pending', 'cancelled']))
+        .update({Consultation.status: 'active', Consultation.expired_at: expired_at},
+                synchronize_session=False)
+    )
+    if activated != 1:
+        return
+
+    consultation = Consultation.query.get(payment.consultation_id)
+    db.session.refresh(consultation)
+    consultation_access.invalidate_consultation(consultation)
+
+    # LOGIKA BAGI HASIL (Revenue Sharing) -> ledger + UPDATE users SET balance = balance + x
+    doctor_income = credit_payment(payment, consultation.doctor_id)
+    if doctor_income:
+        print(f"💰 Payment Lunas! Saldo dokter #{consultation.doctor_id} bertambah Rp {doctor_income}")
+
+
+def _claim(notif_id):
+    """
+    Tandai notifikasi sebagai diproses. Hanya 1 proses yang bisa menang
+    (UPDATE ... WHERE processed_at IS NULL), jadi transisi status jalan tepat sekali.
+    """
+    claimed = (
+        PaymentNotification.query
+        .filter(PaymentNotification.id == notif_id, PaymentNotification.processed_at.is_(None))
+        .update({PaymentNotification.processed_at: datetime.utcnow()}, synchronize_session=False)
+    )
+    return claimed == 1
+
+
+def _record_failure(notif_id, exc):
+    """Catat error + attempts+1 di transaksi terpisah (transaksi proses sudah di-rollback)."""
+    try:
+        (
+            PaymentNotification.query
+            .filter(PaymentNotification.id == notif_id)
+            .update({
+                PaymentNotification.attempts: PaymentNotification.attempts + 1,
+                PaymentNotification.error: str(exc)[:255],
+            }, synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
+def process_pending_notifications(batch_size=100):
+    """
+    Proses inbox notifikasi secara berurutan (id naik = urutan datang).
+    Klaim + perubahan status dilakukan dalam 1 transaksi.
+    Notifikasi yang sudah gagal MAX_ATTEMPTS kali tidak diambil lagi.
+    Return: jumlah notifikasi yang diproses.
+    """
+    pending = (
+        PaymentNotification.query
+        .with_entities(PaymentNotification.id)
+        .filter(
+            PaymentNotification.processed_at.is_(None),
+            PaymentNotification.attempts < MAX_ATTEMPTS,
+        )
+        .order_by(PaymentNotification.id.asc())
+        .limit(batch_size)
+        .all()
+    )
+
+    processed = 0
+    for (notif_id,) in pending:
+        try:
+            if not _claim(notif_id):
+                db.session.rollback()
+                continue
+
+            notif = PaymentNotification.query.get(notif_id)
+            payment = Payment.query.filter_by(transaction_id=notif.order_id).first()
+            if not payment:
+                # Jangan dicatat sebagai sudah diproses: hapus dari inbox supaya
+                # kiriman ulang Midtrans tidak mentok di unique key
+                db.session.delete(notif)
+            else:
+                new_status = map_notification_status(notif.transaction_status, notif.fraud_status)
+                apply_payment_status(payment, new_status, notif.payment_type)
+
+            db.session.commit()
+            if payment:
+                payment_status_cache.invalidate(payment.id)
+            processed += 1
+            print(f"🔔 Midtrans Notification diproses: {notif.order_id} -> {notif.transaction_status}")
+        except Exception as e:
+            db.session.rollback()
+            _record_failure(notif_id, e)
+            print(f"❌ Gagal proses notifikasi {notif_id}: {e}")
+
+    return processed
+
+
+def process_notifications_async():
+    """Picu processor di background tanpa menahan response webhook."""
+    from app.extensions import socketio
+
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                process_pending_notifications()
+            finally:
+                db.session.remove()
+
+    socketio.start_background_task(run)
@@ -0,0 +1,134 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.extensions import db
+from app.models.consultation import Payment
+from app.services.payment_processor import apply_payment_status, map_notification_status
+from app.services.payment_service import payment_service, GatewayUnavailable
+from app.services.payment_status_cache import payment_status_cache
+from app.services.consultation_sweeper import fail_pending_bookings
+
+
+class RateLimiter:
+    """Batasi laju panggilan (maks `rate` per detik) yang dibagi ke semua worker thread."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _fetch_status(order_id, limiter):
+    """Jalan di worker thread: cuma HTTP, tanpa sentuh DB."""
+    limiter.acquire()
+    try:
+        return payment_service.get_status(order_id)
+    except GatewayUnavailable as e:
+        return {"http_status": None, "data": {"status_message": str(e)}}
+    except Exception as e:
+        return {"http_status": None, "data": {"status_message": f"{type(e).__name__}: {e}"}}
+
+
+def select_payments_to_reconcile(older_than_minutes=15, limit=500):
+    """Payment pending/challenge yang punya order_id dan sudah 'basi' (lebih tua dari N menit)."""
+    cutoff = datetime.utcnow() - timedelta(minutes=older_than_minutes)
+    return (
+        Payment.query
+        .with_entities(Payment.id, Payment.transaction_id, Payment.status, Payment.created_at)
+        .filter(
+            Payment.status.in_(['pending', 'challenge']),
+            Payment.transaction_id.isnot(None),
+            Payment.created_at < cutoff,
+        )
+        .order_by(Payment.created_at.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def reconcile_payments(older_than_minutes=15, limit=500, max_workers=8, rate_per_second=10, commit_every=50,
+                       expire_after_minutes=None):
+    """
+    Cocokkan status Payment lokal dengan Midtrans Status API secara massal.
+    - Query gateway paralel (worker pool terbatas + rate limit)
+    - Hasil diterapkan di thread utama, commit per `commit_every` payment
+    - Payment yang jadi 'success' otomatis mengaktifkan konsultasi (apply_payment_status)
+    - Payment 'pending' yang tidak dikenal Midtrans (404) dan lebih tua dari masa berlaku
+      Snap token (MIDTRANS_SNAP_EXPIRY_MINUTES) dibatalkan, supaya booking yang ditinggal
+      tidak terus memenuhi batch dan payment yang lebih baru tetap tercek
+    Return: ringkasan (dict).
+    """
+    if expire_after_minutes is None:
+        expire_after_minutes = current_app.config.get("MIDTRANS_SNAP_EXPIRY_MINUTES", 1440)
+    expire_cutoff = datetime.utcnow() - timedelta(minutes=expire_after_minutes)
+
+    targets = select_payments_to_reconcile(older_than_minutes, limit)
+    report = {
+        "checked": len(targets),
+        "updated": 0,
+        "unchanged": 0,
+        "not_found": 0,
+        "expired": 0,
+        "errors": 0,
+        "by_status": {},
+        "started_at": datetime.utcnow().isoformat(),
+    }
+    if not targets:
+        report["finished_at"] = datetime.utcnow().isoformat()
+        return report
+
+    limiter = RateLimiter(rate_per_second)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda t: _fetch_status(t.transaction_id, limiter), targets))
+
+    changed_ids = []
+    expired_ids = []
+    for target, res in zip(targets, results):
+        http_status, data = res["http_status"], res["data"]
+
+        if http_status == 404:
+            report["not_found"] += 1
+            if target.status == 'pending' and target.created_at and target.created_at < expire_cutoff:
+                expired_ids.append(target.id)
+            continue
+        if http_status != 200 or not isinstance(data, dict):
+            report["errors"] += 1
+            continue
+
+        payment = Payment.query.get(target.id)
+        mapped = map_notification_status(data.get("transaction_status"), data.get("fraud_status"))
+        if apply_payment_status(payment, mapped, data.get("payment_type")):
+            report["updated"] += 1
+            report["by_status"][mapped] = report["by_status"].get(mapped, 0) + 1
+            changed_ids.append(target.id)
+        else:
+            report["unchanged"] += 1
+
+        if len(changed_ids) >= commit_every:
+            db.session.commit()
+            payment_status_cache.invalidate(*changed_ids)
+            changed_ids = []
+
+    if expired_ids:
+        report["expired"] = len(fail_pending_bookings(expired_ids))
+        changed_ids += expired_ids
+
+    db.session.commit()
+    payment_status_cache.invalidate(*changed_ids)
+    report["finished_at"] = datetime.utcnow().isoformat()
+    print(f"🔁 Rekonsiliasi: {report['updated']}/{report['checked']} payment diperbarui")
+    return report
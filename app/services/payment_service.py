@@ -1,13 +1,200 @@
 import os
-import midtransclient
-from flask import current_app
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+
+class GatewayUnavailable(Exception):
+    """Gateway pembayaran sedang tidak bisa dihubungi (circuit open / gagal setelah retry)."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker sederhana:
+    - closed    : request jalan normal
+    - open      : setelah `failure_threshold` gagal berturut-turut, semua request
+                  langsung ditolak selama `reset_timeout` detik (fail fast)
+    - half-open : setelah reset_timeout lewat, 1 request percobaan dibiarkan lewat
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # half-open: beri 1 kesempatan, buka lagi kalau gagal
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return (
+                self._opened_at is not None
+                and time.monotonic() - self._opened_at < self.reset_timeout
+            )
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class MidtransClient:
+    """
+    1 client HTTP untuk semua panggilan Midtrans (Snap + Status API):
+    - requests.Session dengan connection pool keep-alive
+    - timeout per panggilan (connect, read)
+    - retry + exponential backoff untuk 5xx / timeout / koneksi putus, hanya untuk GET
+      (Status API). POST Snap cuma diulang kalau koneksi belum terbuka sama sekali:
+      setelah read timeout / 5xx, Midtrans bisa saja sudah membuat order-nya
+    - circuit breaker supaya booking langsung gagal cepat saat gateway down
+    Base URL bisa di-override (misal ke stub HTTP server lokal untuk testing).
+    """
+
+    SNAP_SANDBOX = "https://app.sandbox.midtrans.com"
+    SNAP_PRODUCTION = "https://app.midtrans.com"
+    API_SANDBOX = "https://api.sandbox.midtrans.com"
+    API_PRODUCTION = "https://api.midtrans.com"
+
+    def __init__(self, server_key, is_production=False, snap_base_url=None, api_base_url=None,
+                 timeout=(3.05, 10), max_retries=2, backoff=0.5, pool_size=10, breaker=None):
+        # Tanpa server key semua panggilan cuma dapat 401 (dan ikut membuka circuit breaker)
+        if not server_key:
+            raise RuntimeError("MIDTRANS_SERVER_KEY belum diset di config.")
+        self.server_key = server_key
+        self.snap_base_url = (snap_base_url or (self.SNAP_PRODUCTION if is_production else self.SNAP_SANDBOX)).rstrip("/")
+        self.api_base_url = (api_base_url or (self.API_PRODUCTION if is_production else self.API_SANDBOX)).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        self.session.auth = (self.server_key, "")
+        self.session.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @staticmethod
+    def _not_sent(exc):
+        """True kalau request pasti belum sampai ke gateway (gagal saat membuka koneksi)."""
+        if isinstance(exc, requests.ConnectTimeout):
+            return True
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def _request(self, method, url, timeout=None, **kwargs):
+        """
+        Return requests.Response untuk status < 500.
+        Raise GatewayUnavailable kalau circuit open atau tetap gagal setelah retry.
+        """
+        if not self.breaker.allow():
+            raise GatewayUnavailable("Circuit open: gateway pembayaran sedang down")
+
+        idempotent = method in ("GET", "HEAD")
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                resp = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                last_error = e
+                if idempotent or self._not_sent(e):
+                    continue
+                break
+
+            if resp.status_code >= 500:
+                last_error = GatewayUnavailable(f"HTTP {resp.status_code} dari gateway")
+                if idempotent:
+                    continue
+                break
+
+            self.breaker.record_success()
+            return resp
+
+        self.breaker.record_failure()
+        raise GatewayUnavailable(str(last_error))
+
+    @staticmethod
+    def _json(resp):
+        try:
+            return resp.json()
+        except ValueError:
+            return {"raw": resp.text}
+
+    def create_snap_transaction(self, param, timeout=None):
+        """POST /snap/v1/transactions -> {'token': ..., 'redirect_url': ...}"""
+        resp = self._request("POST", f"{self.snap_base_url}/snap/v1/transactions", json=param, timeout=timeout)
+        data = self._json(resp)
+        if resp.status_code not in (200, 201):
+            raise ValueError(f"Snap menolak transaksi (HTTP {resp.status_code}): {data}")
+        return data
+
+    def get_status(self, order_id, timeout=None):
+        """GET /v2/{order_id}/status -> {'http_status': ..., 'data': {...}}"""
+        resp = self._request("GET", f"{self.api_base_url}/v2/{order_id}/status", timeout=timeout)
+        return {"http_status": resp.status_code, "data": self._json(resp)}
+
 
 class PaymentService:
     def __init__(self):
-        self.snap = midtransclient.Snap(
-            is_production=os.environ.get('MIDTRANS_IS_PRODUCTION') == 'True',
-            server_key=os.environ.get('MIDTRANS_SERVER_KEY')
+        self._options = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        cfg = app.config
+        self._options = dict(
+            server_key=cfg.get("MIDTRANS_SERVER_KEY") or os.environ.get('MIDTRANS_SERVER_KEY'),
+            is_production=bool(cfg.get("MIDTRANS_IS_PRODUCTION", False)),
+            snap_base_url=cfg.get("MIDTRANS_SNAP_BASE_URL"),
+            api_base_url=cfg.get("MIDTRANS_API_BASE_URL"),
+            timeout=(cfg.get("MIDTRANS_CONNECT_TIMEOUT", 3.05), cfg.get("MIDTRANS_READ_TIMEOUT", 10)),
+            max_retries=cfg.get("MIDTRANS_MAX_RETRIES", 2),
+            backoff=cfg.get("MIDTRANS_RETRY_BACKOFF", 0.5),
+            pool_size=cfg.get("MIDTRANS_POOL_SIZE", 10),
+            breaker=CircuitBreaker(
+                failure_threshold=cfg.get("MIDTRANS_BREAKER_THRESHOLD", 5),
+                reset_timeout=cfg.get("MIDTRANS_BREAKER_RESET_SECONDS", 30),
+            ),
         )
+        self._client = None
+
+    @property
+    def client(self):
+        """
+        MidtransClient dibuat saat pertama dipakai (app tetap bisa start tanpa server key,
+        misal untuk development). Tanpa MIDTRANS_SERVER_KEY -> RuntimeError, bukan 401.
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = MidtransClient(**self._options)
+        return self._client
+
+    def is_available(self):
+        """False kalau circuit breaker sedang open (gateway baru saja down)."""
+        return not self.client.breaker.is_open
 
     def create_transaction(self, order_id, amount, customer_details=None):
         """
@@ -27,10 +214,17 @@ class PaymentService:
 
         try:
             # Minta Snap Token & URL
-            transaction = self.snap.create_transaction(param)
+            transaction = self.client.create_snap_transaction(param)
             return transaction # Isinya: {'token': '...', 'redirect_url': '...'}
         except Exception as e:
             print(f"Midtrans Error: {e}")
             return None
 
-payment_service = PaymentService()
\ No newline at end of file
+    def get_status(self, order_id):
+        """
+        Panggil Midtrans Status API (GET /v2/{order_id}/status).
+        Raise GatewayUnavailable kalau gateway down.
+        """
+        return self.client.get_status(order_id)
+
+payment_service = PaymentService()
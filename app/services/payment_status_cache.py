@@ -0,0 +1,106 @@
+import threading
+import time
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.consultation import Consultation, Payment
+
+
+class PaymentStatusCache:
+    """
+    Cache status payment untuk polling client setelah membuka payment_url.
+
+    - get(): snapshot {payment_id: ...} disimpan selama TTL. Miss yang datang
+      bersamaan untuk payment yang sama cuma memicu 1 query (yang lain menunggu hasilnya).
+    - invalidate(): dipanggil setelah commit yang mengubah Payment (webhook,
+      rekonsiliasi, sweeper, dll). Sekaligus membangunkan client yang sedang long-poll.
+    - wait(): long-poll -- tunggu sampai status beda dari `since` atau timeout.
+      Selama menunggu tidak ada query dan tidak ada koneksi DB yang dipegang; baru reload
+      kalau di-invalidate atau TTL lewat (jaga-jaga kalau perubahan terjadi di proses/worker lain).
+
+    Catatan: sama seperti presence, kalau multi-worker invalidasi hanya berlaku
+    di proses yang memproses webhook; worker lain mengandalkan TTL.
+    """
+
+    def __init__(self, ttl_seconds=10):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._entries = {}  # {payment_id: (expires_at, snapshot)}
+        self._loading = {}  # {payment_id: threading.Event}
+
+    def _load(self, payment_id):
+        # Koneksi sendiri yang langsung dikembalikan ke pool (bukan db.session):
+        # request long-poll yang menunggu sampai 25 detik tidak boleh memegang koneksi DB.
+        query = (
+            select(
+                Payment.id, Payment.status, Payment.payment_url, Payment.consultation_id,
+                Consultation.patient_id, Consultation.doctor_id, Consultation.expired_at,
+            )
+            .join(Consultation, Consultation.id == Payment.consultation_id)
+            .where(Payment.id == payment_id)
+        )
+        with db.engine.connect() as conn:
+            row = conn.execute(query).first()
+        if row is None:
+            return None
+        return {
+            "payment_id": row.id,
+            "status": row.status,
+            "payment_url": row.payment_url,
+            "consultation_id": row.consultation_id,
+            "patient_id": row.patient_id,
+            "doctor_id": row.doctor_id,
+            "expired_at": row.expired_at.isoformat() if row.expired_at else None,
+        }
+
+    def get(self, payment_id):
+        while True:
+            with self._lock:
+                entry = self._entries.get(payment_id)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+                loading = self._loading.get(payment_id)
+                if loading is None:
+                    loading = self._loading[payment_id] = threading.Event()
+                    break
+            # Request lain sedang query payment yang sama -> tunggu hasilnya saja
+            loading.wait(5)
+
+        try:
+            snapshot = self._load(payment_id)
+            with self._lock:
+                self._entries[payment_id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            return snapshot
+        finally:
+            with self._lock:
+                self._loading.pop(payment_id, None)
+            loading.set()
+
+    def wait(self, payment_id, since=None, timeout=25):
+        """
+        Return snapshot begitu status != since (atau langsung kalau since kosong),
+        atau snapshot terakhir kalau timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self.get(payment_id)
+            remaining = deadline - time.monotonic()
+            if snapshot is None or not since or snapshot["status"] != since or remaining <= 0:
+                return snapshot
+            with self._lock:
+                entry = self._entries.get(payment_id)
+                if entry and entry[1] is snapshot:
+                    # Bangun kalau di-invalidate, atau saat TTL habis (cek ulang ke DB)
+                    self._changed.wait(min(remaining, max(entry[0] - time.monotonic(), 0.05)))
+
+    def invalidate(self, *payment_ids):
+        """Panggil SETELAH commit yang mengubah Payment."""
+        with self._lock:
+            for payment_id in payment_ids:
+                self._entries.pop(payment_id, None)
+            self._changed.notify_all()
+
+
+payment_status_cache = PaymentStatusCache()
@@ -0,0 +1,87 @@
+import threading
+import time
+
+
+class PresenceStore:
+    """
+    Status online user berdasarkan koneksi Socket.IO yang masih hidup.
+    Disimpan di memori proses (tanpa tulis DB):
+    - connect    -> daftarkan sid milik user
+    - heartbeat  -> perbarui waktu terakhir sid terlihat
+    - disconnect -> hapus sid
+
+    User dianggap online kalau punya minimal 1 sid yang heartbeat-nya
+    masih di dalam TTL. TTL ini jaga-jaga kalau event disconnect tidak
+    sempat terkirim (HP putus sinyal, worker restart, dll).
+
+    Catatan: kalau server dijalankan multi-worker, store ini perlu diganti
+    backend bersama (misal Redis) dengan interface yang sama.
+    """
+
+    def __init__(self, ttl_seconds=90):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._sid_user = {}   # {sid: user_id}
+        self._last_seen = {}  # {sid: timestamp}
+        self._user_sids = {}  # {user_id: set(sid)}
+        self._last_prune = time.monotonic()
+
+    def connect(self, user_id, sid):
+        # Sekalian bersih-bersih sid basi, maksimal sekali per TTL
+        if time.monotonic() - self._last_prune > self.ttl_seconds:
+            self.prune()
+        with self._lock:
+            self._sid_user[sid] = user_id
+            self._last_seen[sid] = time.monotonic()
+            self._user_sids.setdefault(user_id, set()).add(sid)
+
+    def heartbeat(self, sid):
+        with self._lock:
+            if sid in self._sid_user:
+                self._last_seen[sid] = time.monotonic()
+
+    def disconnect(self, sid):
+        with self._lock:
+            self._drop_sid(sid)
+
+    def _drop_sid(self, sid):
+        user_id = self._sid_user.pop(sid, None)
+        self._last_seen.pop(sid, None)
+        if user_id is None:
+            return
+        sids = self._user_sids.get(user_id)
+        if sids:
+            sids.discard(sid)
+            if not sids:
+                del self._user_sids[user_id]
+
+    def _alive(self, sid, now):
+        return now - self._last_seen.get(sid, 0) <= self.ttl_seconds
+
+    def is_online(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            return any(self._alive(sid, now) for sid in self._user_sids.get(user_id, ()))
+
+    def online_user_ids(self, user_ids=None):
+        """Set user_id yang online (opsional dibatasi ke user_ids tertentu)."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = self._user_sids.keys() if user_ids is None else user_ids
+            return {
+                uid for uid in candidates
+                if any(self._alive(sid, now) for sid in self._user_sids.get(uid, ()))
+            }
+
+    def prune(self):
+        """Buang sid yang heartbeat-nya sudah lewat TTL. Return jumlah sid yang dibuang."""
+        now = time.monotonic()
+        with self._lock:
+            self._last_prune = now
+            stale = [sid for sid in self._sid_user if not self._alive(sid, now)]
+            for sid in stale:
+                self._drop_sid(sid)
+            return len(stale)
+
+
+presence = PresenceStore()
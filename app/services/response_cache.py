@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, json
+
+
+class LRUBackend:
+    """Cache di memori proses: maks `max_entries` item, yang paling lama tidak dipakai dibuang duluan."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # {key: (expires_at, value)}
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl_seconds):
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl_seconds, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class RedisBackend:
+    """Cache bersama antar worker (opsional, butuh package `redis`)."""
+
+    def __init__(self, url, prefix="resp:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return raw.decode("utf-8") if raw is not None else None
+
+    def set(self, key, value, ttl_seconds):
+        self.client.set(self.prefix + key, value, ex=max(int(ttl_seconds), 1))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    Cache payload JSON endpoint baca (list / detail / pencarian artikel).
+    Key = namespace + versi koleksi + fingerprint request. Versi koleksi naik
+    setiap ada tulis (content_version), jadi entry lama otomatis tidak terpakai
+    lagi -- tidak perlu hapus manual -- dan tersingkir oleh LRU / TTL.
+
+    Lapis 1: LRU di proses. Lapis 2 (opsional): Redis kalau RESPONSE_CACHE_REDIS_URL diisi.
+    Nilai disimpan sebagai string JSON supaya bisa dipakai bersama antar proses.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.ttl_seconds = 300
+        self.local = LRUBackend()
+        self.shared = None
+
+    def init_app(self, app):
+        cfg = app.config
+        self.enabled = cfg.get("RESPONSE_CACHE_ENABLED", True)
+        self.ttl_seconds = cfg.get("RESPONSE_CACHE_TTL_SECONDS", 300)
+        self.local = LRUBackend(cfg.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+        self.shared = None
+        redis_url = cfg.get("RESPONSE_CACHE_REDIS_URL")
+        if redis_url:
+            try:
+                self.shared = RedisBackend(redis_url)
+            except ImportError:
+                print("⚠️ RESPONSE_CACHE_REDIS_URL diisi tapi package redis belum terpasang, pakai cache lokal saja")
+
+    def get_or_build(self, namespace, version, fingerprint, build):
+        """
+        Ambil payload dari cache, atau panggil build() lalu simpan.
+        build() harus return object yang bisa di-JSON-kan.
+        """
+        if not self.enabled:
+            return build()
+
+        key = f"{namespace}:v{version}:{fingerprint}"
+        raw = self.local.get(key)
+        if raw is None and self.shared is not None:
+            raw = self._shared_call("get", key)
+            if raw is not None:
+                self.local.set(key, raw, self.ttl_seconds)
+
+        if raw is None:
+            raw = json.dumps(build())
+            self.local.set(key, raw, self.ttl_seconds)
+            if self.shared is not None:
+                self._shared_call("set", key, raw, self.ttl_seconds)
+
+        return json.loads(raw)
+
+    def _shared_call(self, method, *args):
+        # Redis down tidak boleh bikin endpoint baca ikut error -> fallback ke DB
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception as e:
+            current_app.logger.warning(f"Response cache (redis) gagal: {e}")
+            return None
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self._shared_call("clear")
+
+
+response_cache = ResponseCache()
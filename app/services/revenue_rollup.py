@@ -0,0 +1,131 @@
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, delete
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.consultation import Consultation, Payment
+from app.models.rollup import PaymentDailyRollup as Rollup
+
+
+def payment_bucket(payment, doctor_id=None):
+    """Kunci rollup untuk 1 payment: (day, doctor_id, method, status)."""
+    if doctor_id is None:
+        doctor_id = payment.consultation.doctor_id
+    created = payment.created_at or datetime.utcnow()
+    return (created.date(), doctor_id, payment.payment_method or '', payment.status or 'pending')
+
+
+def _bump(bucket, count_delta, amount_delta):
+    """UPDATE baris rollup secara atomik; INSERT kalau belum ada (tanpa commit)."""
+    day, doctor_id, method, status = bucket
+    where = (
+        (Rollup.day == day) & (Rollup.doctor_id == doctor_id)
+        & (Rollup.payment_method == method) & (Rollup.status == status)
+    )
+    values = {
+        Rollup.payment_count: Rollup.payment_count + count_delta,
+        Rollup.amount_total: Rollup.amount_total + amount_delta,
+        Rollup.updated_at: datetime.utcnow(),
+    }
+    if Rollup.query.filter(where).update(values, synchronize_session=False):
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(Rollup(
+                day=day, doctor_id=doctor_id, payment_method=method, status=status,
+                payment_count=count_delta, amount_total=amount_delta,
+            ))
+    except IntegrityError:
+        # Proses lain baru saja membuat barisnya -> cukup UPDATE
+        Rollup.query.filter(where).update(values, synchronize_session=False)
+
+
+def track_new_payment(payment, doctor_id=None):
+    _bump(payment_bucket(payment, doctor_id), 1, int(payment.amount or 0))
+
+
+def track_payment_change(before, after, amount):
+    """Pindahkan 1 payment dari bucket `before` ke bucket `after` (kalau beda)."""
+    if before == after:
+        return
+    amount = int(amount or 0)
+    _bump(before, -1, -amount)
+    _bump(after, 1, amount)
+
+
+def track_bulk_status_change(rows, new_status):
+    """
+    Untuk UPDATE massal status payment (sweeper). rows berisi kolom
+    created_at, doctor_id, payment_method, status, amount. Delta digabung per bucket.
+    """
+    deltas = {}
+    for r in rows:
+        created = r.created_at or datetime.utcnow()
+        base = (created.date(), r.doctor_id, r.payment_method or '')
+        for bucket, sign in ((base + (r.status or 'pending',), -1), (base + (new_status,), 1)):
+            c, a = deltas.get(bucket, (0, 0))
+            deltas[bucket] = (c + sign, a + sign * int(r.amount or 0))
+    for bucket, (c, a) in deltas.items():
+        if c or a:
+            _bump(bucket, c, a)
+
+
+def rebuild_rollups():
+    """
+    Bangun ulang semua rollup dari payments (1x INSERT ... SELECT ... GROUP BY).
+    Return: jumlah baris rollup.
+    """
+    day = func.date(Payment.created_at)
+    method = func.coalesce(Payment.payment_method, '')
+    status = func.coalesce(Payment.status, 'pending')
+    source = (
+        select(
+            day, Consultation.doctor_id, method, status,
+            func.count(Payment.id), func.coalesce(func.sum(Payment.amount), 0), func.now(),
+        )
+        .select_from(Payment)
+        .join(Consultation, Consultation.id == Payment.consultation_id)
+        .group_by(day, Consultation.doctor_id, method, status)
+    )
+
+    db.session.execute(delete(Rollup))
+    db.session.execute(
+        insert(Rollup).from_select(
+            ["day", "doctor_id", "payment_method", "status", "payment_count", "amount_total", "updated_at"],
+            source,
+        )
+    )
+    db.session.commit()
+
+    total = Rollup.query.count()
+    print(f"📊 Rollup payment dibangun ulang: {total} baris")
+    return total
+
+
+def revenue_series(date_from, date_to, status='success', doctor_id=None, payment_method=None):
+    """
+    Time series harian dari tabel rollup.
+    Biayanya tergantung jumlah hari x dokter x metode, bukan jumlah payment.
+    """
+    query = (
+        db.session.query(
+            Rollup.day,
+            func.sum(Rollup.payment_count),
+            func.sum(Rollup.amount_total),
+        )
+        .filter(Rollup.day >= date_from, Rollup.day <= date_to)
+    )
+    if status:
+        query = query.filter(Rollup.status == status)
+    if doctor_id:
+        query = query.filter(Rollup.doctor_id == doctor_id)
+    if payment_method is not None:
+        query = query.filter(Rollup.payment_method == payment_method)
+
+    rows = query.group_by(Rollup.day).order_by(Rollup.day.asc()).all()
+    return [
+        {"day": str(d), "count": int(c or 0), "amount": int(a or 0)}
+        for d, c, a in rows
+    ]
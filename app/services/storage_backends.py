@@ -0,0 +1,204 @@
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.utils.s3_signing import canonical_query, presign_url, sign_headers
+
+
+class StorageError(Exception):
+    """Operasi ke penyimpanan (S3) gagal."""
+
+
+class LocalStorage:
+    """
+    File di disk lokal (UPLOAD_FOLDER). Key = path relatif di dalam folder itu (ab/cd/<sha256>.jpg).
+    Dilayani nginx lewat X-Accel-Redirect (atau send_file saat development).
+    """
+
+    name = "local"
+    public_base_url = None
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_file(self, key, local_path, content_type=None, move=False):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if move:
+            os.replace(local_path, target)
+        else:
+            shutil.copyfile(local_path, target)
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except OSError:
+            return 0
+
+    def list_objects(self, prefix=""):
+        """(key, waktu modifikasi UTC) semua file di bawah prefix (dipakai GC file yatim)."""
+        base = self.path(prefix) if prefix else self.root
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                try:
+                    modified = datetime.utcfromtimestamp(os.path.getmtime(full))
+                except OSError:
+                    continue  # baru saja dihapus
+                yield os.path.relpath(full, self.root).replace(os.sep, "/"), modified
+
+    def read_head(self, key, length):
+        with open(self.path(key), "rb") as f:
+            return f.read(length)
+
+    @contextmanager
+    def local_copy(self, key):
+        yield self.path(key)
+
+    def presigned_get_url(self, key, expires=None):
+        return None
+
+
+class S3Storage:
+    """
+    Bucket S3 / layanan kompatibel S3 (MinIO, R2, ...) lewat REST API + SigV4.
+    Path-style URL: {endpoint}/{bucket}/{key}, jadi bisa diarahkan ke server lokal saat testing.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket, access_key, secret_key, region="us-east-1", endpoint_url=None,
+                 public_base_url=None, presign_expires=900, timeout=30, pool_size=10):
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.endpoint_url = (endpoint_url or f"https://s3.{region}.amazonaws.com").rstrip("/")
+        # Kalau bucket publik / di belakang CDN: URL langsung tanpa tanda tangan
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.presign_expires = presign_expires
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def object_url(self, key):
+        return f"{self.endpoint_url}/{self.bucket}/{quote(key, safe='/-_.~')}"
+
+    def _request(self, method, key="", headers=None, query=None, **kwargs):
+        url = self.object_url(key) if key else f"{self.endpoint_url}/{self.bucket}"
+        signed = sign_headers(method, url, self.access_key, self.secret_key, self.region,
+                              headers=headers, query=query)
+        if query:
+            url = f"{url}?{canonical_query(query)}"
+        try:
+            return self.session.request(method, url, headers=signed, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise StorageError(f"{method} {key}: {e}") from e
+
+    def put_file(self, key, local_path, content_type=None, move=False):
+        headers = {"content-type": content_type} if content_type else {}
+        with open(local_path, "rb") as body:
+            resp = self._request("PUT", key, headers=headers, data=body)
+        if resp.status_code >= 300:
+            raise StorageError(f"PUT {key}: HTTP {resp.status_code} {resp.text[:200]}")
+        if move:
+            os.remove(local_path)
+
+    def delete(self, key):
+        resp = self._request("DELETE", key)
+        if resp.status_code >= 300 and resp.status_code != 404:
+            raise StorageError(f"DELETE {key}: HTTP {resp.status_code}")
+
+    def exists(self, key):
+        return self._request("HEAD", key).status_code == 200
+
+    def size(self, key):
+        resp = self._request("HEAD", key)
+        return int(resp.headers.get("Content-Length", 0)) if resp.status_code == 200 else 0
+
+    def list_objects(self, prefix=""):
+        """(key, waktu modifikasi UTC) semua object di bawah prefix (ListObjectsV2, per 1000 key)."""
+        token = None
+        while True:
+            query = {"list-type": "2", "prefix": prefix}
+            if token:
+                query["continuation-token"] = token
+            resp = self._request("GET", query=query)
+            if resp.status_code != 200:
+                raise StorageError(f"LIST {prefix}: HTTP {resp.status_code}")
+            root = ET.fromstring(resp.content)
+            ns = root.tag.split("}")[0] + "}" if root.tag.startswith("{") else ""
+            for item in root.iter(f"{ns}Contents"):
+                modified = datetime.strptime(item.findtext(f"{ns}LastModified")[:19], "%Y-%m-%dT%H:%M:%S")
+                yield item.findtext(f"{ns}Key"), modified
+            token = root.findtext(f"{ns}NextContinuationToken")
+            if root.findtext(f"{ns}IsTruncated") != "true" or not token:
+                break
+
+    def read_head(self, key, length):
+        """Byte awal object (Range GET), misal untuk cek header gambar tanpa unduh semuanya."""
+        resp = self._request("GET", key, headers={"range": f"bytes=0-{length - 1}"})
+        if resp.status_code not in (200, 206):
+            raise StorageError(f"GET {key}: HTTP {resp.status_code}")
+        return resp.content[:length]
+
+    @contextmanager
+    def local_copy(self, key):
+        """Unduh object ke file sementara (untuk AI / resize gambar), dihapus setelah dipakai."""
+        resp = self._request("GET", key, stream=True)
+        if resp.status_code != 200:
+            raise StorageError(f"GET {key}: HTTP {resp.status_code}")
+        fd, tmp_path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in resp.iter_content(64 * 1024):
+                    out.write(chunk)
+            yield tmp_path
+        finally:
+            os.remove(tmp_path)
+
+    def presigned_get_url(self, key, expires=None):
+        if self.public_base_url:
+            return f"{self.public_base_url}/{quote(key, safe='/-_.~')}"
+        return presign_url("GET", self.object_url(key), self.access_key, self.secret_key, self.region,
+                           expires=expires or self.presign_expires)
+
+    def presigned_put_url(self, key, headers, expires=None):
+        return presign_url("PUT", self.object_url(key), self.access_key, self.secret_key, self.region,
+                           expires=expires or self.presign_expires, headers=headers)
+
+
+def create_backend(config):
+    """Backend penyimpanan sesuai STORAGE_BACKEND (local / s3)."""
+    if (config.get("STORAGE_BACKEND") or "local").lower() == "s3":
+        return S3Storage(
+            bucket=config["S3_BUCKET"],
+            access_key=config.get("S3_ACCESS_KEY_ID"),
+            secret_key=config.get("S3_SECRET_ACCESS_KEY"),
+            region=config.get("S3_REGION", "us-east-1"),
+            endpoint_url=config.get("S3_ENDPOINT_URL"),
+            public_base_url=config.get("S3_PUBLIC_URL"),
+            presign_expires=config.get("S3_PRESIGN_EXPIRES", 900),
+        )
+    return LocalStorage(config["UPLOAD_FOLDER"])
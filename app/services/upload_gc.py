@@ -0,0 +1,193 @@
+import threading
+from datetime import datetime, timedelta
+
+from app.extensions import db, socketio
+from app.models.image_variant import ImageVariant
+from app.models.upload import UploadBlob, UploadDeletion
+from app.services.upload_store import URL_PREFIX, upload_references, upload_store
+
+# Hapus file yang gagal terus (misal S3 menolak) berhenti dicoba setelah N kali; cek last_error
+MAX_ATTEMPTS = 5
+
+
+def _referenced_by_columns(paths):
+    """Path dari `paths` yang masih dipakai kolom data (artikel, foto profil, dokumen, skrining)."""
+    used = set()
+    for model, column in upload_references():
+        used.update(value for (value,) in db.session.query(column).filter(column.in_(paths)).distinct())
+    return used
+
+
+def paths_in_use(paths, trust_blobs=True):
+    """
+    Path dari `paths` yang tidak boleh dihapus:
+    - dipakai kolom data, atau
+    - varian dari gambar yang masih dipakai, atau
+    - (trust_blobs) masih tercatat di upload_blobs (termasuk upload langsung yang belum di-claim)
+    """
+    paths = list(paths)
+    if not paths:
+        return set()
+    used = _referenced_by_columns(paths)
+
+    variants = (
+        db.session.query(ImageVariant.path, ImageVariant.source_path)
+        .filter(ImageVariant.path.in_(paths))
+        .all()
+    )
+    if trust_blobs:
+        used.update(row.path for row in variants)
+        used.update(value for (value,) in db.session.query(UploadBlob.path).filter(UploadBlob.path.in_(paths)))
+    elif variants:
+        live_sources = _referenced_by_columns({row.source_path for row in variants})
+        used.update(row.path for row in variants if row.source_path in live_sources)
+    return used
+
+
+# ---------- antrian hapus ----------
+def process_upload_deletions(batch_size=500):
+    """
+    Hapus file dari antrian upload_deletions (urut id). Path yang ternyata masih dipakai
+    dilewati; yang gagal dihapus dicoba lagi di run berikutnya (maks MAX_ATTEMPTS).
+    Baris dikunci (FOR UPDATE SKIP LOCKED) sampai commit: upload ulang isi yang sama
+    (upload_store.cancel_queued_deletes) menunggu file selesai dihapus, atau barisnya
+    sudah dikunci upload itu dan dilewati di sini.
+    Return: jumlah file yang dihapus.
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        rows = (
+            UploadDeletion.query
+            .filter(UploadDeletion.id > last_id, UploadDeletion.attempts < MAX_ATTEMPTS)
+            .order_by(UploadDeletion.id.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        paths = {row.path for row in rows}
+        skip = paths_in_use(paths)
+        failed = {}
+        for path in paths - skip:
+            try:
+                upload_store.delete(path)
+                deleted += 1
+            except Exception as e:
+                failed[path] = str(e)[:255]
+
+        # Bulk delete/update: worker lain yang memproses baris yang sama tidak bentrok
+        done_ids = [row.id for row in rows if row.path not in failed]
+        if done_ids:
+            UploadDeletion.query.filter(UploadDeletion.id.in_(done_ids)).delete(synchronize_session=False)
+        for path, message in failed.items():
+            (
+                UploadDeletion.query
+                .filter(UploadDeletion.id.in_([row.id for row in rows if row.path == path]))
+                .update({UploadDeletion.attempts: UploadDeletion.attempts + 1, UploadDeletion.last_error: message},
+                        synchronize_session=False)
+            )
+        db.session.commit()
+
+    if deleted:
+        print(f"🗑️ Upload: {deleted} file dihapus dari antrian")
+    return deleted
+
+
+class UploadDeletionWorker:
+    """
+    1 background task yang mengosongkan antrian hapus. Dibangunkan setelah commit yang
+    mengantrikan file (notify), jadi request tidak ikut menunggu disk / S3.
+    Job periodik (UPLOAD_DELETE_INTERVAL_SECONDS) tetap jalan sebagai jaring pengaman.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def init_app(self, app):
+        self.app = app
+
+    def notify(self):
+        if self.app is None:
+            return
+        self._wake.set()
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        socketio.start_background_task(self._loop)
+
+    def _loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    process_upload_deletions()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"❌ Gagal proses antrian hapus upload: {e}")
+                finally:
+                    db.session.remove()
+
+
+upload_deletion_worker = UploadDeletionWorker()
+
+
+# ---------- GC file yatim ----------
+def collect_orphaned_uploads(grace_seconds=86400, batch_size=500, dry_run=False):
+    """
+    Bandingkan isi penyimpanan upload dengan semua kolom yang menunjuk ke file upload.
+    File yang tidak dipakai siapa pun dan lebih tua dari grace_seconds masuk antrian hapus:
+    sisa record yang dihapus tanpa release, file sementara yang tertinggal, upload langsung
+    yang tidak pernah di-claim, varian dari gambar yang sudah tidak dipakai, dsb.
+    Baris upload_blobs / image_variants milik file yatim ikut dihapus.
+    Return: (jumlah file diperiksa, jumlah file yatim).
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    checked = orphaned = 0
+    batch = []
+
+    def flush():
+        nonlocal orphaned
+        paths = {f"{URL_PREFIX}/{key}" for key in batch}
+        batch.clear()
+        orphans = paths - paths_in_use(paths, trust_blobs=False)
+        if not orphans:
+            return
+        orphaned += len(orphans)
+        if dry_run:
+            for path in sorted(orphans):
+                print(f"   yatim: {path}")
+            return
+        UploadBlob.query.filter(UploadBlob.path.in_(orphans)).delete(synchronize_session=False)
+        ImageVariant.query.filter(
+            ImageVariant.path.in_(orphans) | ImageVariant.source_path.in_(orphans)
+        ).delete(synchronize_session=False)
+        for path in orphans:
+            upload_store.queue_delete(path)
+        db.session.commit()
+
+    for key, modified in upload_store.backend.list_objects():
+        checked += 1
+        if modified > cutoff:
+            continue
+        batch.append(key)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    print(f"🧹 GC upload: {checked} file diperiksa, {orphaned} file yatim{' (dry run)' if dry_run else ''}")
+    return checked, orphaned
@@ -0,0 +1,441 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+import uuid
+
+from flask import current_app, redirect, request, send_from_directory, url_for
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from app.extensions import db
+from app.models.upload import UploadBlob, UploadDeletion
+from app.services.storage_backends import LocalStorage, create_backend
+from app.services.upload_stream import IMAGE_KINDS, UploadRejected, UploadSpool, kinds_for
+from app.utils.image_header import HEADER_LIMIT, InvalidHeader, sniff
+
+# Prefix path di DB / URL (/static/uploads/... dilayani route serve_upload, bukan static folder Flask)
+URL_PREFIX = "static/uploads"
+CHUNK_SIZE = 64 * 1024
+_EXT_ALIASES = {"jpeg": "jpg"}
+_DELETES_QUEUED = "upload_store_deletes_queued"
+_BLOB_KEY_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$")
+
+# Upload langsung ke storage (URL pre-signed) cuma untuk gambar
+DIRECT_UPLOAD_TYPES = {"image/jpeg": "jpg", "image/png": "png"}
+
+
+class DirectUploadError(Exception):
+    """Permintaan / upload_id untuk upload langsung tidak valid."""
+
+
+def is_local_upload(path):
+    """Path upload lokal (static/uploads/...), bukan URL luar seperti foto Google."""
+    return bool(path) and not path.startswith(("http://", "https://"))
+
+
+def upload_references():
+    """Semua kolom yang menyimpan path upload: [(Model, kolom)]."""
+    from app.models.article import Article
+    from app.models.medical import MedicalRecord
+    from app.models.user import User
+
+    return [
+        (Article, Article.image_url),
+        (User, User.profile_image),
+        (User, User.verification_doc),
+        (MedicalRecord, MedicalRecord.eye_image_path),
+        (MedicalRecord, MedicalRecord.nail_image_path),
+    ]
+
+
+def _extension(filename):
+    ext = secure_filename(filename or "").rsplit(".", 1)[-1].lower() if "." in (filename or "") else ""
+    return _EXT_ALIASES.get(ext, ext) or "bin"
+
+
+class UploadStore:
+    """
+    Penyimpanan upload content-addressed di atas backend (disk lokal / bucket S3):
+    - nama file = SHA-256 isi file, disebar ke folder 2 level (ab/cd/<sha256>.jpg)
+      supaya tidak ada 1 folder berisi ratusan ribu file
+    - file yang isinya sama cuma disimpan 1x; tiap pemakai menambah ref_count
+    - release() mengurangi ref_count; kalau sudah tidak dipakai file masuk antrian hapus
+      (upload_deletions) dan dihapus worker background setelah commit
+
+    Perubahan ref_count ikut transaksi pemanggil (tanpa commit di sini).
+    """
+
+    def __init__(self):
+        self.root = None
+        self.backend = None
+        self.accel_prefix = None
+        self.presign_expires = 900
+        self.max_pixels = None
+
+    def init_app(self, app):
+        # root: folder upload lokal (file sementara + file lama yang belum pindah ke S3)
+        self.root = app.config["UPLOAD_FOLDER"]
+        self.backend = create_backend(app.config)
+        self.accel_prefix = app.config.get("UPLOAD_ACCEL_REDIRECT_PREFIX")
+        self.presign_expires = app.config.get("S3_PRESIGN_EXPIRES", 900)
+        self.max_pixels = app.config.get("UPLOAD_MAX_IMAGE_PIXELS")
+        if not event.contains(db.session, "after_commit", _wake_deletion_worker):
+            event.listen(db.session, "after_commit", _wake_deletion_worker)
+            event.listen(db.session, "after_rollback", _forget_queued_deletes)
+
+    @property
+    def is_local(self):
+        return isinstance(self.backend, LocalStorage)
+
+    # ---------- path ----------
+    @staticmethod
+    def key_for(path):
+        """static/uploads/ab/cd/x.jpg -> ab/cd/x.jpg (key di backend)."""
+        prefix = URL_PREFIX + "/"
+        return path[len(prefix):] if path.startswith(prefix) else path
+
+    def absolute_path(self, path):
+        """static/uploads/ab/cd/x.jpg -> path absolut di UPLOAD_FOLDER (disk lokal)."""
+        if path.startswith(URL_PREFIX + "/"):
+            return os.path.join(self.root, *self.key_for(path).split("/"))
+        return os.path.join(current_app.root_path, path)
+
+    @staticmethod
+    def blob_path(sha256, ext):
+        return f"{URL_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}.{ext}"
+
+    def tmp_path(self):
+        tmp_dir = os.path.join(self.root, ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        return os.path.join(tmp_dir, uuid.uuid4().hex)
+
+    def _on_local_disk(self, path):
+        # File lama (sebelum STORAGE_BACKEND=s3) masih dibaca dari disk lokal
+        return self.is_local or os.path.exists(self.absolute_path(path))
+
+    # ---------- simpan ----------
+    def save(self, file_storage):
+        """
+        Simpan 1 file upload (FileStorage). File dari UploadRequest sudah di-hash + dicek
+        header-nya saat diterima (UploadSpool), jadi tinggal dipindah ke path final.
+        Return: path relatif untuk disimpan di DB (static/uploads/...).
+        """
+        stream = file_storage.stream
+        if isinstance(stream, UploadSpool):
+            stream.finish()
+            return self._store_blob(stream.name, stream.sha256, stream.ext, stream.size)
+        kinds = kinds_for(file_storage.filename)
+        if kinds is None:
+            raise UploadRejected("Format file tidak diizinkan")
+        return self.save_stream(stream, kinds)
+
+    def save_stream(self, stream, kinds, refs=1, expected_sha256=None, max_bytes=None):
+        """Simpan isi stream (misal body PUT upload langsung) dengan validasi yang sama seperti form upload."""
+        with UploadSpool(self.tmp_path(), kinds, max_pixels=self.max_pixels, max_bytes=max_bytes) as spool:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+            spool.finish()
+            if expected_sha256 and spool.sha256 != expected_sha256:
+                raise DirectUploadError("Checksum file tidak cocok")
+            return self._store_blob(spool.name, spool.sha256, spool.ext, spool.size, refs=refs)
+
+    def put(self, path, local_path, move=False):
+        """
+        Tulis file ke backend apa adanya di `path` (misal varian gambar).
+        Panggil cancel_queued_deletes([path]) dulu di transaksi yang sama.
+        """
+        self.backend.put_file(self.key_for(path), local_path, mimetypes.guess_type(path)[0], move=move)
+
+    @staticmethod
+    def cancel_queued_deletes(paths):
+        """
+        Batalkan antrian hapus untuk `paths` sebelum file-nya ditulis ulang (misal isi yang sama
+        di-upload lagi setelah dilepas). Tanpa commit: DELETE mengunci barisnya sampai transaksi
+        pemanggil selesai. Worker hapus melewati baris yang terkunci (SKIP LOCKED); kalau worker
+        duluan mengunci, DELETE ini menunggu file lama selesai dihapus -> file baru tidak ikut terhapus.
+        """
+        UploadDeletion.query.filter(UploadDeletion.path.in_(list(paths))).delete(synchronize_session=False)
+
+    def _store_blob(self, local_path, sha256, ext, size, refs=1, move=True):
+        # _add_refs dulu: kalau blob lama sedang dilepas transaksi lain, UPDATE ini menunggu
+        # commit-nya, jadi baris antrian hapus yang dibuatnya sudah terlihat saat put()
+        path = self._add_refs(sha256, refs)
+        if path is None:
+            path = self.blob_path(sha256, ext)
+            self.cancel_queued_deletes([path])
+            self.put(path, local_path, move=move)
+            path = self._insert_blob(sha256, path, size, refs)
+        return path
+
+    def _insert_blob(self, sha256, path, size, refs):
+        try:
+            with db.session.begin_nested():
+                db.session.add(UploadBlob(sha256=sha256, path=path, size_bytes=size, ref_count=refs))
+            return path
+        except IntegrityError:
+            # Upload lain dengan isi sama baru saja tercatat -> cukup tambah ref
+            return self._add_refs(sha256, refs)
+
+    def _add_refs(self, sha256, refs):
+        updated = (
+            UploadBlob.query
+            .filter(UploadBlob.sha256 == sha256)
+            .update({UploadBlob.ref_count: UploadBlob.ref_count + refs}, synchronize_session=False)
+        )
+        if not updated:
+            return None
+        return db.session.query(UploadBlob.path).filter(UploadBlob.sha256 == sha256).scalar()
+
+    # ---------- baca ----------
+    def local_copy(self, path):
+        """Context manager -> path file di disk (backend S3: diunduh dulu ke file sementara)."""
+        if self._on_local_disk(path):
+            return LocalStorage(self.root).local_copy(self.key_for(path))
+        return self.backend.local_copy(self.key_for(path))
+
+    def size(self, path):
+        if self._on_local_disk(path):
+            return LocalStorage(self.root).size(self.key_for(path))
+        return self.backend.size(self.key_for(path))
+
+    def public_url(self, path):
+        """URL untuk client: langsung ke CDN / bucket publik kalau ada, selain itu /static/uploads/..."""
+        if not path:
+            return None
+        if not is_local_upload(path):
+            return path
+        if self.backend.public_base_url and not self._on_local_disk(path):
+            return f"{self.backend.public_base_url}/{self.key_for(path)}"
+        return request.host_url + path
+
+    def serve(self, key):
+        """
+        Response GET /static/uploads/<key> tanpa worker Python ikut mengirim isi file:
+        - backend S3 -> redirect ke bucket / CDN (URL pre-signed kalau bucket privat)
+        - disk lokal + UPLOAD_ACCEL_REDIRECT_PREFIX -> X-Accel-Redirect, nginx yang kirim file
+        - selain itu (development) -> send_from_directory
+        """
+        if not self._on_local_disk(f"{URL_PREFIX}/{key}"):
+            response = redirect(self.backend.presigned_get_url(key), 302)
+            # URL pre-signed ada masa berlakunya -> redirect tidak boleh di-cache lebih lama
+            if self.backend.public_base_url:
+                response.headers["Cache-Control"] = "public, max-age=86400"
+            else:
+                response.headers["Cache-Control"] = f"private, max-age={max(self.presign_expires - 60, 0)}"
+            return response
+
+        if self.accel_prefix:
+            response = current_app.response_class(
+                mimetype=mimetypes.guess_type(key)[0] or "application/octet-stream"
+            )
+            response.headers["X-Accel-Redirect"] = f"{self.accel_prefix.rstrip('/')}/{key}"
+        else:
+            response = send_from_directory(self.root, key)
+        # Nama blob = hash isi -> isi tidak pernah berubah
+        if _BLOB_KEY_RE.match(key):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+    # ---------- upload langsung (pre-signed) ----------
+    def _serializer(self):
+        return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="direct-upload")
+
+    def presign_upload(self, user_id, sha256, size, content_type):
+        """
+        Siapkan upload langsung dari client ke storage (isi file tidak lewat worker Flask).
+        Client kirim SHA-256, ukuran dan content-type dulu; kalau isi yang sama sudah
+        tersimpan (dedup) tidak perlu upload lagi. Return: dict untuk response API.
+        """
+        sha256 = (sha256 or "").lower()
+        if not re.fullmatch(r"[0-9a-f]{64}", sha256):
+            raise DirectUploadError("sha256 tidak valid")
+        if content_type not in DIRECT_UPLOAD_TYPES:
+            raise DirectUploadError("Tipe file harus image/jpeg atau image/png")
+        max_bytes = current_app.config.get("MAX_CONTENT_LENGTH")
+        if not isinstance(size, int) or size <= 0 or (max_bytes and size > max_bytes):
+            raise DirectUploadError("Ukuran file tidak valid / melebihi batas")
+
+        ext = DIRECT_UPLOAD_TYPES[content_type]
+        upload_id = self._serializer().dumps({"sha": sha256, "ext": ext, "size": size, "uid": int(user_id)})
+        result = {"upload_id": upload_id, "expires_in": self.presign_expires}
+
+        if db.session.query(UploadBlob.id).filter(UploadBlob.sha256 == sha256).first():
+            result["exists"] = True
+            return result
+
+        headers = {"Content-Type": content_type, "Content-Length": str(size)}
+        if self.is_local:
+            url = url_for("upload_api.direct_upload", upload_id=upload_id, _external=True)
+        else:
+            # S3 menolak upload kalau checksum isi tidak sama dengan yang ditandatangani
+            headers["x-amz-checksum-sha256"] = base64.b64encode(bytes.fromhex(sha256)).decode()
+            url = self.backend.presigned_put_url(self.key_for(self.blob_path(sha256, ext)), headers)
+        result.update({"exists": False, "method": "PUT", "url": url, "headers": headers})
+        return result
+
+    def read_upload_id(self, upload_id, user_id=None):
+        try:
+            # upload_id tetap bisa dipakai beberapa saat setelah URL upload kedaluwarsa
+            data = self._serializer().loads(upload_id, max_age=self.presign_expires + 3600)
+        except BadSignature:
+            raise DirectUploadError("upload_id tidak valid / kedaluwarsa")
+        if user_id is not None and data["uid"] != int(user_id):
+            raise DirectUploadError("upload_id milik user lain")
+        return data
+
+    def receive_direct(self, upload_id, stream):
+        """Target PUT upload langsung untuk backend lokal. Isi dicek dengan sha256 di upload_id."""
+        data = self.read_upload_id(upload_id)
+        # refs=0: baru dihitung saat upload_id dipakai (claim_upload)
+        return self.save_stream(
+            stream, IMAGE_KINDS, refs=0, expected_sha256=data["sha"], max_bytes=data["size"]
+        )
+
+    def claim_upload(self, upload_id, user_id):
+        """
+        Pakai hasil upload langsung (misal di form skrining): tambah 1 ref ke blob-nya.
+        Return: path relatif untuk disimpan di DB.
+        """
+        data = self.read_upload_id(upload_id, user_id)
+        path = self._add_refs(data["sha"], 1)
+        if path:
+            return path
+        path = self.blob_path(data["sha"], data["ext"])
+        key = self.key_for(path)
+        self.cancel_queued_deletes([path])
+        if not self.backend.exists(key):
+            raise DirectUploadError("File belum di-upload ke storage")
+        # Upload langsung ke S3 tidak lewat UploadSpool -> cek header dari awal object
+        try:
+            fmt, width, height = sniff(self.backend.read_head(key, HEADER_LIMIT), final=True)
+        except InvalidHeader as e:
+            raise DirectUploadError(f"File bukan gambar yang valid: {e}")
+        if fmt not in IMAGE_KINDS or (self.max_pixels and width * height > self.max_pixels):
+            raise DirectUploadError("File bukan gambar JPG/PNG yang valid / resolusi terlalu besar")
+        return self._insert_blob(data["sha"], path, self.backend.size(key), 1)
+
+    # ---------- lepas ----------
+    def release(self, path):
+        """
+        1 pemakai berhenti memakai `path` (gambar diganti / record dihapus).
+        File (+ varian gambarnya) masuk antrian hapus kalau ref_count habis.
+        File lama (sebelum content-addressed) tidak di-share, jadi langsung ikut dihapus.
+        """
+        if not is_local_upload(path):
+            return
+        blob_id = db.session.query(UploadBlob.id).filter(UploadBlob.path == path).scalar()
+        if blob_id is not None:
+            (
+                UploadBlob.query
+                .filter(UploadBlob.id == blob_id, UploadBlob.ref_count > 0)
+                .update({UploadBlob.ref_count: UploadBlob.ref_count - 1}, synchronize_session=False)
+            )
+            freed = (
+                UploadBlob.query
+                .filter(UploadBlob.id == blob_id, UploadBlob.ref_count <= 0)
+                .delete(synchronize_session=False)
+            )
+            if not freed:
+                return
+
+        from app.services.image_variants import delete_variants
+
+        delete_variants(path)
+        self.queue_delete(path)
+
+    def queue_delete(self, path):
+        """
+        Antrikan hapus file (ikut transaksi pemanggil). Worker background menghapusnya
+        setelah commit, kecuali path ternyata masih dipakai (misal di-upload ulang).
+        """
+        db.session.add(UploadDeletion(path=path))
+        db.session.info[_DELETES_QUEUED] = True
+
+    def delete(self, path):
+        if os.path.exists(self.absolute_path(path)):
+            os.remove(self.absolute_path(path))
+        if not self.is_local:
+            self.backend.delete(self.key_for(path))
+
+    # ---------- migrasi file lama ----------
+    def adopt(self, legacy_path, refs):
+        """
+        Pindahkan 1 file lama (static/uploads/<nama> di disk lokal) ke penyimpanan content-addressed
+        dengan `refs` pemakai. File lama masuk antrian hapus. Return path baru / None kalau file hilang.
+        """
+        source = self.absolute_path(legacy_path)
+        if not os.path.exists(source):
+            return None
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        path = self._store_blob(
+            source, digest.hexdigest(), _extension(legacy_path), os.path.getsize(source),
+            refs=refs, move=False,
+        )
+        self.queue_delete(legacy_path)
+        return path
+
+
+def _wake_deletion_worker(session):
+    # after_commit juga terpanggil saat SAVEPOINT (begin_nested) selesai -> tunggu commit terluar
+    if session.in_nested_transaction():
+        return
+    if session.info.pop(_DELETES_QUEUED, False):
+        from app.services.upload_gc import upload_deletion_worker
+
+        upload_deletion_worker.notify()
+
+
+def _forget_queued_deletes(session):
+    if not session.in_nested_transaction():
+        session.info.pop(_DELETES_QUEUED, None)
+
+
+upload_store = UploadStore()
+
+
+def migrate_legacy_uploads(batch_size=200):
+    """
+    Pindahkan semua upload lama (nama flat di static/uploads) ke penyimpanan content-addressed
+    dan perbarui kolom yang menunjuk ke sana. Return: (jumlah file dipindah, jumlah file hilang).
+    """
+    from app.services.image_variants import delete_variants
+
+    moved = missing = 0
+    for model, column in upload_references():
+        skipped = set()
+        while True:
+            query = (
+                db.session.query(column, db.func.count())
+                .filter(column.like(f"{URL_PREFIX}/%"), column.notin_(select(UploadBlob.path)))
+                .group_by(column)
+            )
+            if skipped:
+                query = query.filter(column.notin_(skipped))
+            rows = query.limit(batch_size).all()
+            if not rows:
+                break
+            for legacy_path, refs in rows:
+                new_path = upload_store.adopt(legacy_path, refs)
+                if new_path is None:
+                    skipped.add(legacy_path)
+                    missing += 1
+                    continue
+                delete_variants(legacy_path)
+                model.query.filter(column == legacy_path).update({column: new_path}, synchronize_session=False)
+                moved += 1
+            db.session.commit()
+    print(f"📦 Upload lama: {moved} file dipindah, {missing} file tidak ditemukan")
+    return moved, missing
@@ -0,0 +1,158 @@
+import hashlib
+import os
+
+from flask import Request, flash, redirect, request
+from werkzeug.exceptions import HTTPException
+
+from app.utils.image_header import HEADER_LIMIT, InvalidHeader, sniff
+from app.utils.response import error
+
+# Ekstensi nama file -> jenis isi yang wajib cocok (x.jpg harus benar-benar JPEG/PNG)
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png"}
+DOCUMENT_EXTENSIONS = {"pdf"}
+IMAGE_KINDS = {"jpeg", "png"}
+_EXTENSIONS = {"jpeg": "jpg", "png": "png", "pdf": "pdf"}
+
+
+class UploadRejected(HTTPException):
+    """File upload ditolak saat masih di-stream (isi tidak valid / terlalu besar)."""
+
+    code = 400
+
+    def __init__(self, description, code=400):
+        super().__init__(description)
+        self.code = code
+
+
+def kinds_for(filename):
+    """Jenis isi yang diterima untuk nama file ini; None = bukan file yang divalidasi di sini."""
+    ext = filename.rsplit(".", 1)[-1].lower() if filename and "." in filename else ""
+    if ext in IMAGE_EXTENSIONS:
+        return IMAGE_KINDS
+    if ext in DOCUMENT_EXTENSIONS:
+        return IMAGE_KINDS | {"pdf"}
+    return None
+
+
+class UploadSpool:
+    """
+    Tujuan tulis 1 file upload: langsung ke folder sementara penyimpanan upload, sambil
+    di-hash (SHA-256) dan dicek header-nya dari chunk pertama. File yang bukan gambar /
+    dimensinya kebesaran ditolak sebelum sisa body dibaca. Setelah lolos, upload_store
+    tinggal memindahkan file ini ke path final (tanpa salinan kedua).
+    """
+
+    def __init__(self, path, kinds, max_pixels=None, max_bytes=None):
+        self.name = path
+        self.kinds = kinds
+        self.max_pixels = max_pixels
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.format = self.width = self.height = None
+        self._head = b""
+        self._digest = hashlib.sha256()
+        self._file = open(path, "w+b")
+
+    # ---------- validasi ----------
+    def _check(self, result):
+        fmt, width, height = result
+        if fmt not in self.kinds:
+            raise UploadRejected("Isi file tidak sesuai format yang diizinkan")
+        if self.max_pixels and width and width * height > self.max_pixels:
+            raise UploadRejected(f"Resolusi gambar terlalu besar ({width}x{height})", 413)
+        self.format, self.width, self.height = fmt, width, height
+        self._head = b""
+
+    def _sniff(self, final=False):
+        try:
+            result = sniff(self._head, final=final)
+        except InvalidHeader as e:
+            raise UploadRejected(f"File bukan gambar/dokumen yang valid: {e}")
+        if result:
+            self._check(result)
+
+    def write(self, data):
+        self.size += len(data)
+        try:
+            if self.max_bytes and self.size > self.max_bytes:
+                raise UploadRejected("Ukuran file melebihi batas", 413)
+            if self.format is None:
+                self._head += data[:HEADER_LIMIT]
+                self._sniff()
+        except UploadRejected:
+            # werkzeug belum memegang file ini -> bersihkan sendiri
+            self.close()
+            raise
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def finish(self):
+        """Dipanggil sebelum file dipakai: file pendek yang header-nya belum lengkap ditolak di sini."""
+        if self.format is None:
+            self._sniff(final=True)
+        self._file.flush()
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    @property
+    def ext(self):
+        return _EXTENSIONS[self.format]
+
+    # ---------- file-like (dipakai werkzeug / FileStorage) ----------
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def readline(self, *args):
+        return self._file.readline(*args)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def close(self):
+        """Tutup + hapus file sementara kalau belum dipindah ke penyimpanan."""
+        self._file.close()
+        try:
+            os.remove(self.name)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class UploadRequest(Request):
+    """Request Flask yang menulis file upload gambar/PDF ke UploadSpool, bukan file temp biasa."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        from app.services.upload_store import upload_store
+
+        kinds = kinds_for(filename)
+        if kinds is None or upload_store.root is None:
+            # Ekstensi lain tetap ditolak oleh cek ekstensi di route
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return UploadSpool(upload_store.tmp_path(), kinds, max_pixels=upload_store.max_pixels)
+
+
+def _handle_rejected(e):
+    if request.path.startswith("/api/"):
+        return error(e.description, e.code)
+    # Halaman web: kembali ke form dengan pesan
+    flash(e.description, "danger")
+    return redirect(request.referrer or request.path)
+
+
+def init_upload_requests(app):
+    """Pakai UploadRequest + handler UploadRejected (dipanggil dari create_app)."""
+    app.request_class = UploadRequest
+    app.register_error_handler(UploadRejected, _handle_rejected)
@@ -0,0 +1,194 @@
+import csv
+import os
+from datetime import datetime
+
+from flask import current_app
+
+from app.extensions import db
+from app.models.user import User
+from app.models.withdrawal import Withdrawal, WithdrawalBatch
+from app.services.ledger_service import debit_withdrawals
+
+PAYOUT_COLUMNS = ["reference", "withdrawal_id", "doctor_id", "doctor_name", "bank_name", "account_number", "amount"]
+
+
+def claim_withdrawal_batch(max_items=500):
+    """
+    Transaksi 1: buat batch baru lalu klaim withdrawal 'pending'
+    (UPDATE ... WHERE status = 'pending'), jadi 2 proses tidak bisa
+    mengambil withdrawal yang sama. Return batch_id atau None kalau kosong.
+    """
+    ids = [
+        wid for (wid,) in
+        Withdrawal.query
+        .with_entities(Withdrawal.id)
+        .filter(Withdrawal.status == 'pending')
+        .order_by(Withdrawal.id.asc())
+        .limit(max_items)
+        .all()
+    ]
+    if not ids:
+        return None
+
+    batch = WithdrawalBatch(status='claimed')
+    db.session.add(batch)
+    db.session.flush()
+
+    claimed = (
+        Withdrawal.query
+        .filter(Withdrawal.id.in_(ids), Withdrawal.status == 'pending')
+        .update({Withdrawal.status: 'processing', Withdrawal.batch_id: batch.id}, synchronize_session=False)
+    )
+    if not claimed:
+        db.session.rollback()
+        return None
+
+    batch.item_count = claimed
+    db.session.commit()
+    return batch.id
+
+
+def post_withdrawal_batch(batch_id):
+    """
+    Transaksi 2 (semua atau tidak sama sekali):
+    - batch 'claimed' -> 'posted' (UPDATE bersyarat: cuma 1 proses yang menang)
+    - cek saldo per dokter, withdrawal yang melebihi saldo ditolak
+    - ledger + saldo: 1x INSERT multi-row + 1x UPDATE users untuk seluruh batch
+    - withdrawal ditandai 'processed' / 'rejected'
+    Kalau proses mati di tengah, semuanya rollback dan batch tetap 'claimed'
+    sehingga aman diulang. Return ringkasan (dict) atau None kalau batch sudah diproses.
+    """
+    now = datetime.utcnow()
+    won = (
+        WithdrawalBatch.query
+        .filter(WithdrawalBatch.id == batch_id, WithdrawalBatch.status == 'claimed')
+        .update({WithdrawalBatch.status: 'posted', WithdrawalBatch.posted_at: now}, synchronize_session=False)
+    )
+    if won != 1:
+        db.session.rollback()
+        return None
+
+    items = (
+        Withdrawal.query
+        .filter(Withdrawal.batch_id == batch_id, Withdrawal.status == 'processing')
+        .order_by(Withdrawal.id.asc())
+        .all()
+    )
+
+    # Kunci baris saldo dokter di batch ini (urut id supaya tidak deadlock).
+    # Kredit dari webhook cuma menunggu sebentar; debit dari batch lain tidak bisa overdraft.
+    doctor_ids = sorted({w.doctor_id for w in items})
+    available = {
+        uid: int(balance or 0) for uid, balance in
+        db.session.query(User.id, User.balance)
+        .filter(User.id.in_(doctor_ids))
+        .order_by(User.id.asc())
+        .with_for_update()
+        .all()
+    }
+
+    accepted, rejected = [], {}
+    for w in items:
+        amount = int(w.amount or 0)
+        if amount <= 0:
+            rejected.setdefault("Nominal tidak valid", []).append(w.id)
+        elif amount > available.get(w.doctor_id, 0):
+            rejected.setdefault("Saldo tidak cukup", []).append(w.id)
+        else:
+            available[w.doctor_id] -= amount
+            accepted.append(w)
+
+    debit_withdrawals(accepted)
+
+    if accepted:
+        Withdrawal.query.filter(Withdrawal.id.in_([w.id for w in accepted])).update(
+            {Withdrawal.status: 'processed', Withdrawal.processed_at: now}, synchronize_session=False
+        )
+    for reason, ids in rejected.items():
+        Withdrawal.query.filter(Withdrawal.id.in_(ids)).update(
+            {Withdrawal.status: 'rejected', Withdrawal.processed_at: now, Withdrawal.failure_reason: reason},
+            synchronize_session=False,
+        )
+
+    batch = WithdrawalBatch.query.get(batch_id)
+    batch.item_count = len(accepted)
+    batch.total_amount = sum(int(w.amount) for w in accepted)
+    batch.rejected_count = sum(len(ids) for ids in rejected.values())
+    batch.payout_file = payout_filename(batch_id)
+    db.session.commit()
+
+    export_payout_file(batch_id)
+    print(f"🏦 Batch penarikan #{batch_id}: {batch.item_count} diproses (Rp {batch.total_amount}), {batch.rejected_count} ditolak")
+    return {
+        "batch_id": batch_id,
+        "processed": batch.item_count,
+        "rejected": batch.rejected_count,
+        "total_amount": batch.total_amount,
+        "payout_file": batch.payout_file,
+    }
+
+
+def payout_filename(batch_id):
+    return f"payout_batch_{batch_id:06d}.csv"
+
+
+def export_payout_file(batch_id, directory=None):
+    """
+    Tulis file payout (CSV) untuk batch yang sudah 'posted'.
+    Isinya diambil ulang dari DB, jadi bisa dibuat ulang kapan saja dengan hasil sama.
+    Return: path file.
+    """
+    directory = directory or current_app.config["PAYOUT_EXPORT_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, payout_filename(batch_id))
+
+    rows = (
+        db.session.query(
+            Withdrawal.id, Withdrawal.doctor_id, User.full_name,
+            Withdrawal.bank_name, Withdrawal.account_number, Withdrawal.amount,
+        )
+        .join(User, User.id == Withdrawal.doctor_id)
+        .filter(Withdrawal.batch_id == batch_id, Withdrawal.status == 'processed')
+        .order_by(Withdrawal.id.asc())
+        .all()
+    )
+
+    # Tulis ke file sementara lalu rename, supaya tidak ada file setengah jadi
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(PAYOUT_COLUMNS)
+        for wid, doctor_id, name, bank, account, amount in rows:
+            writer.writerow([f"WD{wid}", wid, doctor_id, name or "", bank, account, amount])
+    os.replace(tmp_path, path)
+    return path
+
+
+def process_withdrawals(max_items=500, max_batches=10):
+    """
+    Jalankan pipeline penarikan:
+    1. lanjutkan batch 'claimed' yang tertinggal (proses sebelumnya mati)
+    2. klaim + bukukan withdrawal pending, maks `max_batches` batch
+    Return: list ringkasan per batch.
+    """
+    results = []
+    leftover = (
+        WithdrawalBatch.query
+        .with_entities(WithdrawalBatch.id)
+        .filter(WithdrawalBatch.status == 'claimed')
+        .order_by(WithdrawalBatch.id.asc())
+        .all()
+    )
+    for (batch_id,) in leftover:
+        summary = post_withdrawal_batch(batch_id)
+        if summary:
+            results.append(summary)
+
+    for _ in range(max_batches):
+        batch_id = claim_withdrawal_batch(max_items)
+        if not batch_id:
+            break
+        summary = post_withdrawal_batch(batch_id)
+        if summary:
+            results.append(summary)
+    return results
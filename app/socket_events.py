@@ -1,25 +1,139 @@
 from flask_socketio import join_room, leave_room
+from flask_jwt_extended import decode_token
+from flask_login import current_user
 from app.extensions import socketio
+from app.services.chat_service import store_chat_message, message_payload, broadcast_message
+from app.services.presence_service import presence
+from app.services.consultation_access import consultation_access, parse_consultation_room
+from app.services.chat_batcher import chat_batcher
 from flask import request
 
+# Identitas per koneksi: {sid: user_id}
+# Diisi SEKALI saat connect, jadi event berikutnya tidak perlu decode JWT lagi
+_connections = {}
+
+
+def _token_from_handshake(auth):
+    """
+    Ambil JWT dari handshake socket:
+    - io(url, {auth: {token: '...'}})
+    - io(url + '?token=...')
+    - header Authorization: Bearer ...
+    """
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    if request.args.get('token'):
+        return request.args.get('token')
+    h = request.headers.get('Authorization', '')
+    if h.startswith('Bearer '):
+        return h.split(' ', 1)[1].strip()
+    return None
+
+
+def _resolve_user_id(auth):
+    """JWT (mobile) dulu, kalau tidak ada pakai session Flask-Login (web dokter)."""
+    token = _token_from_handshake(auth)
+    if token:
+        try:
+            return int(decode_token(token)['sub'])
+        except Exception:
+            return None
+    if current_user and current_user.is_authenticated:
+        return current_user.id
+    return None
+
+
 # 1. Saat ada HP/Browser yang connect ke Socket
+# Wajib login: JWT (mobile) atau session web. Tanpa identitas -> koneksi ditolak.
 @socketio.on('connect')
-def handle_connect():
-    print(f"⚡ Client Connected: {request.sid}")
+def handle_connect(auth=None):
+    user_id = _resolve_user_id(auth)
+    if not user_id:
+        print(f"⛔ Client ditolak (tanpa token): {request.sid}")
+        return False
+
+    _connections[request.sid] = user_id
+    presence.connect(user_id, request.sid)
+    print(f"⚡ Client Connected: {request.sid} (user: {user_id})")
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    _connections.pop(request.sid, None)
+    presence.disconnect(request.sid)
+    print(f"🔌 Client Disconnected: {request.sid}")
+
+# Frontend kirim 'heartbeat' berkala (misal tiap 30 detik) selama app terbuka
+# supaya status online tetap segar walau disconnect tidak sempat terkirim
+@socketio.on('heartbeat')
+def handle_heartbeat(data=None):
+    presence.heartbeat(request.sid)
 
 # 2. Saat User masuk ke halaman chat konsultasi tertentu
 # Frontend harus kirim event 'join' dengan data {'room': 'consultation_1'}
+# Hanya pasien/dokter dari konsultasi itu yang boleh masuk (dicek dari cache, bukan query per join)
 @socketio.on('join')
 def handle_join(data):
-    room = data.get('room')
-    if room:
-        join_room(room)
-        print(f"➡️ Client {request.sid} masuk ke room: {room}")
+    room = (data or {}).get('room')
+    user_id = _connections.get(request.sid)
+    consultation_id = parse_consultation_room(room)
+
+    if not user_id or consultation_id is None:
+        return {"status": "error", "message": "Room tidak valid", "code": 400}
+
+    if not consultation_access.can_join(user_id, consultation_id):
+        print(f"⛔ Client {request.sid} (user {user_id}) ditolak masuk room: {room}")
+        return {"status": "error", "message": "Akses ditolak", "code": 403}
+
+    join_room(room)
+    print(f"➡️ Client {request.sid} masuk ke room: {room}")
+    return {"status": "ok", "room": room}
 
 # 3. Saat User keluar dari halaman chat
 @socketio.on('leave')
 def handle_leave(data):
-    room = data.get('room')
+    room = (data or {}).get('room')
     if room:
         leave_room(room)
-        print(f"⬅️ Client {request.sid} keluar dari room: {room}")
\ No newline at end of file
+        print(f"⬅️ Client {request.sid} keluar dari room: {room}")
+
+# 4. Kirim pesan lewat socket (pengganti POST /api/consultation/send)
+# Frontend: socket.emit('send_message', {consultation_id: 1, message: 'halo'}, (ack) => ...)
+# Ack: {'status': 'ok', 'id': <id pesan>, ...} atau {'status': 'error', 'message': ..., 'code': ...}
+@socketio.on('send_message')
+def handle_send_message(data):
+    user_id = _connections.get(request.sid)
+    if not user_id:
+        return {"status": "error", "message": "Unauthorized", "code": 401}
+
+    data = data or {}
+    new_chat, err_msg, err_code = store_chat_message(
+        user_id, data.get('consultation_id'), data.get('message')
+    )
+    if err_msg:
+        return {"status": "error", "message": err_msg, "code": err_code}
+
+    broadcast_message(new_chat)
+
+    ack = message_payload(new_chat)
+    ack["status"] = "ok"
+    ack["is_me"] = True
+    return ack
+
+# 5. Tandai pesan sudah dibaca (read receipt)
+# Frontend: socket.emit('mark_read', {consultation_id: 1, message_ids: [10, 11]})
+# Ditampung lalu di-UPDATE sekaligus; lawan bicara dapat event 'messages_read'
+@socketio.on('mark_read')
+def handle_mark_read(data):
+    user_id = _connections.get(request.sid)
+    data = data or {}
+    consultation_id = data.get('consultation_id')
+    message_ids = data.get('message_ids') or []
+
+    if not user_id or not isinstance(consultation_id, int) or not isinstance(message_ids, list):
+        return {"status": "error", "message": "Data tidak lengkap", "code": 400}
+
+    if not consultation_access.can_join(user_id, consultation_id):
+        return {"status": "error", "message": "Akses ditolak", "code": 403}
+
+    chat_batcher.mark_read(consultation_id, user_id, message_ids)
+    return {"status": "ok"}
@@ -0,0 +1,45 @@
+import hashlib
+
+from flask import current_app, request
+
+
+def request_fingerprint():
+    """Hash host + path + query (urut), untuk ETag / key cache respons."""
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return hashlib.sha1(f"{request.host_url}|{request.path}|{params}".encode()).hexdigest()[:16]
+
+
+def is_not_modified(etag, last_modified=None):
+    """
+    Cek conditional GET (If-None-Match / If-Modified-Since) SEBELUM query + serialisasi.
+    If-None-Match diutamakan kalau dikirim client (sesuai RFC 9110).
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def not_modified_response(etag, last_modified=None):
+    response = current_app.response_class(status=304)
+    return apply_cache_headers(response, etag, last_modified)
+
+
+def apply_cache_headers(response, etag, last_modified=None):
+    """
+    ETag + Last-Modified + Cache-Control untuk endpoint publik:
+    - max-age (browser/app) kecil -> selalu revalidasi, tapi dapat 304 murah
+    - s-maxage untuk reverse proxy (nginx/CDN) + stale-while-revalidate
+    """
+    cfg = current_app.config
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = cfg.get("PUBLIC_CACHE_MAX_AGE", 0)
+    response.cache_control.s_maxage = cfg.get("PUBLIC_CACHE_S_MAXAGE", 30)
+    swr = cfg.get("PUBLIC_CACHE_STALE_WHILE_REVALIDATE", 60)
+    if swr:
+        response.cache_control.stale_while_revalidate = swr
+    return response
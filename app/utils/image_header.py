@@ -0,0 +1,79 @@
+import struct
+
+# Cukup baca awal file untuk tahu format + dimensi (tanpa decode gambar).
+# JPEG bisa membawa EXIF / profil warna besar sebelum header SOF -> batas agak longgar.
+HEADER_LIMIT = 512 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SOI = b"\xff\xd8\xff"
+PDF_MAGIC = b"%PDF-"
+
+# Marker SOF (Start Of Frame) JPEG yang berisi dimensi; C4/C8/CC bukan SOF
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Marker tanpa panjang segmen
+_JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
+
+
+class InvalidHeader(ValueError):
+    """Isi file bukan format yang diizinkan / header rusak."""
+
+
+def _png(head):
+    if len(head) < 24:
+        return None
+    if head[12:16] != b"IHDR":
+        raise InvalidHeader("Header PNG rusak")
+    width, height = struct.unpack(">II", head[16:24])
+    return "png", width, height
+
+
+def _jpeg(head):
+    i = 2
+    while True:
+        # Cari marker berikutnya (boleh ada byte 0xFF pengisi)
+        while i < len(head) and head[i] == 0xFF:
+            i += 1
+        if i >= len(head):
+            return None
+        marker = head[i]
+        i += 1
+        if marker in _JPEG_STANDALONE:
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / SOS sebelum SOF -> tidak ada dimensi
+            raise InvalidHeader("Header JPEG tanpa dimensi")
+        if i + 2 > len(head):
+            return None
+        (length,) = struct.unpack(">H", head[i:i + 2])
+        if length < 2:
+            raise InvalidHeader("Segmen JPEG rusak")
+        if marker in _JPEG_SOF:
+            if i + 7 > len(head):
+                return None
+            height, width = struct.unpack(">HH", head[i + 3:i + 7])
+            return "jpeg", width, height
+        i += length
+        if i < len(head) and head[i] != 0xFF:
+            raise InvalidHeader("Segmen JPEG rusak")
+
+
+def sniff(head, final=False):
+    """
+    Kenali file dari byte awalnya: ("jpeg" | "png", lebar, tinggi) atau ("pdf", None, None).
+    Return None kalau butuh byte lebih banyak (kecuali final=True -> dianggap rusak).
+    Raise InvalidHeader kalau bukan JPEG / PNG / PDF atau header rusak.
+    """
+    result = None
+    if head.startswith(PNG_SIGNATURE):
+        result = _png(head)
+    elif head.startswith(JPEG_SOI):
+        result = _jpeg(head)
+    elif head.startswith(PDF_MAGIC):
+        result = "pdf", None, None
+    elif len(head) >= 8 or final:
+        raise InvalidHeader("Format file tidak dikenali")
+
+    if result is None and (final or len(head) >= HEADER_LIMIT):
+        raise InvalidHeader("Header file tidak lengkap")
+    if result and result[0] != "pdf" and (not result[1] or not result[2]):
+        raise InvalidHeader("Dimensi gambar tidak valid")
+    return result
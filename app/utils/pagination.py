@@ -0,0 +1,80 @@
+import base64
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(created_at, row_id):
+    """(created_at, id) -> string aman untuk URL."""
+    raw = f"{created_at.isoformat() if created_at else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Kebalikan encode_cursor. Cursor rusak -> None (dianggap halaman pertama)."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_raw, id_raw = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return (datetime.fromisoformat(created_raw) if created_raw else None), int(id_raw)
+    except Exception:
+        return None
+
+
+def keyset_page(query, created_col, id_col, cursor=None, limit=50, key=None):
+    """
+    Keyset pagination urut (created_at DESC, id DESC).
+    Tidak pakai OFFSET, jadi halaman ke-1000 sama murahnya dengan halaman pertama
+    (selama ada index di (created_at, id)).
+    `key(row)` -> (created_at, id) dari 1 baris hasil; default ambil atribut
+    dengan nama kolom yang sama (cocok untuk query 1 model / with_entities).
+    Return: (rows, next_cursor) -- next_cursor None kalau sudah halaman terakhir.
+    """
+    key = key or (lambda row: (getattr(row, created_col.key), getattr(row, id_col.key)))
+
+    decoded = decode_cursor(cursor)
+    if decoded:
+        c_at, c_id = decoded
+        query = query.filter(or_(
+            created_col < c_at,
+            and_(created_col == c_at, id_col < c_id),
+        ))
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*key(rows[-1]))
+    return rows, next_cursor
+
+
+class CountCache:
+    """
+    Cache COUNT(*) per kombinasi filter selama `ttl_seconds`.
+    Total di header tabel admin tidak perlu presisi per detik,
+    tapi COUNT di tabel besar mahal kalau dihitung tiap buka halaman.
+    """
+
+    def __init__(self, ttl_seconds=60, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # {key: (expires_at, count)}
+
+    def get_or_count(self, key, count_fn):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        count = count_fn()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (now + self.ttl_seconds, count)
+        return count
@@ -1,18 +1,21 @@
 from flask import jsonify
 
-def response(status_code, message, data=None):
+def response(status_code, message, data=None, meta=None):
     """
     Format standar respon API
+    meta (opsional): info tambahan di luar data, misal cursor halaman berikutnya
     """
     res_structure = {
         "status": status_code,
         "message": message,
         "data": data
     }
+    if meta is not None:
+        res_structure["meta"] = meta
     return jsonify(res_structure), status_code
 
-def success(data=None, message="Success", status_code=200):
-    return response(status_code, message, data)
+def success(data=None, message="Success", status_code=200, meta=None):
+    return response(status_code, message, data, meta)
 
 def error(message="Something went wrong", status_code=400, data=None):
     return response(status_code, message, data)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import hashlib
+import hmac
+from datetime import datetime
+from urllib.parse import quote, urlsplit
+
+# AWS Signature Version 4 (dipakai S3 dan layanan kompatibel: MinIO, R2, Spaces, ...)
+ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+def _hmac(key, msg):
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _signing_key(secret_key, date_stamp, region, service):
+    k_date = _hmac(("AWS4" + secret_key).encode("utf-8"), date_stamp)
+    k_region = _hmac(k_date, region)
+    k_service = _hmac(k_region, service)
+    return _hmac(k_service, "aws4_request")
+
+
+def canonical_query(params):
+    return "&".join(
+        f"{quote(str(k), safe='-_.~')}={quote(str(v), safe='-_.~')}"
+        for k, v in sorted(params.items())
+    )
+
+
+def _signature(method, url, query, headers, payload_hash, secret_key, amz_date, scope, region, service):
+    parts = urlsplit(url)
+    canonical_headers = "".join(f"{k}:{' '.join(str(v).split())}\n" for k, v in sorted(headers.items()))
+    signed_headers = ";".join(sorted(headers))
+    canonical_request = "\n".join([
+        method,
+        parts.path or "/",  # url sudah di-encode pemanggil (jangan double-encode)
+        canonical_query(query),
+        canonical_headers,
+        signed_headers,
+        payload_hash,
+    ])
+    string_to_sign = "\n".join([
+        ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+    ])
+    key = _signing_key(secret_key, amz_date[:8], region, service)
+    return hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest(), signed_headers
+
+
+def _host(url):
+    return urlsplit(url).netloc
+
+
+def sign_headers(method, url, access_key, secret_key, region, headers=None, query=None,
+                 payload_hash=UNSIGNED_PAYLOAD, service="s3", now=None):
+    """
+    Header Authorization untuk 1 request. `url` tanpa query string; query dikirim terpisah
+    lewat `query` (URL final = url + "?" + canonical_query(query)).
+    Return: dict header yang harus dikirim (termasuk header tambahan dari `headers`).
+    """
+    now = now or datetime.utcnow()
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    scope = f"{amz_date[:8]}/{region}/{service}/aws4_request"
+
+    signed = {k.lower(): v for k, v in (headers or {}).items()}
+    signed.update({"host": _host(url), "x-amz-date": amz_date, "x-amz-content-sha256": payload_hash})
+    signature, signed_headers = _signature(
+        method, url, query or {}, signed, payload_hash, secret_key, amz_date, scope, region, service
+    )
+    result = {k: v for k, v in signed.items() if k != "host"}
+    result["authorization"] = (
+        f"{ALGORITHM} Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}"
+    )
+    return result
+
+
+def presign_url(method, url, access_key, secret_key, region, expires=900, headers=None,
+                service="s3", now=None):
+    """
+    URL pre-signed (auth di query string). Header di `headers` ikut ditandatangani,
+    jadi client WAJIB mengirim header yang sama persis (misal content-type, checksum).
+    """
+    now = now or datetime.utcnow()
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    scope = f"{amz_date[:8]}/{region}/{service}/aws4_request"
+
+    signed = {k.lower(): v for k, v in (headers or {}).items()}
+    signed["host"] = _host(url)
+    query = {
+        "X-Amz-Algorithm": ALGORITHM,
+        "X-Amz-Credential": f"{access_key}/{scope}",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(int(expires)),
+        "X-Amz-SignedHeaders": ";".join(sorted(signed)),
+    }
+    signature, _ = _signature(
+        method, url, query, signed, UNSIGNED_PAYLOAD, secret_key, amz_date, scope, region, service
+    )
+    return f"{url}?{canonical_query(query)}&X-Amz-Signature={signature}"
@@ -0,0 +1,96 @@
+import re
+
+# Tokenizer + stemmer ringan Bahasa Indonesia untuk pencarian artikel.
+# Bukan stemmer lengkap (Nazief-Adriani / Sastrawi), cukup untuk menyamakan
+# bentuk kata umum: "kesehatan", "menyehatkan", "sehatnya" -> "sehat".
+# Yang penting konsisten: dokumen dan query diproses dengan fungsi yang sama.
+
+_TOKEN_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+
+STOPWORDS = {
+    "ada", "adalah", "agar", "akan", "aku", "anda", "apa", "atau", "bagi", "bahwa",
+    "banyak", "beberapa", "belum", "bisa", "boleh", "dalam", "dan", "dapat", "dari",
+    "dengan", "di", "dia", "hal", "hanya", "harus", "ini", "itu", "jadi", "jika",
+    "juga", "kalau", "kami", "kamu", "karena", "ke", "kita", "lebih", "maka", "mereka",
+    "namun", "oleh", "pada", "para", "perlu", "saat", "saja", "sangat", "sebagai",
+    "secara", "sedang", "sehingga", "sekali", "seperti", "serta", "setelah", "sudah",
+    "tanpa", "tapi", "telah", "tentang", "tersebut", "tetapi", "tidak", "untuk",
+    "yaitu", "yang",
+}
+
+MIN_STEM_LENGTH = 3
+
+_PARTICLES = ("lah", "kah", "tah", "pun")
+_POSSESSIVES = ("nya", "ku", "mu")
+_SUFFIXES = ("kan", "an", "i")
+_VOWELS = "aiueo"
+
+
+def _strip_suffix(word, suffixes, min_length=MIN_STEM_LENGTH):
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_length:
+            return word[:-len(suffix)]
+    return word
+
+
+def _strip_prefix(word):
+    """
+    Buang 1 awalan (+ peluluhan huruf awal: menulis -> tulis, menyapu -> sapu).
+    Return tuple kandidat kata dasar. meng-/peng- + vokal ambigu tanpa kamus:
+    kata dasar bisa berawalan vokal (mengobati -> obat) atau k yang luluh
+    (mengonsumsi -> konsumsi), jadi dua-duanya dikembalikan.
+    """
+    if len(word) <= MIN_STEM_LENGTH + 1:
+        return (word,)
+
+    for prefix in ("meng", "peng"):
+        if word.startswith(prefix) and word[4:5] in _VOWELS:
+            return (word[4:], "k" + word[4:])
+    for prefix in ("meny", "peny"):
+        if word.startswith(prefix) and word[4:5] in _VOWELS:
+            return ("s" + word[4:],)
+    for prefix in ("mem", "pem"):
+        if word.startswith(prefix):
+            rest = word[3:]
+            return (("p" + rest) if rest[:1] in _VOWELS else rest,)
+    for prefix in ("men", "pen"):
+        if word.startswith(prefix):
+            rest = word[3:]
+            return (("t" + rest) if rest[:1] in _VOWELS else rest,)
+    for prefix in ("ber", "ter", "per", "me", "pe", "be", "di", "ke", "se"):
+        # sisa minimal 4 huruf supaya kata dasar seperti "sehat"/"besar" tidak terpotong
+        if word.startswith(prefix) and len(word) - len(prefix) >= MIN_STEM_LENGTH + 1:
+            return (word[len(prefix):],)
+    return (word,)
+
+
+def stems(word):
+    """Semua kandidat stem 1 kata (huruf kecil); biasanya 1, 2 untuk meng-/peng- + vokal."""
+    if len(word) <= MIN_STEM_LENGTH or word.isdigit():
+        return (word,)
+    word = _strip_suffix(word, _PARTICLES)
+    word = _strip_suffix(word, _POSSESSIVES)
+    # akhiran derivasi hanya dibuang kalau kata masih cukup panjang ("gizi" tetap "gizi")
+    return tuple(
+        _strip_suffix(stripped, _SUFFIXES, min_length=MIN_STEM_LENGTH + 1)
+        for stripped in _strip_prefix(word)
+    )
+
+
+def stem(word):
+    """Stem utama 1 kata (huruf kecil)."""
+    return stems(word)[0]
+
+
+def words(text):
+    """Pecah teks jadi kata (huruf kecil), tanpa stemming / stopword."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def tokenize(text):
+    """
+    Teks -> list stem untuk index/query pencarian (stopword dibuang).
+    Kata ambigu menyumbang semua kandidat stem: query dicocokkan dengan OR, jadi
+    "mengonsumsi" dan "konsumsi" tetap saling ketemu lewat stem "konsums".
+    """
+    return [s for w in words(text) if w not in STOPWORDS and len(w) > 1 for s in stems(w)]
@@ -1,11 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
+from sqlalchemy.orm import contains_eager, defer
 from app.models.article import Article
 from app.models.user import User
 from app.extensions import db
+from app.services.image_variants import image_variant_worker
+from app.services.upload_store import upload_store
 from app.web.firebase_guard import firebase_web_required
-import os, time
 
 admin_article_bp = Blueprint("admin_article", __name__, url_prefix="/admin/articles")
 
@@ -14,14 +15,6 @@ ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png"}
 def _allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS
 
-def _delete_file_if_exists(relative_path: str):
-    if not relative_path:
-        return
-    base_dir = current_app.config.get("BASE_DIR", os.getcwd())
-    abs_path = os.path.join(base_dir, relative_path)
-    if os.path.exists(abs_path):
-        os.remove(abs_path)
-
 # ===========================
 # LIST SEMUA ARTIKEL (ADMIN)
 # ===========================
@@ -35,6 +28,7 @@ def list_articles():
     articles = (
         Article.query
         .join(User, User.id == Article.author_id)
+        .options(defer(Article.content), contains_eager(Article.author))
         .order_by(Article.created_at.desc())
         .all()
     )
@@ -65,25 +59,21 @@ def edit_article(id):
         article.content = content
         article.tags = tags if tags else None
 
+        new_image = None
         file = request.files.get("image")
         if file and file.filename:
             if not _allowed_file(file.filename):
                 flash("Format gambar harus jpg/jpeg/png.", "danger")
                 return redirect(url_for("admin_article.edit_article", id=id))
 
-            # hapus gambar lama
-            if article.image_url:
-                _delete_file_if_exists(article.image_url)
-
-            filename = f"article_admin_{int(time.time())}_{secure_filename(file.filename)}"
-            upload_folder = current_app.config["UPLOAD_FOLDER"]
-            os.makedirs(upload_folder, exist_ok=True)
+            # lepas gambar lama (file dihapus setelah commit kalau tidak dipakai lagi)
+            upload_store.release(article.image_url)
 
-            save_path = os.path.join(upload_folder, filename)
-            file.save(save_path)
-            article.image_url = f"static/uploads/{filename}"
+            article.image_url = upload_store.save(file)
+            new_image = article.image_url
 
         db.session.commit()
+        image_variant_worker.enqueue(new_image)
         flash("Artikel berhasil diperbarui oleh admin.", "success")
         return redirect(url_for("admin_article.list_articles"))
 
@@ -100,8 +90,7 @@ def delete_article(id):
 
     article = Article.query.get_or_404(id)
 
-    if article.image_url:
-        _delete_file_if_exists(article.image_url)
+    upload_store.release(article.image_url)
 
     db.session.delete(article)
     db.session.commit()
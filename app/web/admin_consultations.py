@@ -2,12 +2,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from sqlalchemy.orm import aliased
-from sqlalchemy import or_, and_, func
+from sqlalchemy import func, or_, select
 from datetime import datetime, timedelta
 
 from app.extensions import db
 from app.models.consultation import Consultation, ChatMessage, Payment
 from app.models.user import User
+from app.utils.pagination import keyset_page, CountCache
 
 admin_consult_bp = Blueprint("admin_consult", __name__, url_prefix="/admin/consultations")
 
@@ -25,52 +26,54 @@ def _parse_date_yyyy_mm_dd(s: str):
         return None
 
 
-# ===========================
-# LIST CONSULTATIONS (ADMIN)
-# ===========================
-@admin_consult_bp.route("/", methods=["GET"])
-@login_required
-def list_consultations():
-    if not _admin_only():
-        return "Unauthorized", 403
+PAGE_SIZE = 50
 
-    q = (request.args.get("q") or "").strip()
-    c_status = (request.args.get("status") or "").strip()          # pending/active/completed
-    p_status = (request.args.get("pay_status") or "").strip()      # pending/success/failed
-    expired = (request.args.get("expired") or "").strip()          # yes/no/"" (all)
-    date_from = (request.args.get("from") or "").strip()
-    date_to = (request.args.get("to") or "").strip()
+# total per kombinasi filter (COUNT mahal di tabel besar, cukup akurat per menit)
+_consultation_counts = CountCache(ttl_seconds=60)
 
-    Patient = aliased(User)
-    Doctor = aliased(User)
 
-    # Subquery: ambil payment terbaru per consultation (kalau ada)
-    latest_payment_subq = (
-        db.session.query(
-            Payment.consultation_id.label("c_id"),
-            func.max(Payment.created_at).label("max_created_at"),
-        )
-        .group_by(Payment.consultation_id)
-        .subquery()
-    )
+def _read_filters():
+    return {
+        "q": (request.args.get("q") or "").strip(),
+        "c_status": (request.args.get("status") or "").strip(),      # pending/active/completed
+        "p_status": (request.args.get("pay_status") or "").strip(),  # pending/success/failed
+        "expired": (request.args.get("expired") or "").strip(),      # yes/no/"" (all)
+        "date_from": (request.args.get("from") or "").strip(),
+        "date_to": (request.args.get("to") or "").strip(),
+    }
+
+
+def _prefix_pattern(q: str):
+    """'abc' -> 'abc%' (wildcard di input di-escape). Prefix LIKE bisa pakai index B-tree."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
 
+
+def _filtered_consultations(filters, *entities):
+    """
+    Query consultation + filter admin. Dipakai untuk list (paginasi) dan hitung total.
+    entities: kolom/entity yang di-select (default: Consultation).
+    Return: (query, Patient, Doctor, LatestPay)
+    """
+    Patient = aliased(User)
+    Doctor = aliased(User)
     LatestPay = aliased(Payment)
 
-    # Query utama: consultation + patient + doctor + latest payment (outer join)
+    # Payment terbaru diambil lewat consultations.latest_payment_id (join by primary key),
+    # bukan subquery MAX(created_at) per consultation
     query = (
-        db.session.query(Consultation, Patient, Doctor, LatestPay)
+        db.session.query(*(entities or (Consultation,)))
+        .select_from(Consultation)
         .join(Patient, Patient.id == Consultation.patient_id)
         .join(Doctor, Doctor.id == Consultation.doctor_id)
-        .outerjoin(latest_payment_subq, latest_payment_subq.c.c_id == Consultation.id)
-        .outerjoin(
-            LatestPay,
-            and_(
-                LatestPay.consultation_id == Consultation.id,
-                LatestPay.created_at == latest_payment_subq.c.max_created_at,
-            ),
-        )
+        .outerjoin(LatestPay, LatestPay.id == Consultation.latest_payment_id)
     )
 
+    c_status = filters["c_status"]
+    p_status = filters["p_status"]
+    expired = filters["expired"]
+    q = filters["q"]
+
     # Filters
     if c_status in ["pending", "active", "completed"]:
         query = query.filter(Consultation.status == c_status)
@@ -87,21 +90,31 @@ def list_consultations():
         query = query.filter(or_(Consultation.expired_at.is_(None), Consultation.expired_at >= now))
 
     # Date range (created_at)
-    dt_from = _parse_date_yyyy_mm_dd(date_from)
-    dt_to = _parse_date_yyyy_mm_dd(date_to)
+    dt_from = _parse_date_yyyy_mm_dd(filters["date_from"])
+    dt_to = _parse_date_yyyy_mm_dd(filters["date_to"])
     if dt_from:
         query = query.filter(Consultation.created_at >= dt_from)
     if dt_to:
         query = query.filter(Consultation.created_at < (dt_to + timedelta(days=1)))
 
-    # Search
+    # Search awalan (dari depan string, bukan per kata): "budi" cocok "Budi Santoso",
+    # tapi "santoso" tidak. Nama/email case-insensitive lewat index lower(full_name) / lower(email),
+    # order_id lewat index payments.transaction_id (ORDER-... huruf besar, input ikut di-upper),
+    # lalu konsultasi lewat index patient_id/doctor_id
     if q:
+        pattern = _prefix_pattern(q)
+        matching_users = select(User.id).where(or_(
+            func.lower(User.full_name).like(pattern.lower(), escape="\\"),
+            func.lower(User.email).like(pattern.lower(), escape="\\"),
+        ))
+        matching_payments = select(Payment.consultation_id).where(or_(
+            Payment.transaction_id.like(pattern, escape="\\"),
+            Payment.transaction_id.like(pattern.upper(), escape="\\"),
+        ))
         conds = [
-            Patient.full_name.ilike(f"%{q}%"),
-            Patient.email.ilike(f"%{q}%"),
-            Doctor.full_name.ilike(f"%{q}%"),
-            Doctor.email.ilike(f"%{q}%"),
-            LatestPay.transaction_id.ilike(f"%{q}%"),
+            Consultation.patient_id.in_(matching_users),
+            Consultation.doctor_id.in_(matching_users),
+            Consultation.id.in_(matching_payments),
         ]
         if q.isdigit():
             conds += [
@@ -111,14 +124,45 @@ def list_consultations():
             ]
         query = query.filter(or_(*conds))
 
-    rows = query.order_by(Consultation.created_at.desc()).all()
+    return query, Patient, Doctor, LatestPay
+
+
+# ===========================
+# LIST CONSULTATIONS (ADMIN)
+# ===========================
+@admin_consult_bp.route("/", methods=["GET"])
+@login_required
+def list_consultations():
+    if not _admin_only():
+        return "Unauthorized", 403
+
+    filters = _read_filters()
+    cursor = request.args.get("after")
+
+    query, Patient, Doctor, LatestPay = _filtered_consultations(filters)
+    query = query.add_entity(Patient).add_entity(Doctor).add_entity(LatestPay)
+
+    # Keyset pagination (created_at, id) -- tanpa OFFSET
+    rows, next_cursor = keyset_page(
+        query, Consultation.created_at, Consultation.id, cursor=cursor, limit=PAGE_SIZE,
+        key=lambda row: (row[0].created_at, row[0].id),
+    )
+
+    count_key = tuple(sorted(filters.items()))
+    total = _consultation_counts.get_or_count(
+        count_key,
+        lambda: _filtered_consultations(filters, Consultation.id)[0].order_by(None).count(),
+    )
 
     return render_template(
         "web/admin/consultations/list.html",
         rows=rows,
-        q=q, c_status=c_status, p_status=p_status, expired=expired,
-        date_from=date_from, date_to=date_to,
-        now=now
+        total=total,
+        next_cursor=next_cursor,
+        is_first_page=not cursor,
+        q=filters["q"], c_status=filters["c_status"], p_status=filters["p_status"],
+        expired=filters["expired"], date_from=filters["date_from"], date_to=filters["date_to"],
+        now=datetime.utcnow()
     )
 
 
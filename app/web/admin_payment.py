@@ -1,10 +1,21 @@
 # app/web/admin_payment.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, stream_with_context
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased, joinedload
 from flask_login import login_required, current_user
 from app.extensions import db
 from app.models.consultation import Consultation, Payment
 from app.models.user import User
-import requests
+from app.services.payment_service import payment_service
+from app.services.payment_processor import apply_payment_status, map_notification_status
+from app.services.payment_reconciliation import reconcile_payments
+from app.services.payment_status_cache import payment_status_cache
+from app.utils.pagination import keyset_page, CountCache
 
 admin_payment_bp = Blueprint("admin_payment", __name__, url_prefix="/admin/payments")
 
@@ -13,83 +24,55 @@ def _admin_only():
         return False
     return True
 
-def _midtrans_base_url() -> str:
-    is_prod = bool(current_app.config.get("MIDTRANS_IS_PRODUCTION", False))
-    return "https://api.midtrans.com" if is_prod else "https://api.sandbox.midtrans.com"
-
-def _midtrans_server_key() -> str:
-    key = current_app.config.get("MIDTRANS_SERVER_KEY")
-    if not key:
-        raise RuntimeError("MIDTRANS_SERVER_KEY belum diset di config.")
-    return key
-
 def _midtrans_get_status(order_id: str) -> dict:
     """
     Panggil Midtrans Status API:
     GET /v2/{order_id}/status
+    (lewat client bersama: pooled keep-alive, retry 5xx/timeout, circuit breaker)
     """
-    url = f"{_midtrans_base_url()}/v2/{order_id}/status"
-    resp = requests.get(url, auth=(_midtrans_server_key(), ""), timeout=15)
     # 200 biasanya sukses, 404 kalau tidak ketemu order_id
-    try:
-        data = resp.json()
-    except Exception:
-        data = {"raw": resp.text}
+    return payment_service.get_status(order_id)
 
-    return {"http_status": resp.status_code, "data": data}
+PAGE_SIZE = 50
+EXPORT_CHUNK = 500
 
-def _map_midtrans_to_local_status(midtrans_status: str) -> str:
-    """
-    Map transaction_status dari Midtrans → Payment.status lokal:
-    - pending → pending
-    - settlement/capture → success
-    - deny/cancel/expire → failed
-    - lainnya: pending (aman)
-    """
-    s = (midtrans_status or "").lower()
-    if s in ["settlement", "capture"]:
-        return "success"
-    if s in ["deny", "cancel", "expire"]:
-        return "failed"
-    if s in ["pending"]:
-        return "pending"
-    return "pending"
+# Total per kombinasi filter di-cache sebentar (COUNT di tabel besar mahal)
+_payment_counts = CountCache(ttl_seconds=60)
 
-# ===========================
-# LIST PAYMENTS (ADMIN)
-# ===========================
-@admin_payment_bp.route("/", methods=["GET"])
-@login_required
-def list_payments():
-    if not _admin_only():
-        return "Unauthorized", 403
 
-    q = (request.args.get("q") or "").strip()
-    status = (request.args.get("status") or "").strip()   # pending/success/failed
-    method = (request.args.get("method") or "").strip()   # gopay/bca/etc
-    date_from = (request.args.get("from") or "").strip()  # YYYY-MM-DD
-    date_to = (request.args.get("to") or "").strip()      # YYYY-MM-DD
+def _read_filters():
+    return {
+        "q": (request.args.get("q") or "").strip(),
+        "status": (request.args.get("status") or "").strip(),   # pending/success/failed
+        "method": (request.args.get("method") or "").strip(),   # gopay/bca/etc
+        "date_from": (request.args.get("from") or "").strip(),  # YYYY-MM-DD
+        "date_to": (request.args.get("to") or "").strip(),      # YYYY-MM-DD
+    }
 
-    # query dasar: join ke Consultation, patient, doctor
-    query = (
-        Payment.query
-        .join(Consultation, Consultation.id == Payment.consultation_id)
-        .join(User, User.id == Consultation.patient_id)
-        .join(User, User.id == Consultation.doctor_id)  # ini join dobel kalau pakai alias; kita handle dengan alias di bawah
-    )
 
+def _filtered_payments(filters, *entities):
+    """
+    Query payment + filter admin. Dipakai bersama oleh list (paginasi) dan export (streaming).
+    entities: kolom/entity yang di-select (default: Payment).
+    Return: (query, Patient, Doctor)
+    """
     # Karena join User 2 kali, lebih aman pakai alias
-    from sqlalchemy.orm import aliased
     Patient = aliased(User)
     Doctor = aliased(User)
 
+    # query dasar: join ke Consultation, patient, doctor
     query = (
-        Payment.query
+        db.session.query(*(entities or (Payment,)))
+        .select_from(Payment)
         .join(Consultation, Consultation.id == Payment.consultation_id)
         .join(Patient, Patient.id == Consultation.patient_id)
         .join(Doctor, Doctor.id == Consultation.doctor_id)
     )
 
+    status = filters["status"]
+    method = filters["method"]
+    q = filters["q"]
+
     if status in ["pending", "success", "failed"]:
         query = query.filter(Payment.status == status)
 
@@ -110,33 +93,125 @@ def list_payments():
             conds.append(Payment.consultation_id == int(q))
             conds.append(Payment.id == int(q))
 
-        from sqlalchemy import or_
         query = query.filter(or_(*conds))
 
     # filter tanggal (created_at payment)
-    # (simple) gunakan string compare via cast date di DB kalau perlu;
-    # di sini pakai BETWEEN datetime via SQLAlchemy text (lebih aman kalau DB postgres/mysql)
-    from datetime import datetime, timedelta
-    if date_from:
+    if filters["date_from"]:
         try:
-            dt_from = datetime.strptime(date_from, "%Y-%m-%d")
+            dt_from = datetime.strptime(filters["date_from"], "%Y-%m-%d")
             query = query.filter(Payment.created_at >= dt_from)
-        except:
+        except ValueError:
             pass
 
-    if date_to:
+    if filters["date_to"]:
         try:
-            dt_to = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)
+            dt_to = datetime.strptime(filters["date_to"], "%Y-%m-%d") + timedelta(days=1)
             query = query.filter(Payment.created_at < dt_to)
-        except:
+        except ValueError:
             pass
 
-    payments = query.order_by(Payment.created_at.desc()).all()
+    return query, Patient, Doctor
+
+
+# ===========================
+# LIST PAYMENTS (ADMIN)
+# ===========================
+@admin_payment_bp.route("/", methods=["GET"])
+@login_required
+def list_payments():
+    if not _admin_only():
+        return "Unauthorized", 403
+
+    filters = _read_filters()
+    cursor = request.args.get("after")
+
+    query, _, _ = _filtered_payments(filters)
+    query = query.options(
+        joinedload(Payment.consultation).joinedload(Consultation.patient),
+        joinedload(Payment.consultation).joinedload(Consultation.doctor),
+    )
+
+    # Keyset pagination (created_at, id) -- tanpa OFFSET
+    payments, next_cursor = keyset_page(
+        query, Payment.created_at, Payment.id, cursor=cursor, limit=PAGE_SIZE
+    )
+
+    count_key = tuple(sorted(filters.items()))
+    total = _payment_counts.get_or_count(
+        count_key,
+        lambda: _filtered_payments(filters, Payment.id)[0].order_by(None).count(),
+    )
 
     return render_template(
         "web/admin/payments/list.html",
         payments=payments,
-        q=q, status=status, method=method, date_from=date_from, date_to=date_to
+        total=total,
+        next_cursor=next_cursor,
+        is_first_page=not cursor,
+        q=filters["q"], status=filters["status"], method=filters["method"],
+        date_from=filters["date_from"], date_to=filters["date_to"]
+    )
+
+
+# ===========================
+# EXPORT PAYMENTS (ADMIN) - CSV / NDJSON streaming
+# ===========================
+EXPORT_COLUMNS = [
+    "id", "created_at", "consultation_id", "patient_name", "patient_email",
+    "doctor_name", "doctor_email", "amount", "payment_method", "status", "transaction_id",
+]
+
+
+@admin_payment_bp.route("/export", methods=["GET"])
+@login_required
+def export_payments():
+    if not _admin_only():
+        return "Unauthorized", 403
+
+    fmt = (request.args.get("format") or "csv").lower()
+    filters = _read_filters()
+
+    def rows():
+        query, Patient, Doctor = _filtered_payments(filters)
+        query = query.with_entities(
+            Payment.id, Payment.created_at, Payment.consultation_id,
+            Patient.full_name, Patient.email, Doctor.full_name, Doctor.email,
+            Payment.amount, Payment.payment_method, Payment.status, Payment.transaction_id,
+        ).order_by(Payment.created_at.desc(), Payment.id.desc())
+
+        # stream_results = server-side cursor; yield_per = ambil per potongan, tidak .all()
+        for row in query.execution_options(stream_results=True).yield_per(EXPORT_CHUNK):
+            values = list(row)
+            values[1] = values[1].isoformat() if values[1] else None
+            yield values
+
+    def generate_csv():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_COLUMNS)
+        for values in rows():
+            writer.writerow(values)
+            if buf.tell() > 64 * 1024:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate(0)
+        yield buf.getvalue()
+
+    def generate_ndjson():
+        for values in rows():
+            yield json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False) + "\n"
+
+    stamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    if fmt == "ndjson":
+        return Response(
+            stream_with_context(generate_ndjson()),
+            mimetype="application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename=payments_{stamp}.ndjson"},
+        )
+    return Response(
+        stream_with_context(generate_csv()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=payments_{stamp}.csv"},
     )
 
 # ===========================
@@ -190,22 +265,41 @@ def refresh_payment(payment_id):
             return redirect(url_for("admin_payment.payment_detail", payment_id=payment_id))
 
         midtrans_status = data.get("transaction_status")
-        mapped = _map_midtrans_to_local_status(midtrans_status)
+        mapped = map_notification_status(midtrans_status, data.get("fraud_status"))
 
         # update status lokal (bukan manual, ini dari gateway)
-        payment.status = mapped
-
-        # optional: update payment_method dari midtrans bila ada
-        if not payment.payment_method:
-            pm = data.get("payment_type")
-            if pm:
-                payment.payment_method = pm
+        # + isi payment_method dari midtrans bila kosong + aktifkan konsultasi kalau sukses
+        apply_payment_status(payment, mapped, data.get("payment_type"))
 
         db.session.commit()
+        payment_status_cache.invalidate(payment.id)
 
-        flash(f"Status berhasil disinkron: Midtrans='{midtrans_status}' → Lokal='{mapped}'", "success")
+        flash(f"Status berhasil disinkron: Midtrans='{midtrans_status}' → Lokal='{payment.status}'", "success")
         return redirect(url_for("admin_payment.payment_detail", payment_id=payment_id))
 
     except Exception as e:
         flash(f"Error saat cek status Midtrans: {str(e)}", "danger")
         return redirect(url_for("admin_payment.payment_detail", payment_id=payment_id))
+
+# ===========================
+# REKONSILIASI MASSAL (ADMIN)
+# ===========================
+@admin_payment_bp.route("/reconcile", methods=["POST"])
+@login_required
+def reconcile():
+    if not _admin_only():
+        return "Unauthorized", 403
+
+    try:
+        older_than = int(request.form.get("older_than") or 15)
+    except ValueError:
+        older_than = 15
+
+    report = reconcile_payments(older_than_minutes=older_than)
+    flash(
+        f"Rekonsiliasi selesai: {report['checked']} dicek, {report['updated']} diperbarui, "
+        f"{report['unchanged']} tetap, {report['not_found']} tidak ada di Midtrans "
+        f"({report['expired']} kedaluwarsa dibatalkan), {report['errors']} error.",
+        "success" if not report["errors"] else "warning",
+    )
+    return redirect(url_for("admin_payment.list_payments"))
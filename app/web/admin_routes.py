@@ -17,6 +17,8 @@ from app.extensions import db   # ← HARUS ADA INI
 
 from flask import request
 from app.web.firebase_guard import firebase_web_required
+from app.services.revenue_rollup import revenue_series
+from datetime import date, timedelta
 
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -89,6 +91,41 @@ def sentiment_data():
         "total": total,
         "avg_confidence": avg_conf
     }), 200
+@admin_bp.route("/revenue-data", methods=["GET"])
+@login_required
+def revenue_data():
+    """
+    Time series revenue harian dari payment_daily_rollups.
+    Query: from, to (YYYY-MM-DD, default 30 hari terakhir), status (default success),
+    doctor_id, method.
+    """
+    if current_user.role != "ADMIN":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    try:
+        date_to = date.fromisoformat(request.args["to"]) if request.args.get("to") else date.today()
+        date_from = (
+            date.fromisoformat(request.args["from"]) if request.args.get("from")
+            else date_to - timedelta(days=29)
+        )
+    except ValueError:
+        return jsonify({"error": "Format tanggal harus YYYY-MM-DD"}), 400
+
+    series = revenue_series(
+        date_from,
+        date_to,
+        status=request.args.get("status", "success") or None,
+        doctor_id=request.args.get("doctor_id", type=int),
+        payment_method=request.args.get("method"),
+    )
+    return jsonify({
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "series": series,
+        "total_count": sum(row["count"] for row in series),
+        "total_amount": sum(row["amount"] for row in series),
+    }), 200
+
 # ======================
 # LIST DOKTER
 # ======================
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
+from sqlalchemy.orm import defer
 from app.models.article import Article
 from app.extensions import db
-import os, time
+from app.services.image_variants import image_variant_worker
+from app.services.upload_store import upload_store
 
 doctor_article_bp = Blueprint("doctor_article", __name__, url_prefix="/doctor/articles")
 
@@ -19,15 +20,6 @@ def _allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS
 
 
-def _delete_file_if_exists(relative_path: str):
-    if not relative_path:
-        return
-    base_dir = current_app.config.get("BASE_DIR", os.getcwd())
-    abs_path = os.path.join(base_dir, relative_path)
-    if os.path.exists(abs_path):
-        os.remove(abs_path)
-
-
 # ===========================
 # LIST ARTIKEL DOKTER
 # ===========================
@@ -39,6 +31,7 @@ def list_articles():
 
     articles = (
         Article.query
+        .options(defer(Article.content))
         .filter_by(author_id=current_user.id)
         .order_by(Article.created_at.desc())
         .all()
@@ -76,11 +69,7 @@ def create_article():
                 flash("Format gambar harus jpg/jpeg/png.", "danger")
                 return redirect(url_for("doctor_article.create_article"))
 
-            filename = f"article_doctor_{current_user.id}_{int(time.time())}_{secure_filename(file.filename)}"
-            upload_folder = current_app.config["UPLOAD_FOLDER"]
-            os.makedirs(upload_folder, exist_ok=True)
-            file.save(os.path.join(upload_folder, filename))
-            image_url = f"static/uploads/{filename}"
+            image_url = upload_store.save(file)
 
         new_article = Article(
             title=title,
@@ -92,6 +81,7 @@ def create_article():
 
         db.session.add(new_article)
         db.session.commit()
+        image_variant_worker.enqueue(image_url)
 
         flash("Artikel berhasil dibuat.", "success")
         return redirect(url_for("doctor_article.list_articles"))
@@ -126,23 +116,21 @@ def edit_article(id):
         article.content = content
         article.tags = tags if tags else None
 
+        new_image = None
         file = request.files.get("image")
         if file and file.filename:
             if not _allowed_file(file.filename):
                 flash("Format gambar harus jpg/jpeg/png.", "danger")
                 return redirect(url_for("doctor_article.edit_article", id=id))
 
-            # hapus gambar lama
-            if article.image_url:
-                _delete_file_if_exists(article.image_url)
+            # lepas gambar lama (file dihapus setelah commit kalau tidak dipakai lagi)
+            upload_store.release(article.image_url)
 
-            filename = f"article_doctor_{current_user.id}_{int(time.time())}_{secure_filename(file.filename)}"
-            upload_folder = current_app.config["UPLOAD_FOLDER"]
-            os.makedirs(upload_folder, exist_ok=True)
-            file.save(os.path.join(upload_folder, filename))
-            article.image_url = f"static/uploads/{filename}"
+            article.image_url = upload_store.save(file)
+            new_image = article.image_url
 
         db.session.commit()
+        image_variant_worker.enqueue(new_image)
         flash("Artikel berhasil diperbarui.", "success")
         return redirect(url_for("doctor_article.list_articles"))
 
@@ -167,8 +155,7 @@ def delete_article(id):
     if article.author_id != current_user.id:
         return "Unauthorized", 403
 
-    if article.image_url:
-        _delete_file_if_exists(article.image_url)
+    upload_store.release(article.image_url)
 
     db.session.delete(article)
     db.session.commit()
@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request
 from flask_login import login_required, current_user
 from app.models.consultation import Consultation, ChatMessage
-from app.extensions import db, socketio
+from app.extensions import db
+from app.services.chat_batcher import chat_batcher
 
 doctor_consult_bp = Blueprint("doctor_consult", __name__, url_prefix="/doctor/consultations")
 
@@ -95,14 +96,15 @@ def send_message_web(id):
 
     timestamp = new_msg.created_at.isoformat()
 
-    socketio.emit(
+    chat_batcher.emit(
         "new_message",
         {
+            "id": new_msg.id,
             "sender_id": current_user.id,
             "message": message_text,
             "timestamp": timestamp
         },
-        to=f"consultation_{id}"
+        f"consultation_{id}"
     )
 
     return {"status": "success", "message": "sent", "timestamp": timestamp}, 200
@@ -1,10 +1,9 @@
 # app/web/doctor_routes.py
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from app.extensions import db
-import os, time
+from app.services.upload_store import upload_store
 
 from app.models.article import Article
 from app.models.consultation import Consultation
@@ -58,27 +57,9 @@ def verification():
             flash("Format file tidak diizinkan (hanya PNG, JPG, JPEG, PDF).", "danger")
             return redirect(url_for("doctor.verification"))
 
-        filename = f"verification_{current_user.id}_{int(time.time())}_{secure_filename(file.filename)}"
-
-        upload_folder = current_app.config["UPLOAD_FOLDER"]
-        os.makedirs(upload_folder, exist_ok=True)
-
-        save_path = os.path.join(upload_folder, filename)
-        file.save(save_path)
-
-        # Hapus file lama jika ada
-        if getattr(current_user, "verification_doc", None):
-            try:
-                old_path = os.path.join(
-                    current_app.config.get("BASE_DIR", os.getcwd()),
-                    current_user.verification_doc
-                )
-                if os.path.exists(old_path):
-                    os.remove(old_path)
-            except Exception:
-                pass
-
-        current_user.verification_doc = f"static/uploads/{filename}"
+        # Lepas file lama (dihapus setelah commit kalau tidak dipakai lagi), simpan yang baru
+        upload_store.release(getattr(current_user, "verification_doc", None))
+        current_user.verification_doc = upload_store.save(file)
         db.session.commit()
 
         flash("Dokumen verifikasi berhasil di-upload. Menunggu persetujuan admin.", "success")
@@ -12,8 +12,95 @@ class Config:
 
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'app/static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # Batas max file 16MB
+    # Batas resolusi gambar upload (lebar x tinggi), dicek dari header sebelum file selesai diterima
+    UPLOAD_MAX_IMAGE_PIXELS = int(os.environ.get("UPLOAD_MAX_IMAGE_PIXELS", str(40_000_000)))
+    # Varian gambar upload (thumb/medium, WebP + JPEG) dibuat di background
+    IMAGE_VARIANTS_ENABLED = os.environ.get("IMAGE_VARIANTS_ENABLED", "true").lower() == "true"
+    IMAGE_THUMB_SIZE = int(os.environ.get("IMAGE_THUMB_SIZE", "320"))     # sisi terpanjang (px)
+    IMAGE_MEDIUM_SIZE = int(os.environ.get("IMAGE_MEDIUM_SIZE", "1080"))
+    IMAGE_VARIANT_QUALITY = int(os.environ.get("IMAGE_VARIANT_QUALITY", "80"))
+    IMAGE_VARIANT_FORMAT = os.environ.get("IMAGE_VARIANT_FORMAT", "webp")  # default response API
+    # Backend penyimpanan upload: local (UPLOAD_FOLDER) / s3 (S3 atau kompatibel: MinIO, R2, ...)
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local")
+    S3_BUCKET = os.environ.get("S3_BUCKET")
+    S3_ACCESS_KEY_ID = os.environ.get("S3_ACCESS_KEY_ID")
+    S3_SECRET_ACCESS_KEY = os.environ.get("S3_SECRET_ACCESS_KEY")
+    S3_REGION = os.environ.get("S3_REGION", "us-east-1")
+    # Override endpoint (MinIO / server lokal saat testing); kosong = AWS S3 sesuai region
+    S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL")
+    # URL CDN / bucket publik; kosong = file dilayani lewat URL pre-signed
+    S3_PUBLIC_URL = os.environ.get("S3_PUBLIC_URL")
+    S3_PRESIGN_EXPIRES = int(os.environ.get("S3_PRESIGN_EXPIRES", "900"))  # detik
+    # Jaring pengaman antrian hapus file upload (worker juga dipicu langsung setelah commit; 0 = mati)
+    UPLOAD_DELETE_INTERVAL_SECONDS = int(os.environ.get("UPLOAD_DELETE_INTERVAL_SECONDS", "300"))
+    # GC file upload yatim (tidak dipakai kolom mana pun); 0 = mati, pakai `flask gc-uploads` via cron
+    UPLOAD_GC_INTERVAL_SECONDS = int(os.environ.get("UPLOAD_GC_INTERVAL_SECONDS", "86400"))
+    UPLOAD_GC_GRACE_SECONDS = int(os.environ.get("UPLOAD_GC_GRACE_SECONDS", "86400"))  # file lebih baru tidak disentuh
+    UPLOAD_GC_BATCH_SIZE = int(os.environ.get("UPLOAD_GC_BATCH_SIZE", "500"))
+    # Prefix internal nginx untuk X-Accel-Redirect (misal /_uploads/); kosong = Flask kirim file sendiri
+    UPLOAD_ACCEL_REDIRECT_PREFIX = os.environ.get("UPLOAD_ACCEL_REDIRECT_PREFIX")
     
 
+    # Midtrans
+    MIDTRANS_SERVER_KEY = os.environ.get("MIDTRANS_SERVER_KEY")
+    MIDTRANS_IS_PRODUCTION = os.environ.get("MIDTRANS_IS_PRODUCTION") == "True"
+    # Override base URL (misal ke stub server lokal saat testing); kosong = sandbox/production
+    MIDTRANS_SNAP_BASE_URL = os.environ.get("MIDTRANS_SNAP_BASE_URL")
+    MIDTRANS_API_BASE_URL = os.environ.get("MIDTRANS_API_BASE_URL")
+    MIDTRANS_CONNECT_TIMEOUT = float(os.environ.get("MIDTRANS_CONNECT_TIMEOUT", "3.05"))
+    MIDTRANS_READ_TIMEOUT = float(os.environ.get("MIDTRANS_READ_TIMEOUT", "10"))
+    MIDTRANS_MAX_RETRIES = int(os.environ.get("MIDTRANS_MAX_RETRIES", "2"))
+    MIDTRANS_RETRY_BACKOFF = float(os.environ.get("MIDTRANS_RETRY_BACKOFF", "0.5"))
+    MIDTRANS_POOL_SIZE = int(os.environ.get("MIDTRANS_POOL_SIZE", "10"))
+    MIDTRANS_BREAKER_THRESHOLD = int(os.environ.get("MIDTRANS_BREAKER_THRESHOLD", "5"))
+    MIDTRANS_BREAKER_RESET_SECONDS = int(os.environ.get("MIDTRANS_BREAKER_RESET_SECONDS", "30"))
+    # Masa berlaku Snap token (default Midtrans 24 jam). Payment pending yang tidak dikenal
+    # Midtrans (404, token tidak pernah dipakai) dan lebih tua dari ini dibatalkan saat rekonsiliasi
+    MIDTRANS_SNAP_EXPIRY_MINUTES = int(os.environ.get("MIDTRANS_SNAP_EXPIRY_MINUTES", "1440"))
+    # Interval processor inbox webhook Midtrans (jaring pengaman; webhook juga memicu langsung)
+    PAYMENT_NOTIFICATION_INTERVAL_SECONDS = int(os.environ.get("PAYMENT_NOTIFICATION_INTERVAL_SECONDS", "10"))
+    # Rekonsiliasi massal payment pending vs Midtrans Status API (0 = mati)
+    PAYMENT_RECONCILE_INTERVAL_SECONDS = int(os.environ.get("PAYMENT_RECONCILE_INTERVAL_SECONDS", "900"))
+    # Rekonsiliasi User.balance dari ledger_entries (0 = mati)
+    LEDGER_REBUILD_INTERVAL_SECONDS = int(os.environ.get("LEDGER_REBUILD_INTERVAL_SECONDS", "3600"))
+    # Batch payout penarikan dokter (0 = mati, jalankan manual: flask process-withdrawals)
+    WITHDRAWAL_BATCH_INTERVAL_SECONDS = int(os.environ.get("WITHDRAWAL_BATCH_INTERVAL_SECONDS", "0"))
+    WITHDRAWAL_BATCH_SIZE = int(os.environ.get("WITHDRAWAL_BATCH_SIZE", "500"))
+    PAYOUT_EXPORT_DIR = os.environ.get("PAYOUT_EXPORT_DIR", os.path.join(BASE_DIR, 'instance/payouts'))
+    # Bangun ulang rekap revenue harian dari payments, koreksi drift (0 = mati)
+    REVENUE_ROLLUP_REBUILD_INTERVAL_SECONDS = int(os.environ.get("REVENUE_ROLLUP_REBUILD_INTERVAL_SECONDS", "86400"))
+
+    # Cache status payment untuk polling app (detik) + batas long-poll per request
+    PAYMENT_STATUS_CACHE_TTL_SECONDS = int(os.environ.get("PAYMENT_STATUS_CACHE_TTL_SECONDS", "10"))
+    PAYMENT_STATUS_MAX_WAIT_SECONDS = int(os.environ.get("PAYMENT_STATUS_MAX_WAIT_SECONDS", "25"))
+
+    # Cache-Control endpoint artikel publik (detik): app selalu revalidasi (ETag -> 304),
+    # reverse proxy boleh simpan sebentar
+    PUBLIC_CACHE_MAX_AGE = int(os.environ.get("PUBLIC_CACHE_MAX_AGE", "0"))
+    PUBLIC_CACHE_S_MAXAGE = int(os.environ.get("PUBLIC_CACHE_S_MAXAGE", "30"))
+    PUBLIC_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get("PUBLIC_CACHE_STALE_WHILE_REVALIDATE", "60"))
+
+    # Cache payload list/detail/pencarian artikel (LRU di proses, opsional Redis bersama)
+    RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "300"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_REDIS_URL = os.environ.get("RESPONSE_CACHE_REDIS_URL")
+
+    # Status online dokter/pasien dari koneksi socket (detik sejak heartbeat terakhir)
+    PRESENCE_TTL_SECONDS = int(os.environ.get("PRESENCE_TTL_SECONDS", "90"))
+    # Cache daftar konsultasi per user untuk otorisasi join room socket
+    CONSULTATION_ACCESS_TTL_SECONDS = int(os.environ.get("CONSULTATION_ACCESS_TTL_SECONDS", "300"))
+
+    # Window penggabungan emit chat + read receipt per room (0 = kirim langsung)
+    CHAT_FLUSH_INTERVAL_MS = int(os.environ.get("CHAT_FLUSH_INTERVAL_MS", "100"))
+
+    # Sweeper konsultasi expired (0 = mati, pakai `flask sweep-consultations` via cron)
+    CONSULTATION_SWEEP_INTERVAL_SECONDS = int(os.environ.get("CONSULTATION_SWEEP_INTERVAL_SECONDS", "60"))
+    CONSULTATION_SWEEP_BATCH_SIZE = int(os.environ.get("CONSULTATION_SWEEP_BATCH_SIZE", "500"))
+    # Booking 'pending' tanpa token Midtrans lebih tua dari N menit dianggap yatim
+    ORPHANED_BOOKING_SWEEP_INTERVAL_SECONDS = int(os.environ.get("ORPHANED_BOOKING_SWEEP_INTERVAL_SECONDS", "600"))
+    ORPHANED_BOOKING_MINUTES = int(os.environ.get("ORPHANED_BOOKING_MINUTES", "30"))
+
     # Cookie secure hanya TRUE di HTTPS production
     SESSION_COOKIE_SECURE = os.environ.get("SESSION_COOKIE_SECURE", "0") == "1"
 
@@ -0,0 +1,55 @@
+"""add withdrawal_batches + kolom batch di withdrawals
+
+Revision ID: a3c9e5f1b702
+Revises: f2b7d4e9a1c6
+Create Date: 2026-10-19 14:52:09.318264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e5f1b702'
+down_revision = 'f2b7d4e9a1c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('withdrawal_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.BigInteger(), nullable=False),
+    sa.Column('rejected_count', sa.Integer(), nullable=False),
+    sa.Column('payout_file', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('posted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('withdrawal_batches', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_withdrawal_batches_status'), ['status'], unique=False)
+
+    with op.batch_alter_table('withdrawals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('batch_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('processed_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('failure_reason', sa.String(length=255), nullable=True))
+        batch_op.create_foreign_key('fk_withdrawals_batch_id', 'withdrawal_batches', ['batch_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_withdrawals_batch_id'), ['batch_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_withdrawals_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('withdrawals', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_withdrawals_status'))
+        batch_op.drop_index(batch_op.f('ix_withdrawals_batch_id'))
+        batch_op.drop_constraint('fk_withdrawals_batch_id', type_='foreignkey')
+        batch_op.drop_column('failure_reason')
+        batch_op.drop_column('processed_at')
+        batch_op.drop_column('batch_id')
+
+    with op.batch_alter_table('withdrawal_batches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_withdrawal_batches_status'))
+
+    op.drop_table('withdrawal_batches')
@@ -0,0 +1,36 @@
+"""add image_variants (thumb/medium webp/jpeg per gambar upload)
+
+Revision ID: a6c2e8f4b913
+Revises: f1b3d5e7a930
+Create Date: 2026-10-19 19:12:47.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c2e8f4b913'
+down_revision = 'f1b3d5e7a930'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('image_variants',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source_path', sa.String(length=255), nullable=False),
+    sa.Column('variant', sa.String(length=20), nullable=False),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source_path', 'variant', 'format', name='uq_image_variants_key')
+    )
+
+
+def downgrade():
+    op.drop_table('image_variants')
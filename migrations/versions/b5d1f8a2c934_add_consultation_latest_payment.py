@@ -0,0 +1,49 @@
+"""add consultations.latest_payment_id + index untuk list admin
+
+Revision ID: b5d1f8a2c934
+Revises: a3c9e5f1b702
+Create Date: 2026-10-19 15:31:56.740218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d1f8a2c934'
+down_revision = 'a3c9e5f1b702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('consultations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latest_payment_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_consultations_latest_payment_id', 'payments', ['latest_payment_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_consultations_latest_payment_id'), ['latest_payment_id'], unique=False)
+        batch_op.create_index('ix_consultations_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_consultations_patient_id'), ['patient_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_consultations_doctor_id'), ['doctor_id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_full_name'), ['full_name'], unique=False)
+
+    # Isi dari payment terbaru yang sudah ada
+    op.execute(
+        "UPDATE consultations SET latest_payment_id = ("
+        "SELECT p.id FROM payments p WHERE p.consultation_id = consultations.id "
+        "ORDER BY p.created_at DESC, p.id DESC LIMIT 1)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_full_name'))
+
+    with op.batch_alter_table('consultations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_consultations_doctor_id'))
+        batch_op.drop_index(batch_op.f('ix_consultations_patient_id'))
+        batch_op.drop_index('ix_consultations_created_at_id')
+        batch_op.drop_index(batch_op.f('ix_consultations_latest_payment_id'))
+        batch_op.drop_constraint('fk_consultations_latest_payment_id', type_='foreignkey')
+        batch_op.drop_column('latest_payment_id')
@@ -0,0 +1,35 @@
+"""add upload_blobs (penyimpanan upload content-addressed + refcount)
+
+Revision ID: b8d4f0a2c615
+Revises: a6c2e8f4b913
+Create Date: 2026-10-19 20:03:26.540917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4f0a2c615'
+down_revision = 'a6c2e8f4b913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('path'),
+    sa.UniqueConstraint('sha256')
+    )
+
+
+def downgrade():
+    op.drop_table('upload_blobs')
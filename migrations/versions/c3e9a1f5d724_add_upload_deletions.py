@@ -0,0 +1,36 @@
+"""add upload_deletions (antrian hapus file upload di background)
+
+Revision ID: c3e9a1f5d724
+Revises: b8d4f0a2c615
+Create Date: 2026-10-19 21:12:48.203114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9a1f5d724'
+down_revision = 'b8d4f0a2c615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_deletions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload_deletions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_upload_deletions_path'), ['path'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('upload_deletions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_upload_deletions_path'))
+
+    op.drop_table('upload_deletions')
@@ -0,0 +1,70 @@
+"""add ledger_entries (buku besar saldo dokter)
+
+Revision ID: c4a7e1b9d205
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-19 11:20:47.903311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e1b9d205'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tabel withdrawals sempat ter-drop di db138fe6214e padahal model Withdrawal masih dipakai.
+    # Buat ulang kalau belum ada, karena ledger_entries mereferensikannya.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('withdrawals'):
+        op.create_table('withdrawals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('bank_name', sa.String(length=50), nullable=False),
+        sa.Column('account_number', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    op.create_table('ledger_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entry_type', sa.String(length=30), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('payment_id', sa.Integer(), nullable=True),
+    sa.Column('withdrawal_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['withdrawal_id'], ['withdrawals.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('payment_id'),
+    sa.UniqueConstraint('withdrawal_id')
+    )
+    with op.batch_alter_table('ledger_entries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ledger_entries_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ledger_entries_user_id'), ['user_id'], unique=False)
+
+    # Saldo lama (sebelum ada ledger) dicatat sebagai opening_balance,
+    # supaya rebuild dari ledger tidak meng-nol-kan saldo dokter yang sudah ada.
+    op.execute(
+        "INSERT INTO ledger_entries (user_id, entry_type, amount, description, created_at) "
+        "SELECT id, 'opening_balance', balance, 'Saldo awal sebelum ledger', CURRENT_TIMESTAMP "
+        "FROM users WHERE balance IS NOT NULL AND balance <> 0"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('ledger_entries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ledger_entries_user_id'))
+        batch_op.drop_index(batch_op.f('ix_ledger_entries_created_at'))
+
+    op.drop_table('ledger_entries')
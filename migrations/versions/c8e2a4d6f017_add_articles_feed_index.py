@@ -0,0 +1,28 @@
+"""add index articles(created_at, id) untuk paginasi feed
+
+Revision ID: c8e2a4d6f017
+Revises: b5d1f8a2c934
+Create Date: 2026-10-19 16:05:12.884130
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2a4d6f017'
+down_revision = 'b5d1f8a2c934'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.create_index('ix_articles_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_articles_author_id'), ['author_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_articles_author_id'))
+        batch_op.drop_index('ix_articles_created_at_id')
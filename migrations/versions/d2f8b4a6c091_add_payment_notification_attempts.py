@@ -0,0 +1,26 @@
+"""add attempts ke payment_notifications (notifikasi yang gagal terus tidak menahan antrian)
+
+Revision ID: d2f8b4a6c091
+Revises: c3e9a1f5d724
+Create Date: 2026-10-20 09:14:37.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f8b4a6c091'
+down_revision = 'c3e9a1f5d724'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payment_notifications', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('payment_notifications', schema=None) as batch_op:
+        batch_op.drop_column('attempts')
@@ -0,0 +1,142 @@
+"""add full-text search artikel (search_title/search_body + index per database)
+
+Revision ID: d4f6b8c0e215
+Revises: c8e2a4d6f017
+Create Date: 2026-10-19 16:48:30.517902
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8c0e215'
+down_revision = 'c8e2a4d6f017'
+branch_labels = None
+depends_on = None
+
+# Harus sama dengan ekspresi di services/article_search.py (_search_postgres)
+PG_VECTOR = (
+    "(setweight(to_tsvector('simple'::regconfig, coalesce(search_title, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(search_body, '')), 'B'))"
+)
+
+# ---------- salinan beku tokenizer/stemmer (app/utils/text_id.py saat migrasi ini dibuat) ----------
+# Sengaja tidak import dari app: hasil migrasi tidak boleh berubah kalau kode aplikasi berubah.
+# Kalau tokenizer aplikasi diubah, jalankan `flask reindex-articles`.
+_TOKEN_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+_STOPWORDS = {
+    "ada", "adalah", "agar", "akan", "aku", "anda", "apa", "atau", "bagi", "bahwa",
+    "banyak", "beberapa", "belum", "bisa", "boleh", "dalam", "dan", "dapat", "dari",
+    "dengan", "di", "dia", "hal", "hanya", "harus", "ini", "itu", "jadi", "jika",
+    "juga", "kalau", "kami", "kamu", "karena", "ke", "kita", "lebih", "maka", "mereka",
+    "namun", "oleh", "pada", "para", "perlu", "saat", "saja", "sangat", "sebagai",
+    "secara", "sedang", "sehingga", "sekali", "seperti", "serta", "setelah", "sudah",
+    "tanpa", "tapi", "telah", "tentang", "tersebut", "tetapi", "tidak", "untuk",
+    "yaitu", "yang",
+}
+_MIN = 3
+_VOWELS = "aiueo"
+
+
+def _strip_suffix(word, suffixes, min_length=_MIN):
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_length:
+            return word[:-len(suffix)]
+    return word
+
+
+def _strip_prefix(word):
+    if len(word) <= _MIN + 1:
+        return (word,)
+    for prefix in ("meng", "peng"):
+        if word.startswith(prefix) and word[4:5] in _VOWELS:
+            return (word[4:], "k" + word[4:])
+    for prefix in ("meny", "peny"):
+        if word.startswith(prefix) and word[4:5] in _VOWELS:
+            return ("s" + word[4:],)
+    for prefix in ("mem", "pem"):
+        if word.startswith(prefix):
+            rest = word[3:]
+            return (("p" + rest) if rest[:1] in _VOWELS else rest,)
+    for prefix in ("men", "pen"):
+        if word.startswith(prefix):
+            rest = word[3:]
+            return (("t" + rest) if rest[:1] in _VOWELS else rest,)
+    for prefix in ("ber", "ter", "per", "me", "pe", "be", "di", "ke", "se"):
+        if word.startswith(prefix) and len(word) - len(prefix) >= _MIN + 1:
+            return (word[len(prefix):],)
+    return (word,)
+
+
+def _stems(word):
+    if len(word) <= _MIN or word.isdigit():
+        return (word,)
+    word = _strip_suffix(word, ("lah", "kah", "tah", "pun"))
+    word = _strip_suffix(word, ("nya", "ku", "mu"))
+    return tuple(_strip_suffix(w, ("kan", "an", "i"), min_length=_MIN + 1) for w in _strip_prefix(word))
+
+
+def _tokenize(text):
+    return [
+        s for w in _TOKEN_RE.findall((text or "").lower())
+        if w not in _STOPWORDS and len(w) > 1 for s in _stems(w)
+    ]
+
+
+def _search_fields(title, tags, content):
+    return (
+        " ".join(_tokenize(f"{title or ''} {(tags or '').replace(',', ' ')}")),
+        " ".join(_tokenize(content)),
+    )
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_title', sa.String(length=400), nullable=True))
+        batch_op.add_column(sa.Column('search_body', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        op.create_index('ft_articles_search_title', 'articles', ['search_title'], mysql_prefix='FULLTEXT')
+        op.create_index('ft_articles_search', 'articles', ['search_title', 'search_body'], mysql_prefix='FULLTEXT')
+    elif dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_articles_search_tsv ON articles USING GIN {PG_VECTOR}")
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts "
+            "USING fts5(search_title, search_body, tokenize='unicode61')"
+        )
+
+    # Isi kolom search_* untuk artikel yang sudah ada (salinan beku tokenizer di atas)
+    rows = bind.execute(sa.text("SELECT id, title, tags, content FROM articles")).fetchall()
+    for article_id, title, tags, content in rows:
+        search_title, search_body = _search_fields(title, tags, content)
+        bind.execute(
+            sa.text("UPDATE articles SET search_title = :t, search_body = :b WHERE id = :id"),
+            {"t": search_title, "b": search_body, "id": article_id},
+        )
+        if dialect == 'sqlite':
+            bind.execute(
+                sa.text("INSERT INTO articles_fts (rowid, search_title, search_body) VALUES (:id, :t, :b)"),
+                {"t": search_title, "b": search_body, "id": article_id},
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        op.drop_index('ft_articles_search', table_name='articles')
+        op.drop_index('ft_articles_search_title', table_name='articles')
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_articles_search_tsv")
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS articles_fts")
+
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_column('search_body')
+        batch_op.drop_column('search_title')
@@ -0,0 +1,30 @@
+"""add index payments(created_at, id) untuk keyset pagination
+
+Revision ID: e1a8c5d3f940
+Revises: d9f3b2a6c718
+Create Date: 2026-10-19 13:30:22.170845
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a8c5d3f940'
+down_revision = 'd9f3b2a6c718'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('ix_payments_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_payments_status_created_at', ['status', 'created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_payments_transaction_id'), ['transaction_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_payments_transaction_id'))
+        batch_op.drop_index('ix_payments_status_created_at')
+        batch_op.drop_index('ix_payments_created_at_id')
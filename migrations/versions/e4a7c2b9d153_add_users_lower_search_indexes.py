@@ -0,0 +1,26 @@
+"""add index lower(full_name) / lower(email) untuk search admin konsultasi
+
+Revision ID: e4a7c2b9d153
+Revises: d2f8b4a6c091
+Create Date: 2026-10-20 10:02:11.593827
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c2b9d153'
+down_revision = 'd2f8b4a6c091'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_full_name_lower', 'users', [sa.text('lower(full_name)')], unique=False)
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_users_full_name_lower', table_name='users')
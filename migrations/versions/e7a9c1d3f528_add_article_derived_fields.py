@@ -0,0 +1,63 @@
+"""add preview / word_count / reading_time di articles
+
+Revision ID: e7a9c1d3f528
+Revises: d4f6b8c0e215
+Create Date: 2026-10-19 17:20:44.106395
+
+"""
+import math
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a9c1d3f528'
+down_revision = 'd4f6b8c0e215'
+branch_labels = None
+depends_on = None
+
+# Salinan beku aturan Article.update_derived_fields saat migrasi ini dibuat
+_TOKEN_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+PREVIEW_LENGTH = 200
+WORDS_PER_MINUTE = 200
+BATCH_SIZE = 200
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preview', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('word_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('reading_time', sa.Integer(), nullable=False, server_default='1'))
+
+    # Isi field turunan untuk artikel yang sudah ada (per batch id)
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, content FROM articles WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        for article_id, content in rows:
+            content = content or ""
+            word_count = len(_TOKEN_RE.findall(content.lower()))
+            bind.execute(
+                sa.text("UPDATE articles SET preview = :p, word_count = :w, reading_time = :r WHERE id = :id"),
+                {
+                    "p": content[:PREVIEW_LENGTH],
+                    "w": word_count,
+                    "r": max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+                    "id": article_id,
+                },
+            )
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_column('reading_time')
+        batch_op.drop_column('word_count')
+        batch_op.drop_column('preview')
@@ -0,0 +1,33 @@
+"""add content_versions (versi koleksi untuk ETag / cache)
+
+Revision ID: f1b3d5e7a930
+Revises: e7a9c1d3f528
+Create Date: 2026-10-19 17:55:03.271844
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b3d5e7a930'
+down_revision = 'e7a9c1d3f528'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('content_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(
+        "INSERT INTO content_versions (name, version, updated_at) "
+        "VALUES ('articles', 1, CURRENT_TIMESTAMP)"
+    )
+
+
+def downgrade():
+    op.drop_table('content_versions')
@@ -0,0 +1,53 @@
+"""add payment_daily_rollups (rekap revenue harian)
+
+Revision ID: f2b7d4e9a1c6
+Revises: e1a8c5d3f940
+Create Date: 2026-10-19 14:10:41.502317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7d4e9a1c6'
+down_revision = 'e1a8c5d3f940'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payment_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('payment_method', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('payment_count', sa.Integer(), nullable=False),
+    sa.Column('amount_total', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'doctor_id', 'payment_method', 'status', name='uq_payment_daily_rollups_key')
+    )
+    with op.batch_alter_table('payment_daily_rollups', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_payment_daily_rollups_day'), ['day'], unique=False)
+        batch_op.create_index(batch_op.f('ix_payment_daily_rollups_doctor_id'), ['doctor_id'], unique=False)
+
+    # Isi awal dari payments yang sudah ada
+    op.execute(
+        "INSERT INTO payment_daily_rollups "
+        "(day, doctor_id, payment_method, status, payment_count, amount_total, updated_at) "
+        "SELECT DATE(p.created_at), c.doctor_id, COALESCE(p.payment_method, ''), "
+        "COALESCE(p.status, 'pending'), COUNT(p.id), COALESCE(SUM(p.amount), 0), CURRENT_TIMESTAMP "
+        "FROM payments p JOIN consultations c ON c.id = p.consultation_id "
+        "GROUP BY DATE(p.created_at), c.doctor_id, COALESCE(p.payment_method, ''), COALESCE(p.status, 'pending')"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('payment_daily_rollups', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_payment_daily_rollups_doctor_id'))
+        batch_op.drop_index(batch_op.f('ix_payment_daily_rollups_day'))
+
+    op.drop_table('payment_daily_rollups')
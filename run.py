@@ -1,7 +1,10 @@
 from app import create_app, socketio
+from app.background import start_background_jobs
 
 app = create_app()
 
 if __name__ == '__main__':
+    # Job periodik (sweeper, dll) cuma jalan di proses server, bukan saat perintah CLI
+    start_background_jobs(app)
     # Gunakan socketio.run, bukan app.run agar fitur chat jalan nanti
     socketio.run(app, debug=True, port=5000)
\ No newline at end of file
@@ -1,3 +1,4 @@
+import os
 import socketio
 
 # Pura-pura jadi Pasien
@@ -16,6 +17,13 @@ def new_message(data):
     print(f"🕒 Jam: {data['timestamp']}")
     print("-" * 20)
 
-# Connect ke Server Flask
-sio.connect('http://localhost:5000')
+# Server menggabungkan beberapa event dalam 1 frame kalau datang berdekatan
+@sio.event
+def batch(events):
+    for ev in events:
+        if ev['event'] == 'new_message':
+            new_message(ev['data'])
+
+# Connect ke Server Flask (wajib bawa JWT, dapat dari /api/auth/login)
+sio.connect('http://localhost:5000', auth={'token': os.environ.get('JWT_TOKEN', '')})
 sio.wait()
\ No newline at end of file